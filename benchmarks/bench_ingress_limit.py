@@ -0,0 +1,80 @@
+"""
+Ingress rate limiting: cost of the check and work saved on a misbehaving client.
+
+Usage:
+    python benchmarks/bench_ingress_limit.py [datagrams]
+
+1. A client repeats DISCOVERs (new xid each time) as fast as it can. Every datagram goes through
+   `Server.admit` and, if admitted, `Server.handle_client`, as in the receive loop of the
+   engines. Timed with the limiter off and with the per-MAC limit of server_config.
+2. The time `Server.admit` adds to a datagram that passes, with new MAC addresses only.
+Logging is disabled.
+"""
+import logging
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+import server_config as config  # noqa: E402
+from server import Server  # noqa: E402
+from address_pool import AddressPool  # noqa: E402
+from ingress_limiter import IngressRateLimiter  # noqa: E402
+
+
+class NullSocket:
+    def sendto(self, data, address):
+        return len(data)
+
+
+def discover(mac, xid):
+    header = struct.pack("!BBBBIHHIIII16s64s128s4s", 1, 1, 6, 0, xid, 0, 0x8000, 0, 0, 0, 0,
+                         mac + b"\x00" * 10, b"\x00" * 64, b"\x00" * 128, b"\x63\x82\x53\x63")
+    return header + b"\x35\x01\x01\x3d\x07\x01" + mac + b"\xff"
+
+
+def flood(label, datagrams):
+    server_socket = NullSocket()
+    mac = bytes.fromhex("02aabbccddee")
+    messages = [discover(mac, xid) for xid in range(datagrams)]
+    dropped_before = sum(Server.ingress_dropped.values.values())
+    start = time.perf_counter()
+    for message in messages:
+        if Server.admit(message, "0.0.0.0"):
+            Server.handle_client(message, "0.0.0.0", server_socket)
+    elapsed = time.perf_counter() - start
+    dropped = sum(Server.ingress_dropped.values.values()) - dropped_before
+    print(f"{label:<28} {elapsed / datagrams * 1e6:7.2f} us per datagram, {dropped} dropped")
+
+
+def main():
+    datagrams = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    os.chdir(tempfile.mkdtemp(prefix="dhcp-bench-"))
+    os.makedirs("output")
+    Server()
+    logging.disable(logging.CRITICAL)
+    Server.ip_pool = AddressPool(["10.0.0.0/16"])
+
+    Server.ingress_limiter = IngressRateLimiter()
+    flood("one MAC, no limit", datagrams)
+    Server.ingress_limiter = IngressRateLimiter(config.ingress_mac_rate, config.ingress_mac_burst,
+                                                config.ingress_source_rate, config.ingress_source_burst)
+    flood(f"one MAC, {config.ingress_mac_rate}/s per MAC", datagrams)
+
+    messages = [discover(random.randbytes(6), i) for i in range(datagrams)]
+    for label, limiter in (("admit, limiter off", IngressRateLimiter()),
+                           ("admit, per-MAC + per-source", IngressRateLimiter(10, 20, 10**9, 10**9))):
+        Server.ingress_limiter = limiter
+        start = time.perf_counter()
+        for message in messages:
+            Server.admit(message, "0.0.0.0")
+        print(f"{label:<28} {(time.perf_counter() - start) / datagrams * 1e6:7.2f} us per datagram")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Lookup and update cost of the LeaseStore for growing numbers of leases.
+
+Usage:
+    python benchmarks/bench_lease_store.py [sizes...]
+
+Every operation should cost about the same at 1k and 1M leases: the MAC and IP indexes
+are hash lookups and renewals / expiries only touch the expiry heap in O(log n). Leases are keyed
+by integer MAC and IPv4 addresses, as in the server.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+from lease_store import LeaseStore  # noqa: E402
+
+OPERATIONS = 100_000
+
+
+def mac_of(i):
+    return 0x020000000000 + i
+
+
+def ip_of(i):
+    return 0x0A000000 + i
+
+
+def per_op_ns(function, keys):
+    start = time.perf_counter()
+    for key in keys:
+        function(key)
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+
+def run(size):
+    store = LeaseStore()
+    now = time.time()
+    start = time.perf_counter()
+    for i in range(size):
+        store.bind(mac_of(i), ip_of(i), now + 3600 + i % 600, 3600, i)
+    build_s = time.perf_counter() - start
+
+    picks = [random.randrange(size) for _ in range(OPERATIONS)]
+    macs = [mac_of(i) for i in picks]
+    ips = [ip_of(i) for i in picks]
+
+    results = {
+        "by MAC": per_op_ns(store.get, macs),
+        "by IP": per_op_ns(store.find_by_ip, ips),
+        "renew": per_op_ns(lambda mac: store.bind(mac, store.get(mac).ip, now + 7200, 3600, 0), macs),
+    }
+
+    # Expire up to 10k leases: only the due part of the expiry index is visited
+    for i in range(min(size, 10_000)):
+        store.release(mac_of(i), now)
+    start = time.perf_counter()
+    expired = store.pop_expired(now)
+    results["expire"] = (time.perf_counter() - start) / max(1, len(expired)) * 1e9
+    return build_s, results
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or [
+        1_000, 10_000, 100_000, 1_000_000]
+    columns = ["by MAC", "by IP", "renew", "expire"]
+    print(f"{'leases':>10} {'build s':>8} " +
+          " ".join(f"{c + ' ns':>11}" for c in columns))
+    for size in sizes:
+        build_s, results = run(size)
+        print(f"{size:>10} {build_s:>8.2f} " +
+              " ".join(f"{results[c]:>11.0f}" for c in columns), flush=True)
+
+
+if __name__ == "__main__":
+    main()
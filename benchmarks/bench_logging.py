@@ -0,0 +1,99 @@
+"""
+Cost of logging on the packet path: synchronous handlers versus the queued log pipeline.
+
+Usage:
+    python benchmarks/bench_logging.py [exchanges]
+
+Runs DORA exchanges through `Server.handle_client` while every log line goes to a file and
+to a "terminal" handler that takes 1 ms per line, as a slow console would. Reports the time per
+exchange and how many lines were written, dropped or suppressed.
+"""
+import logging
+import os
+import socket
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+import server_config as config  # noqa: E402
+from server import Server  # noqa: E402
+from address_pool import AddressPool  # noqa: E402
+from log_pipeline import LogPipeline  # noqa: E402
+
+
+class RecordingSocket:
+    last = b""
+
+    def sendto(self, data, address):
+        self.last = bytes(data)
+        return len(data)
+
+
+class SlowTerminalHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = 0
+
+    def emit(self, record):
+        self.format(record)
+        time.sleep(0.001)
+        self.lines += 1
+
+
+def client_message(mac, xid, msg_type, requested_ip=None):
+    header = struct.pack("!BBBBIHHIIII16s64s128s4s", 1, 1, 6, 0, xid, 0, 0x8000, 0, 0, 0, 0,
+                         mac + b"\x00" * 10, b"\x00" * 64, b"\x00" * 128, b"\x63\x82\x53\x63")
+    options = b"\x35\x01" + bytes([msg_type]) + b"\x3d\x07\x01" + mac
+    if requested_ip:
+        options += b"\x32\x04" + requested_ip + b"\x36\x04" + socket.inet_aton(config.server_ip)
+    return header + options + b"\x37\x04\x01\x03\x06\x0f\xff"
+
+
+def run(label, exchanges, first_mac):
+    server_socket = RecordingSocket()
+    start = time.perf_counter()
+    for i in range(exchanges):
+        mac = (first_mac + i).to_bytes(6, "big")
+        Server.handle_client(client_message(mac, i, 1), "0.0.0.0", server_socket)
+        Server.handle_client(client_message(mac, i, 3, server_socket.last[16:20]),
+                             "0.0.0.0", server_socket)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed / exchanges * 1e6:9.1f} us per exchange")
+
+
+def main():
+    exchanges = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    os.chdir(tempfile.mkdtemp(prefix="dhcp-bench-"))
+    os.makedirs("output")
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    file_handler = logging.FileHandler("output/log.log")
+    terminal = SlowTerminalHandler()
+    for handler in (file_handler, terminal):
+        handler.setFormatter(formatter)
+    logging.basicConfig(level=logging.INFO, handlers=[file_handler, terminal])
+    Server()
+    Server.ip_pool = AddressPool(["10.0.0.0/16"])
+
+    run("synchronous handlers", exchanges, 0x020000000000)
+    print(f"  lines written: {terminal.lines}")
+
+    terminal.lines = 0
+    pipeline = LogPipeline([file_handler, terminal], config.log_queue_size, config.log_rate_limit,
+                           config.log_rate_burst, stats_interval=0)
+    logging.root.handlers = [pipeline.queue_handler]
+    config.log_rate_limiter = pipeline.rate_limiter
+    pipeline.start()
+    run("log pipeline", exchanges, 0x030000000000)
+    written_by_then = terminal.lines
+    pipeline.stop()
+    suppressed = sum(pipeline.rate_limiter.take_suppressed().values())
+    print(f"  lines written during the run: {written_by_then}, after draining: {terminal.lines}, "
+          f"dropped: {pipeline.stats()['dropped']}, suppressed: {suppressed}")
+
+
+if __name__ == "__main__":
+    main()
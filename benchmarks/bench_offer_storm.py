@@ -0,0 +1,85 @@
+"""
+Concurrent DISCOVERs: how many clients get an ACK on their first REQUEST.
+
+Usage:
+    python benchmarks/bench_offer_storm.py [clients] [burst]
+
+Clients arrive in bursts of `burst`: every client of a burst sends its DISCOVER before any of
+them sends its REQUEST, as happens when many clients boot at once. A client that gets a NAK
+starts over. Reports the NAKs, the DORA rounds needed and the offer-to-ACK conversion.
+Logging is disabled.
+"""
+import logging
+import os
+import socket
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+import server_config as config  # noqa: E402
+from server import Server  # noqa: E402
+from address_pool import AddressPool  # noqa: E402
+
+
+class RecordingSocket:
+    last = b""
+
+    def sendto(self, data, address):
+        self.last = bytes(data)
+        return len(data)
+
+
+def client_message(mac, xid, msg_type, requested_ip=None):
+    header = struct.pack("!BBBBIHHIIII16s64s128s4s", 1, 1, 6, 0, xid, 0, 0x8000, 0, 0, 0, 0,
+                         mac + b"\x00" * 10, b"\x00" * 64, b"\x00" * 128, b"\x63\x82\x53\x63")
+    options = b"\x35\x01" + bytes([msg_type]) + b"\x3d\x07\x01" + mac
+    if requested_ip:
+        options += b"\x32\x04" + requested_ip + b"\x36\x04" + socket.inet_aton(config.server_ip)
+    return header + options + b"\x37\x04\x01\x03\x06\x0f\xff"
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    burst = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    os.chdir(tempfile.mkdtemp(prefix="dhcp-bench-"))
+    os.makedirs("output")
+    Server()
+    logging.disable(logging.CRITICAL)
+    Server.ip_pool = AddressPool(["10.0.0.0/16"])
+    server_socket = RecordingSocket()
+
+    naks = rounds = 0
+    xid = 0
+    start = time.perf_counter()
+    for first in range(0, clients, burst):
+        waiting = [(0x020000000000 + i).to_bytes(6, "big") for i in range(first, min(first + burst, clients))]
+        while waiting:
+            rounds += 1
+            offers = []
+            for mac in waiting:
+                xid += 1
+                Server.handle_client(client_message(mac, xid, 1), "0.0.0.0", server_socket)
+                offers.append((mac, xid, server_socket.last[16:20]))
+            waiting = []
+            for mac, offer_xid, offered_ip in offers:
+                Server.handle_client(client_message(mac, offer_xid, 3, offered_ip),
+                                     "0.0.0.0", server_socket)
+                if server_socket.last[242] == 6:  # DHCP NAK: start over
+                    naks += 1
+                    waiting.append(mac)
+    elapsed = time.perf_counter() - start
+
+    print(f"{clients} clients in bursts of {burst}: {elapsed / clients * 1e6:.1f} us per client")
+    print(f"NAKs: {naks}, DORA rounds per burst: {rounds / -(-clients // burst):.1f}, "
+          f"leases bound: {config.lease_store.count()}")
+    conversion = Server.offer_conversion_ratio()
+    print(f"offers made: {Server.offers_made.values[None]}, "
+          f"offer-to-ACK conversion: {'n/a' if conversion is None else f'{conversion:.1%}'}")
+
+
+if __name__ == "__main__":
+    main()
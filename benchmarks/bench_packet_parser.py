@@ -0,0 +1,76 @@
+"""
+Parse throughput: `Server.parse_dhcp_message` against the lazy `DHCPPacket` view.
+
+Usage:
+    python benchmarks/bench_packet_parser.py [iterations]
+
+Each iteration parses a DHCPREQUEST shaped like the ones real clients send and reads what the
+server's handlers read: message type, xid, chaddr, requested IP (50) and lease time (51).
+"""
+import os
+import socket
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+from server import Server  # noqa: E402
+from dhcp_packet import DHCPPacket  # noqa: E402
+
+
+def client_request():
+    header = struct.pack("!BBBBIHHIIII16s64s128s4s", 1, 1, 6, 0, 0x1234abcd, 0, 0x8000, 0, 0, 0, 0,
+                         bytes.fromhex("001a2b3c4d5e") + b"\x00" * 10, b"\x00" * 64, b"\x00" * 128, b"\x63\x82\x53\x63")
+    options = (
+        b"\x35\x01\x03"  # Message type: REQUEST
+        + b"\x32\x04" + socket.inet_aton("192.168.1.100")  # Requested IP
+        + b"\x33\x04" + struct.pack("!I", 3600)  # Lease time
+        + b"\x36\x04" + socket.inet_aton("192.168.1.1")  # Server identifier
+        + b"\x3d\x07\x01" + bytes.fromhex("001a2b3c4d5e")  # Client identifier
+        + b"\x0c\x08" + b"host-001"  # Hostname
+        + b"\x3c\x08" + b"MSFT 5.0"  # Vendor class
+        + b"\x37\x0c" + bytes([1, 3, 6, 15, 31, 33, 43, 44, 46, 47, 119, 121])  # Parameter request list
+        + b"\x39\x02\x05\xdc"  # Maximum message size
+        + b"\xff"
+    )
+    return header + options
+
+
+def read_dict(message):
+    parsed = Server.parse_dhcp_message(message)
+    options = parsed["options"]
+    return (options[53][0], parsed["xid"], parsed["chaddr"], socket.inet_ntoa(options[50]),
+            int.from_bytes(options[51], "big"))
+
+
+def read_packet(message):
+    packet = DHCPPacket(message)
+    return (packet.message_type, packet.xid, packet.chaddr, socket.inet_ntoa(packet.option(50)),
+            int.from_bytes(packet.option(51), "big"))
+
+
+def packets_per_second(function, message, iterations, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            function(message)
+        best = min(best, time.perf_counter() - start)
+    return iterations / best
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    message = client_request()
+    assert read_dict(message) == read_packet(message)
+
+    old = packets_per_second(read_dict, message, iterations)
+    new = packets_per_second(read_packet, message, iterations)
+    print(f"parse_dhcp_message: {old:>10,.0f} packets/s")
+    print(f"DHCPPacket:         {new:>10,.0f} packets/s ({new / old:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
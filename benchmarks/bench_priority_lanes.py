@@ -0,0 +1,169 @@
+"""
+Completed DORAs under a DISCOVER flood: priority lanes versus a single FIFO worker queue.
+
+Usage:
+    python benchmarks/bench_priority_lanes.py [seconds] [clients_per_second] [fifo|lanes]
+
+Runs the threaded engine's worker pool and state actor in-process. One thread submits
+DISCOVERs from 5000 flooding MAC addresses as fast as it can, which keeps the worker queue
+full; another starts `clients_per_second` new clients that do a full DORA. A client sends its
+REQUEST as soon as its OFFER is sent and retransmits after 1 s without an answer. Packets go
+through `Server.lane_of` and `WorkerPool.submit` exactly as in the receive loop.
+
+Each mode runs in its own process. The FIFO queue gets the total size of the lanes, so both
+modes hold as many packets. Reports the DORAs completed per second, their latency and the
+packets dropped per lane and the client REQUESTs dropped. Logging is disabled.
+"""
+import logging
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+import server_config as config  # noqa: E402
+from server import Server  # noqa: E402
+from address_pool import AddressPool  # noqa: E402
+from dhcp_packet import peek_message_type  # noqa: E402
+from expiry_scheduler import ExpiryScheduler  # noqa: E402
+from worker_pool import WorkerPool  # noqa: E402
+
+FLOOD_MACS = 5000
+RETRANSMIT_AFTER = 1.0
+
+
+def client_message(mac, xid, msg_type, requested_ip=None):
+    header = struct.pack("!BBBBIHHIIII16s64s128s4s", 1, 1, 6, 0, xid, 0, 0x8000, 0, 0, 0, 0,
+                         mac + b"\x00" * 10, b"\x00" * 64, b"\x00" * 128, b"\x63\x82\x53\x63")
+    options = b"\x35\x01" + bytes([msg_type]) + b"\x3d\x07\x01" + mac
+    if requested_ip:
+        options += b"\x32\x04" + requested_ip + b"\x36\x04" + socket.inet_aton(config.server_ip)
+    return header + options + b"\x37\x04\x01\x03\x06\x0f\xff"
+
+
+class Clients:
+    """
+    The DORA clients, answered through the socket the workers send their replies on.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}  # xid -> [mac, message, started, last_sent]
+        self.latencies = []
+        self.requests_dropped = 0
+
+    def sendto(self, data, address):
+        xid = int.from_bytes(data[4:8], "big")
+        msg_type = peek_message_type(data)
+        with self.lock:
+            session = self.sessions.get(xid)
+            if session is None:
+                return len(data)
+            if msg_type == 2 and session[1][242] == 1:
+                session[1] = client_message(session[0], xid, 3, bytes(data[16:20]))
+                session[3] = time.monotonic()
+                message = session[1]
+            elif msg_type == 5 and session[1][242] == 3:
+                del self.sessions[xid]
+                self.latencies.append(time.monotonic() - session[2])
+                return len(data)
+            else:
+                return len(data)
+        if not submit(message, self):
+            self.requests_dropped += 1
+        return len(data)
+
+    def start(self, mac, xid):
+        message = client_message(mac, xid, 1)
+        now = time.monotonic()
+        with self.lock:
+            self.sessions[xid] = [mac, message, now, now]
+        submit(message, self)
+
+    def retransmit(self):
+        now = time.monotonic()
+        with self.lock:
+            due = [session for session in self.sessions.values() if now - session[3] > RETRANSMIT_AFTER]
+            for session in due:
+                session[3] = now
+        for session in due:
+            submit(session[1], self)
+
+
+def submit(message, server_socket):
+    # Same as the receive loop of Server.start_dhcp_server
+    return Server.worker_pool.submit(message, "0.0.0.0", server_socket, None,
+                                     lane=Server.lane_of(message) if config.worker_priority_lanes else 0)
+
+
+def run(seconds, rate, mode):
+    os.chdir(tempfile.mkdtemp(prefix="dhcp-bench-"))
+    os.makedirs("output")
+    Server()
+    logging.disable(logging.CRITICAL)
+    Server.ip_pool = AddressPool(["10.0.0.0/12"])
+    Server.start_state_actor()
+    Server.expiry_scheduler = ExpiryScheduler(config.expiry_resolution)
+    config.lease_store.expiry_listener = Server.expiry_scheduler.schedule
+    threading.Thread(target=Server.lease_expiry_checker, daemon=True).start()
+
+    config.worker_priority_lanes = mode == "lanes"
+    queue_size = config.request_lane_size + config.discover_lane_size
+    Server.worker_pool = WorkerPool(Server.handle_client, config.worker_count, queue_size, Server.worker_lanes())
+    Server.worker_pool.start()
+
+    clients = Clients()
+    stop = threading.Event()
+
+    def flood():
+        flood_socket = Clients()
+        macs = [(0x060000000000 + i).to_bytes(6, "big") for i in range(FLOOD_MACS)]
+        xid = 0
+        while not stop.is_set():
+            xid += 1
+            submit(client_message(macs[xid % FLOOD_MACS], 0x80000000 + xid, 1), flood_socket)
+
+    flood_thread = threading.Thread(target=flood, daemon=True)
+    flood_thread.start()
+    start = time.monotonic()
+    started = 0
+    while time.monotonic() - start < seconds:
+        while started < (time.monotonic() - start) * rate:
+            clients.start((0x020000000000 + started).to_bytes(6, "big"), started + 1)
+            started += 1
+        clients.retransmit()
+        time.sleep(0.005)
+    stop.set()
+    flood_thread.join()
+
+    stats = Server.worker_pool.stats()
+    latencies = sorted(clients.latencies)
+    completed = len(latencies)
+    p50 = latencies[completed // 2] * 1000 if completed else float("nan")
+    p99 = latencies[int(completed * 0.99)] * 1000 if completed else float("nan")
+    lanes = ", ".join(f"{name}: {lane['dropped']} full / {lane['expired']} stale"
+                      for name, lane in stats["lanes"].items())
+    print(f"{mode:<6} {completed / seconds:>8.0f} DORAs/s ({completed} of {started} clients), "
+          f"p50 {p50:.0f} ms, p99 {p99:.0f} ms, {clients.requests_dropped} REQUESTs dropped; "
+          f"handled {stats['processed']} packets; dropped {lanes}")
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rate = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    if len(sys.argv) > 3:
+        run(seconds, rate, sys.argv[3])
+        return
+    print(f"{rate} clients/s for {seconds:g} s under a DISCOVER flood, {config.worker_count} workers")
+    for mode in ("fifo", "lanes"):
+        subprocess.run([sys.executable, os.path.abspath(__file__), str(seconds), str(rate), mode], check=True)
+
+
+if __name__ == "__main__":
+    main()
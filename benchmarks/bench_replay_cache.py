@@ -0,0 +1,89 @@
+"""
+Cost of answering retransmitted DISCOVERs and REQUESTs, with and without the replay cache.
+
+Usage:
+    python benchmarks/bench_replay_cache.py [clients] [retransmits]
+
+Every client runs a DORA exchange through `Server.handle_client` and sends each DISCOVER and
+REQUEST `retransmits` more times with the same xid, as a client does when replies are slow.
+Reports the time per retransmission and checks that it was answered with the original reply.
+Logging is disabled.
+"""
+import logging
+import os
+import socket
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+import server_config as config  # noqa: E402
+from server import Server  # noqa: E402
+from address_pool import AddressPool  # noqa: E402
+from replay_cache import ReplayCache  # noqa: E402
+
+
+class RecordingSocket:
+    last = b""
+
+    def sendto(self, data, address):
+        self.last = bytes(data)
+        return len(data)
+
+
+def client_message(mac, xid, msg_type, requested_ip=None):
+    header = struct.pack("!BBBBIHHIIII16s64s128s4s", 1, 1, 6, 0, xid, 0, 0x8000, 0, 0, 0, 0,
+                         mac + b"\x00" * 10, b"\x00" * 64, b"\x00" * 128, b"\x63\x82\x53\x63")
+    options = b"\x35\x01" + bytes([msg_type]) + b"\x3d\x07\x01" + mac
+    if requested_ip:
+        options += b"\x32\x04" + requested_ip + b"\x36\x04" + socket.inet_aton(config.server_ip)
+    return header + options + b"\x37\x04\x01\x03\x06\x0f\xff"
+
+
+def run(label, clients, retransmits, first_mac):
+    server_socket = RecordingSocket()
+    retransmit_time = 0.0
+    changed = 0
+    for i in range(clients):
+        mac = (first_mac + i).to_bytes(6, "big")
+        discover = client_message(mac, i, 1)
+        Server.handle_client(discover, "0.0.0.0", server_socket)
+        offer = server_socket.last
+        request = client_message(mac, i, 3, offer[16:20])
+        Server.handle_client(request, "0.0.0.0", server_socket)
+        ack = server_socket.last
+        start = time.perf_counter()
+        for _ in range(retransmits):
+            Server.handle_client(discover, "0.0.0.0", server_socket)
+            changed += server_socket.last[16:20] != offer[16:20]
+            Server.handle_client(request, "0.0.0.0", server_socket)
+            changed += server_socket.last != ack
+        retransmit_time += time.perf_counter() - start
+    print(f"{label:<22} {retransmit_time / (2 * clients * retransmits) * 1e6:7.1f} us per retransmission, "
+          f"{changed} answered differently")
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    retransmits = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    os.chdir(tempfile.mkdtemp(prefix="dhcp-bench-"))
+    os.makedirs("output")
+    Server()
+    logging.disable(logging.CRITICAL)
+
+    Server.ip_pool = AddressPool(["10.0.0.0/16"])
+    Server.replay_cache = ReplayCache(0)
+    run("without replay cache", clients, retransmits, 0x020000000000)
+
+    Server.ip_pool = AddressPool(["10.1.0.0/16"])
+    Server.replay_cache = ReplayCache(config.replay_cache_size, config.replay_cache_ttl)
+    run("with replay cache", clients, retransmits, 0x030000000000)
+    print(f"  hits: {Server.replay_cache.hits}, misses: {Server.replay_cache.misses}, "
+          f"evictions: {Server.replay_cache.evictions}")
+
+
+if __name__ == "__main__":
+    main()
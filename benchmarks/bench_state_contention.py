@@ -0,0 +1,100 @@
+"""
+Lease state contention: 16 concurrent senders running DORA exchanges through `Server.handle_client`.
+
+Usage:
+    python benchmarks/bench_state_contention.py [senders] [exchanges_per_sender]
+
+Every sender thread plays the part of a worker of the threaded engine: it parses and encodes on
+its own thread while all lease and pool changes go through the state actor. Reports the total
+throughput and the latency of single messages. Logging is disabled.
+"""
+import logging
+import os
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+import server_config as config  # noqa: E402
+from server import Server  # noqa: E402
+from address_pool import AddressPool  # noqa: E402
+
+
+class RecordingSocket:
+    last = b""
+
+    def sendto(self, data, address):
+        self.last = bytes(data)
+        return len(data)
+
+
+def client_message(mac, xid, msg_type, requested_ip=None):
+    header = struct.pack("!BBBBIHHIIII16s64s128s4s", 1, 1, 6, 0, xid, 0, 0x8000, 0, 0, 0, 0,
+                         mac + b"\x00" * 10, b"\x00" * 64, b"\x00" * 128, b"\x63\x82\x53\x63")
+    options = b"\x35\x01" + bytes([msg_type]) + b"\x3d\x07\x01" + mac
+    if requested_ip:
+        options += b"\x32\x04" + requested_ip + b"\x36\x04" + socket.inet_aton(config.server_ip)
+    return header + options + b"\x37\x04\x01\x03\x06\x0f\xff"
+
+
+def sender(index, exchanges, latencies, barrier):
+    server_socket = RecordingSocket()
+    samples = []
+    barrier.wait()
+    for i in range(exchanges):
+        mac = (0x020000000000 + (index << 24) + i).to_bytes(6, "big")
+        xid = (index << 24) + i
+        start = time.perf_counter()
+        Server.handle_client(client_message(mac, xid, 1), "0.0.0.0", server_socket)
+        middle = time.perf_counter()
+        offer = server_socket.last
+        Server.handle_client(client_message(mac, xid, 3, offer[16:20]),
+                             "0.0.0.0", server_socket)
+        samples.append(middle - start)
+        samples.append(time.perf_counter() - middle)
+    latencies.extend(samples)
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    senders = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    exchanges = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    os.chdir(tempfile.mkdtemp(prefix="dhcp-bench-"))
+    os.makedirs("output")
+    Server()
+    logging.disable(logging.CRITICAL)
+    Server.ip_pool = AddressPool(["10.0.0.0/14"])
+    Server.start_state_actor()
+
+    latencies = []
+    barrier = threading.Barrier(senders + 1)
+    threads = [threading.Thread(target=sender, args=(i, exchanges, latencies, barrier), daemon=True)
+               for i in range(senders)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = senders * exchanges
+    print(f"{senders} senders x {exchanges} DORA exchanges")
+    print(f"throughput:      {total / elapsed:10.0f} exchanges/s ({2 * total / elapsed:.0f} messages/s)")
+    print(f"message latency: p50 {percentile(latencies, 0.50) * 1e6:8.1f} us, "
+          f"p99 {percentile(latencies, 0.99) * 1e6:8.1f} us, max {latencies[-1] * 1e6:8.1f} us")
+    print(f"leases bound:    {config.lease_store.count()} of {total}")
+    print(f"state commands:  {Server.state_actor.processed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Returning clients: how many get their previous address back, per allocation setting.
+
+Usage:
+    python benchmarks/bench_sticky_allocation.py [clients] [pool_cidr]
+
+1. `clients` clients are offered an address and bound.
+2. They all release, and their leases expire.
+3. Half as many new clients are bound.
+4. The first clients come back in random order, without asking for an address.
+MAC addresses are random.
+Counts the returning clients that got the address they had, and times an offer + bind.
+Each setting runs in its own process. Logging is disabled.
+"""
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+import server_config as config  # noqa: E402
+from server import Server  # noqa: E402
+from address_pool import AddressPool  # noqa: E402
+
+SETTINGS = (("sequential", 0), ("sequential", 65536), ("hashed", 0), ("hashed", 65536))
+
+
+def bind(mac_addresses):
+    start = time.perf_counter()
+    addresses = {}
+    for xid, mac_address in enumerate(mac_addresses):
+        addresses[mac_address] = Server.offer_address(mac_address, None, config.lease_duration, xid)
+        Server.commit_request(mac_address, config.lease_duration, xid)
+    return addresses, (time.perf_counter() - start) / len(mac_addresses) * 1e6
+
+
+def run(clients, pool_cidr, policy, history_size):
+    os.chdir(tempfile.mkdtemp(prefix="dhcp-bench-"))
+    os.makedirs("output")
+    config.allocation_policy = policy
+    config.address_history_size = history_size
+    Server()
+    logging.disable(logging.CRITICAL)
+    Server.ip_pool = AddressPool([pool_cidr])
+    rng = random.Random(1)
+
+    first = [rng.getrandbits(48) for _ in range(clients)]
+    before, bind_us = bind(first)
+    for mac_address in first:
+        Server.release_lease(mac_address)
+    Server.expire_due_leases()
+    bind([rng.getrandbits(48) for _ in range(clients // 2)])
+    returning = list(first)
+    rng.shuffle(returning)
+    after, _ = bind(returning)
+
+    same = sum(after[mac_address] == before[mac_address] for mac_address in first)
+    print(f"{policy:<11} {'on' if history_size else 'off':>7} {same / clients:>13.1%} {bind_us:>16.2f}")
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    pool_cidr = sys.argv[2] if len(sys.argv) > 2 else "10.0.0.0/18"
+    if len(sys.argv) > 4:
+        run(clients, pool_cidr, sys.argv[3], int(sys.argv[4]))
+        return
+    print(f"{clients} returning clients, {clients // 2} new clients, pool {pool_cidr}")
+    print(f"{'policy':<11} {'history':>7} {'same address':>13} {'offer+bind us':>16}")
+    for policy, history_size in SETTINGS:
+        subprocess.run([sys.executable, os.path.abspath(__file__), str(clients), pool_cidr,
+                        policy, str(history_size)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+import argparse
+import heapq
+import random
+import socket
+import struct
+import threading
+import time
+
+from utils import Client
+from client_config import SERVER_PORT, CLIENT_PORT, BUFFER_SIZE
+
+# DHCP message types (option 53)
+DISCOVER, OFFER, REQUEST, DECLINE, ACK, NAK, RELEASE, INFORM = 1, 2, 3, 4, 5, 6, 7, 8
+
+# Session states
+SELECTING, REQUESTING, INFORMING, DONE = range(4)
+
+PERCENTILES = (0.50, 0.90, 0.99, 0.999)
+
+
+def parse_reply(message):
+    """
+    Reads the fields the load generator needs from a server reply.
+
+    Returns:
+        tuple: (xid, message type, yiaddr bytes, server identifier bytes or None), or None if the
+            message is not a DHCP reply.
+    """
+    if len(message) < 241 or message[0] != 2 or message[236:240] != b"\x63\x82\x53\x63":
+        return None
+    xid, = struct.unpack("!I", message[4:8])
+    msg_type = server_id = None
+    i = 240
+    while i < len(message):
+        code = message[i]
+        if code == 255:
+            break
+        if code == 0:
+            i += 1
+            continue
+        if i + 1 >= len(message):
+            break
+        length = message[i + 1]
+        value = message[i + 2:i + 2 + length]
+        if code == 53 and length == 1:
+            msg_type = value[0]
+        elif code == 54 and length == 4:
+            server_id = value
+        i += 2 + length
+    if msg_type is None:
+        return None
+    return xid, msg_type, message[16:20], server_id
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Session:
+    """
+    One simulated client: a MAC address running a DORA exchange under its own xid.
+    """
+    __slots__ = ("index", "mac_bytes", "xid", "state", "started", "attempts", "message", "socket",
+                 "server_id", "leased_ip", "release")
+
+    def __init__(self, index, mac_bytes, xid, client_socket):
+        self.index = index
+        self.mac_bytes = mac_bytes
+        self.xid = xid
+        self.state = SELECTING
+        self.started = 0.0
+        self.attempts = 0
+        self.message = b""
+        self.socket = client_socket
+        self.server_id = None
+        self.leased_ip = None
+        self.release = False
+
+
+# ====================================================================================================
+# ==================================== Class LoadGenerator ===========================================
+# ====================================================================================================
+class LoadGenerator:
+    """
+    Runs DHCP exchanges for many distinct MAC addresses at once over a few sockets.
+
+    Sessions start at a configurable arrival rate, up to `concurrency` at a time. Replies are
+    matched to their session by xid, so all sessions share the sockets. A message that gets no
+    reply is retransmitted with exponential backoff (RFC 2131 section 4.1) and the session times
+    out after `retries` retransmissions. After the ACK a session may INFORM and RELEASE; a
+    fraction of the sessions DECLINE their offer instead of requesting it.
+
+    Attributes:
+        server (tuple): The server address in the form (IP, port).
+        clients (int): Sessions to run, one MAC address each.
+        rate (float): Sessions started per second. 0 starts them as fast as `concurrency` allows.
+        poisson (bool): Start sessions at exponentially distributed intervals instead of evenly.
+        concurrency (int): Sessions in progress at most.
+        decline_fraction (float): Share of the offers that are declined.
+        release_fraction (float): Share of the leases that are released after the ACK.
+        inform_fraction (float): Share of the leases followed by a DHCP INFORM.
+        timeout (float): Seconds before the first retransmission; doubled for each further one.
+        retries (int): Retransmissions before a session times out.
+        lease_duration (int, optional): Lease time (option 51) asked for in the DISCOVER.
+        counts (dict): Message and outcome counters.
+        latencies (list): DISCOVER to ACK times of the completed sessions, in seconds.
+    """
+
+    def __init__(self, server_address="127.0.0.1", server_port=SERVER_PORT, client_port=CLIENT_PORT,
+                 bind_address="", sockets=1, clients=1000, rate=500.0, poisson=False, concurrency=256,
+                 decline_fraction=0.0, release_fraction=0.0, inform_fraction=0.0, timeout=1.0, retries=3,
+                 lease_duration=None, first_mac=0x020000000000, seed=None):
+        self.server = (server_address, server_port)
+        self.clients = clients
+        self.rate = rate
+        self.poisson = poisson
+        self.concurrency = concurrency
+        self.decline_fraction = decline_fraction
+        self.release_fraction = release_fraction
+        self.inform_fraction = inform_fraction
+        self.timeout = timeout
+        self.retries = retries
+        self.lease_duration = lease_duration
+        self.first_mac = first_mac
+        self.random = random.Random(seed)
+        self.first_xid = self.random.randint(1, 0xFFFFFFFF)
+
+        self.sockets = [self.open_socket(bind_address, client_port, sockets > 1) for _ in range(sockets)]
+        self.sessions = {}
+        self.outstanding = 0
+        self.latencies = []
+        self.offer_latencies = []
+        self.counts = dict.fromkeys(
+            ("started", "completed", "offers", "naks", "timeouts", "retransmits", "declines", "releases",
+             "informs", "inform_acks", "inform_timeouts", "late_replies", "unmatched_replies",
+             "malformed_replies"), 0)
+        self.elapsed = 0.0
+        self._timers = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def open_socket(bind_address, port, reuse_port):
+        client_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        if reuse_port:
+            # The server answers on the client port, so every socket has to listen on it
+            client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        client_socket.bind((bind_address, port))
+        client_socket.settimeout(0.2)
+        return client_socket
+
+    # ====================================================================================================
+    # ======================================= Messages ===================================================
+    # ====================================================================================================
+    def build_message(self, session, msg_type, ciaddr=0, flags=0x8000, options=None):
+        message = Client.create_dhcp_message(
+            op=1, htype=1, hlen=6, hops=0, xid=session.xid, flags=flags, ciaddr=ciaddr, yiaddr=0,
+            siaddr=0, giaddr=0, mac_bytes=session.mac_bytes)
+        options_dict = {53: bytes([msg_type])}
+        options_dict.update(options or {})
+        return Client.append_dhcp_options(message, options_dict)
+
+    def send(self, session, message, retransmit=True):
+        """
+        Sends a message of a session and, if it expects a reply, arms its retransmission timer.
+        Called with the lock held.
+        """
+        session.socket.sendto(message, self.server)
+        if retransmit:
+            session.message = message
+            session.attempts = 0
+            self.arm_timer(session)
+
+    def arm_timer(self, session):
+        # Doubled for every retransmission and randomised by +-25%, as RFC 2131 does with 4 s +- 1 s
+        delay = self.timeout * (2 ** session.attempts) * self.random.uniform(0.75, 1.25)
+        heapq.heappush(self._timers, (time.perf_counter() + delay, session.xid, session.attempts))
+
+    def finish(self, session):
+        session.state = DONE
+        session.message = b""
+        self.outstanding -= 1
+
+    # ====================================================================================================
+    # ======================================= Sessions ===================================================
+    # ====================================================================================================
+    def start_session(self, index, now):
+        mac_bytes = (self.first_mac + index).to_bytes(6, "big")
+        xid = (self.first_xid + index) & 0xFFFFFFFF
+        session = Session(index, mac_bytes, xid, self.sockets[index % len(self.sockets)])
+        session.started = now
+        self.sessions[xid] = session
+        self.outstanding += 1
+        self.counts["started"] += 1
+        options = {}
+        if self.lease_duration:
+            options[51] = self.lease_duration.to_bytes(4, byteorder='big')
+        self.send(session, self.build_message(session, DISCOVER, options=options))
+
+    def on_reply(self, reply, now):
+        xid, msg_type, your_ip, server_id = reply
+        session = self.sessions.get(xid)
+        if session is None:
+            self.counts["unmatched_replies"] += 1
+            return
+        if session.state == SELECTING and msg_type == OFFER:
+            self.counts["offers"] += 1
+            self.offer_latencies.append(now - session.started)
+            session.server_id = server_id or socket.inet_aton(self.server[0])
+            if self.random.random() < self.decline_fraction:
+                self.counts["declines"] += 1
+                self.send(session, self.build_message(session, DECLINE, options={54: session.server_id, 50: your_ip}),
+                          retransmit=False)
+                self.finish(session)
+                return
+            session.state = REQUESTING
+            self.send(session, self.build_message(session, REQUEST, options={54: session.server_id, 50: your_ip}))
+        elif session.state == REQUESTING and msg_type == ACK:
+            self.counts["completed"] += 1
+            self.latencies.append(now - session.started)
+            session.leased_ip = your_ip
+            session.release = self.random.random() < self.release_fraction
+            if self.random.random() < self.inform_fraction:
+                self.counts["informs"] += 1
+                session.state = INFORMING
+                self.send(session, self.build_message(
+                    session, INFORM, ciaddr=int.from_bytes(your_ip, "big"), flags=0))
+            else:
+                self.end_bound_session(session)
+        elif session.state == INFORMING and msg_type == ACK:
+            self.counts["inform_acks"] += 1
+            self.end_bound_session(session)
+        elif session.state in (SELECTING, REQUESTING) and msg_type == NAK:
+            self.counts["naks"] += 1
+            self.finish(session)
+        else:
+            # An answer to a retransmission that was already answered
+            self.counts["late_replies"] += 1
+
+    def end_bound_session(self, session):
+        if session.release:
+            self.counts["releases"] += 1
+            self.send(session, self.build_message(
+                session, RELEASE, ciaddr=int.from_bytes(session.leased_ip, "big"),
+                options={54: session.server_id}), retransmit=False)
+        self.finish(session)
+
+    def on_timer(self, xid, attempt):
+        session = self.sessions[xid]
+        if session.state == DONE or session.attempts != attempt:
+            return
+        if attempt >= self.retries:
+            if session.state == INFORMING:
+                self.counts["inform_timeouts"] += 1
+                self.end_bound_session(session)
+            else:
+                self.counts["timeouts"] += 1
+                self.finish(session)
+            return
+        self.counts["retransmits"] += 1
+        session.socket.sendto(session.message, self.server)
+        session.attempts += 1
+        self.arm_timer(session)
+
+    # ====================================================================================================
+    # ========================================= Run ======================================================
+    # ====================================================================================================
+    def receive(self, client_socket):
+        while not self._stopped.is_set():
+            try:
+                message = client_socket.recv(BUFFER_SIZE)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            now = time.perf_counter()
+            reply = parse_reply(message)
+            with self._lock:
+                if reply is None:
+                    self.counts["malformed_replies"] += 1
+                else:
+                    self.on_reply(reply, now)
+
+    def next_interval(self):
+        if not self.rate:
+            return 0.0
+        if self.poisson:
+            return self.random.expovariate(self.rate)
+        return 1.0 / self.rate
+
+    def run(self):
+        """
+        Runs all sessions to completion or timeout.
+
+        Returns:
+            dict: The report, see `report()`.
+        """
+        receivers = [threading.Thread(target=self.receive, args=(client_socket,),
+                                      name=f"load-receiver-{i}", daemon=True)
+                     for i, client_socket in enumerate(self.sockets)]
+        for receiver in receivers:
+            receiver.start()
+
+        start = time.perf_counter()
+        next_start = start
+        started = 0
+        try:
+            while True:
+                now = time.perf_counter()
+                with self._lock:
+                    while started < self.clients and next_start <= now and self.outstanding < self.concurrency:
+                        self.start_session(started, now)
+                        started += 1
+                        next_start += self.next_interval()
+                    while self._timers and self._timers[0][0] <= now:
+                        _, xid, attempt = heapq.heappop(self._timers)
+                        self.on_timer(xid, attempt)
+                    if started == self.clients and not self.outstanding:
+                        break
+                    wake = self._timers[0][0] if self._timers else now + 0.005
+                if started < self.clients:
+                    wake = min(wake, next_start)
+                # Replies free concurrency slots at any time; do not oversleep them
+                time.sleep(min(max(wake - time.perf_counter(), 0.0), 0.002))
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self._stopped.set()
+            for receiver in receivers:
+                receiver.join()
+            for client_socket in self.sockets:
+                client_socket.close()
+        return self.report()
+
+    def report(self):
+        """
+        Returns the outcome counters, the NAK and timeout rates, and the latency percentiles
+        (milliseconds) of the completed DORA exchanges and of the offers.
+        """
+        report = dict(self.counts)
+        started = max(self.counts["started"], 1)
+        report["elapsed_s"] = self.elapsed
+        report["completed_per_s"] = self.counts["completed"] / self.elapsed if self.elapsed else 0.0
+        report["nak_rate"] = self.counts["naks"] / started
+        report["timeout_rate"] = self.counts["timeouts"] / started
+        for name, values in (("dora", self.latencies), ("offer", self.offer_latencies)):
+            values = sorted(values)
+            for fraction in PERCENTILES:
+                report[f"{name}_p{fraction * 100:g}_ms"] = percentile(values, fraction) * 1e3 if values else None
+            report[f"{name}_max_ms"] = values[-1] * 1e3 if values else None
+        return report
+
+
+def print_report(report):
+    print(f"sessions:     {report['started']} started, {report['completed']} completed "
+          f"({report['completed_per_s']:.0f}/s over {report['elapsed_s']:.2f} s)")
+    print(f"outcomes:     {report['naks']} NAK ({report['nak_rate']:.2%}), "
+          f"{report['timeouts']} timed out ({report['timeout_rate']:.2%}), {report['declines']} declined")
+    print(f"messages:     {report['retransmits']} retransmits, {report['releases']} releases, "
+          f"{report['informs']} informs ({report['inform_acks']} acked, {report['inform_timeouts']} timed out)")
+    print(f"odd replies:  {report['late_replies']} late, {report['unmatched_replies']} unmatched, "
+          f"{report['malformed_replies']} malformed")
+    for name, label in (("dora", "DORA latency"), ("offer", "offer latency")):
+        if report[f"{name}_max_ms"] is None:
+            continue
+        cells = ", ".join(f"p{fraction * 100:g} {report[f'{name}_p{fraction * 100:g}_ms']:.2f}"
+                          for fraction in PERCENTILES)
+        print(f"{label + ':':<14}{cells}, max {report[f'{name}_max_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DHCP load generator")
+    parser.add_argument("--server", default="127.0.0.1", help="server address")
+    parser.add_argument("--server-port", type=int, default=SERVER_PORT)
+    parser.add_argument("--client-port", type=int, default=CLIENT_PORT,
+                        help="port the server sends its replies to")
+    parser.add_argument("--bind", default="", help="local address of the client sockets")
+    parser.add_argument("--sockets", type=int, default=1, help="client sockets sharing the client port")
+    parser.add_argument("--clients", type=int, default=1000, help="sessions to run, one MAC address each")
+    parser.add_argument("--rate", type=float, default=500.0,
+                        help="sessions started per second, 0 = as fast as --concurrency allows")
+    parser.add_argument("--poisson", action="store_true", help="exponentially distributed arrivals")
+    parser.add_argument("--concurrency", type=int, default=256, help="sessions in progress at most")
+    parser.add_argument("--decline", type=float, default=0.0, help="share of offers declined")
+    parser.add_argument("--release", type=float, default=0.0, help="share of leases released")
+    parser.add_argument("--inform", type=float, default=0.0, help="share of leases followed by an INFORM")
+    parser.add_argument("--timeout", type=float, default=1.0, help="seconds before the first retransmission")
+    parser.add_argument("--retries", type=int, default=3, help="retransmissions before giving up")
+    parser.add_argument("--lease", type=int, default=None, help="lease time to ask for")
+    parser.add_argument("--first-mac", default="02:00:00:00:00:00", help="MAC address of the first session")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    generator = LoadGenerator(
+        server_address=args.server, server_port=args.server_port, client_port=args.client_port,
+        bind_address=args.bind, sockets=args.sockets, clients=args.clients, rate=args.rate,
+        poisson=args.poisson, concurrency=args.concurrency, decline_fraction=args.decline,
+        release_fraction=args.release, inform_fraction=args.inform, timeout=args.timeout,
+        retries=args.retries, lease_duration=args.lease,
+        first_mac=int(args.first_mac.replace(":", ""), 16), seed=args.seed)
+    print_report(generator.run())
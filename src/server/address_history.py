@@ -0,0 +1,47 @@
+import collections
+
+
+# ====================================================================================================
+# ==================================== Class AddressHistory ==========================================
+# ====================================================================================================
+class AddressHistory:
+    """
+    The last address bound to each client, kept after its lease has ended.
+
+    A client that comes back, e.g. after a reboot or once its lease expired, is offered the
+    address it had before if it is still free, so its ARP and DNS entries stay valid. At most
+    `capacity` clients are remembered; the one bound least recently is forgotten first.
+
+    Only the state owner reads and updates the history, so it does no locking.
+
+    Attributes:
+        capacity (int): Clients remembered at most. 0 disables the history.
+    """
+
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self._addresses = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._addresses)
+
+    def get(self, mac_address):
+        """
+        Returns the last address bound to a client, or None.
+        """
+        return self._addresses.get(mac_address)
+
+    def remember(self, mac_address, ip):
+        """
+        Records the address bound to a client.
+        """
+        if not self.capacity:
+            return
+        addresses = self._addresses
+        addresses[mac_address] = ip
+        addresses.move_to_end(mac_address)
+        if len(addresses) > self.capacity:
+            addresses.popitem(last=False)
+
+    def forget(self, mac_address):
+        self._addresses.pop(mac_address, None)
@@ -0,0 +1,292 @@
+import bisect
+import ipaddress
+from addresses import ip_to_int, int_to_ip
+
+WORD_BITS = 64
+FULL_WORD = (1 << WORD_BITS) - 1
+
+
+# ====================================================================================================
+# ==================================== Class AddressPool =============================================
+# ====================================================================================================
+class AddressPool:
+    """
+    Allocatable IPv4 addresses declared as single addresses, ranges and CIDR blocks, backed by a bitmap.
+
+    Every configured address gets an index; bit `index` of the bitmap is set while the address is
+    free. The bitmap is split into 64-bit words and a summary integer has bit `w` set while word `w`
+    still has a free address, so finding the first free address never walks the pool.
+
+    Pool lines:
+        192.168.1.100                   single address
+        192.168.1.100-192.168.1.200     inclusive range
+        10.0.0.0/16                     CIDR block (network and broadcast addresses are left out)
+        !192.168.1.150                  exclusion, accepts any of the forms above; an excluded CIDR
+                                        block removes every address of the block
+        # comment                       ignored
+
+    Attributes:
+        size (int): Number of configured addresses.
+        free_count (int): Number of addresses that can still be allocated.
+    """
+
+    def __init__(self, lines=()):
+        ranges = []
+        exclusions = []
+        for number, line in enumerate(lines, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            try:
+                if line.startswith('!'):
+                    exclusions.append(AddressPool.parse_range(line[1:].strip(), hosts_only=False))
+                else:
+                    ranges.append(AddressPool.parse_range(line))
+            except ValueError as e:
+                raise ValueError(f"Invalid IP pool line {number} '{line}': {e}") from None
+
+        self._ranges = AddressPool._subtract(
+            AddressPool._merge(ranges), AddressPool._merge(exclusions))
+        self._starts = [start for start, _ in self._ranges]
+        self._offsets = []
+        self.size = 0
+        for start, end in self._ranges:
+            self._offsets.append(self.size)
+            self.size += end - start + 1
+
+        word_count = (self.size + WORD_BITS - 1) // WORD_BITS
+        self._words = [FULL_WORD] * word_count
+        if self.size % WORD_BITS:
+            self._words[-1] = (1 << (self.size % WORD_BITS)) - 1
+        self._summary = (1 << word_count) - 1
+        self.free_count = self.size
+
+    # ====================================================================================================
+    # ==================================== Parsing Helpers ===============================================
+    # ====================================================================================================
+    ip_to_int = staticmethod(ip_to_int)
+    int_to_ip = staticmethod(int_to_ip)
+
+    @staticmethod
+    def parse_range(text, hosts_only=True):
+        """
+        Parses one pool entry into an inclusive (first, last) range of integer addresses.
+
+        Args:
+            text (str): A single address, an "first-last" range or a CIDR block.
+            hosts_only (bool, optional): Leave the network and broadcast addresses out of a CIDR block.
+
+        Returns:
+            tuple: (first, last) integer addresses.
+
+        Raises:
+            ValueError: If a range ends before it starts or the CIDR block is malformed.
+        """
+        if '/' in text:
+            network = ipaddress.IPv4Network(text, strict=False)
+            first, last = int(network.network_address), int(
+                network.broadcast_address)
+            if hosts_only and network.prefixlen < 31:
+                first, last = first + 1, last - 1
+            return first, last
+        if '-' in text:
+            first, last = text.split('-', 1)
+            first, last = AddressPool.ip_to_int(first.strip()), AddressPool.ip_to_int(last.strip())
+            if first > last:
+                raise ValueError("the range ends before it starts")
+            return first, last
+        address = AddressPool.ip_to_int(text)
+        return address, address
+
+    @staticmethod
+    def _merge(ranges):
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    @staticmethod
+    def _subtract(ranges, exclusions):
+        result = []
+        for start, end in ranges:
+            for excluded_start, excluded_end in exclusions:
+                if excluded_end < start or excluded_start > end:
+                    continue
+                if excluded_start > start:
+                    result.append((start, excluded_start - 1))
+                start = excluded_end + 1
+                if start > end:
+                    break
+            if start <= end:
+                result.append((start, end))
+        return result
+
+    # ====================================================================================================
+    # ================================== Index <-> Address ===============================================
+    # ====================================================================================================
+    def _index(self, ip):
+        if isinstance(ip, str):
+            try:
+                ip = ip_to_int(ip)
+            except OSError:
+                return None
+        elif not isinstance(ip, int):
+            return None
+        address = ip
+        i = bisect.bisect_right(self._starts, address) - 1
+        if i < 0 or address > self._ranges[i][1]:
+            return None
+        return self._offsets[i] + address - self._starts[i]
+
+    def _address(self, index):
+        i = bisect.bisect_right(self._offsets, index) - 1
+        return self._starts[i] + index - self._offsets[i]
+
+    def _is_free_index(self, index):
+        return (self._words[index // WORD_BITS] >> (index % WORD_BITS)) & 1 == 1
+
+    def _first_free_index(self):
+        if not self._summary:
+            return None
+        word = (self._summary & -self._summary).bit_length() - 1
+        bits = self._words[word]
+        return word * WORD_BITS + (bits & -bits).bit_length() - 1
+
+    def _next_free_index(self, start):
+        # First free index at or after `start`, wrapping around to the first free index
+        word = start // WORD_BITS
+        bits = self._words[word] >> (start % WORD_BITS)
+        if bits:
+            return start + (bits & -bits).bit_length() - 1
+        later_words = self._summary >> (word + 1)
+        if not later_words:
+            return self._first_free_index()
+        word += (later_words & -later_words).bit_length()
+        bits = self._words[word]
+        return word * WORD_BITS + (bits & -bits).bit_length() - 1
+
+    # ====================================================================================================
+    # ===================================== Pool Operations ==============================================
+    # ====================================================================================================
+    def is_configured(self, ip):
+        """
+        Returns True if the address belongs to the pool, whether it is free or allocated.
+        """
+        return self._index(ip) is not None
+
+    def first_free(self):
+        """
+        Returns the lowest free address (as an integer) without allocating it, or None if the pool is exhausted.
+        """
+        index = self._first_free_index()
+        return None if index is None else self._address(index)
+
+    def allocate(self, ip=None):
+        """
+        Marks an address as used.
+
+        Args:
+            ip (int | str, optional): The address to allocate. Defaults to the lowest free address.
+
+        Returns:
+            int | str: The allocated address, or None if it is not free or the pool is exhausted.
+        """
+        index = self._first_free_index() if ip is None else self._index(ip)
+        if index is None or not self._is_free_index(index):
+            return None
+        self._take(index)
+        return self._address(index) if ip is None else ip
+
+    def allocate_from(self, position):
+        """
+        Marks the first free address at or after a position in the pool as used, wrapping
+        around at the end. Spreading the positions (e.g. by hashing the client's MAC address)
+        spreads the allocations over the whole pool instead of packing them at its start.
+
+        Args:
+            position (int): Any non-negative integer; it is taken modulo the pool size.
+
+        Returns:
+            int: The allocated address, or None if the pool is exhausted.
+        """
+        if not self._summary:
+            return None
+        index = self._next_free_index(position % self.size)
+        self._take(index)
+        return self._address(index)
+
+    def _take(self, index):
+        word = index // WORD_BITS
+        self._words[word] &= ~(1 << (index % WORD_BITS))
+        if not self._words[word]:
+            self._summary ^= 1 << word
+        self.free_count -= 1
+
+    def release(self, ip):
+        """
+        Returns an allocated address to the pool.
+
+        Args:
+            ip (int | str): The address to release.
+
+        Returns:
+            bool: True if the address was allocated and is now free again.
+        """
+        index = self._index(ip)
+        if index is None or self._is_free_index(index):
+            return False
+        word = index // WORD_BITS
+        if not self._words[word]:
+            self._summary |= 1 << word
+        self._words[word] |= 1 << (index % WORD_BITS)
+        self.free_count += 1
+        return True
+
+    def slice(self, start_index, stop_index):
+        """
+        Builds a new pool holding the configured addresses with index in [start_index, stop_index).
+        The new pool starts with every address free.
+
+        Args:
+            start_index (int): Index of the first address of the slice.
+            stop_index (int): Index one past the last address of the slice.
+
+        Returns:
+            AddressPool: The pool for that slice of the address space.
+        """
+        lines = []
+        for (start, end), offset in zip(self._ranges, self._offsets):
+            first = max(start, start + start_index - offset)
+            last = min(end, start + stop_index - 1 - offset)
+            if first <= last:
+                lines.append(f"{AddressPool.int_to_ip(first)}-{AddressPool.int_to_ip(last)}")
+        return AddressPool(lines)
+
+    @property
+    def used_count(self):
+        return self.size - self.free_count
+
+    def addresses(self):
+        """
+        Yields every configured address (as an integer), free or allocated.
+        """
+        for start, end in self._ranges:
+            yield from range(start, end + 1)
+
+    def __contains__(self, ip):
+        index = self._index(ip)
+        return index is not None and self._is_free_index(index)
+
+    def __len__(self):
+        return self.free_count
+
+    def __iter__(self):
+        """
+        Yields the free addresses (as integers) in ascending order.
+        """
+        for index in range(self.size):
+            if self._is_free_index(index):
+                yield self._address(index)
@@ -0,0 +1,58 @@
+"""
+Conversions between the integer addresses used inside the server (48-bit MAC addresses and
+32-bit IPv4 addresses) and their text form. Text is only needed at the edges: log lines,
+the GUI, the lease journal and the configuration files.
+"""
+import socket
+
+
+def ip_to_int(ip):
+    return int.from_bytes(socket.inet_aton(ip), 'big')
+
+
+def int_to_ip(value):
+    return socket.inet_ntoa(value.to_bytes(4, 'big'))
+
+
+def mac_to_int(mac_address):
+    """
+    Converts "aa:bb:cc:dd:ee:ff" (or "aa-bb-cc-dd-ee-ff") to a 48-bit integer.
+
+    Raises:
+        ValueError: If the text is not a MAC address.
+    """
+    octets = mac_address.replace('-', ':').split(':')
+    if len(octets) != 6 or not all(0 < len(octet) <= 2 for octet in octets):
+        raise ValueError(f"Invalid MAC address: {mac_address}")
+    return int(''.join(octet.zfill(2) for octet in octets), 16)
+
+
+def int_to_mac(value):
+    return value.to_bytes(6, 'big').hex(':')
+
+
+class IpText:
+    """
+    An integer IPv4 address that is only converted to text when it is printed. Used as a log
+    argument, so lines filtered out by level or rate limiting never pay for the conversion.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return int_to_ip(self.value)
+
+
+class MacText:
+    """
+    An integer MAC address that is only converted to text when it is printed; see `IpText`.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return int_to_mac(self.value)
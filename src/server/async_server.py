@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+import server_config as config
+from server import Server
+from expiry_scheduler import wake_tick
+
+log_message = config.log_message
+
+
+# ====================================================================================================
+# ================================= Class AsyncExpiryScheduler =======================================
+# ====================================================================================================
+class AsyncExpiryScheduler:
+    """
+    Expires leases and offers with `loop.call_at` instead of polling the lease store every second.
+
+    A callback is scheduled for every expiry time the lease store reports, rounded up to a
+    multiple of `resolution` so records expiring in the same tick share one callback. Callbacks
+    of renewed leases and replaced offers are not cancelled; `Server.expire_due_leases` finds
+    nothing due for them. A callback the loop runs slightly early is covered the same way as in
+    the threaded engines: the expiry pass re-arms for the earliest remaining record.
+    """
+
+    def __init__(self, loop, resolution=0.1):
+        self.loop = loop
+        self.resolution = resolution
+        self._scheduled = set()
+
+    def _loop_time(self, wall_time):
+        return self.loop.time() + max(0.0, wall_time - time.time())
+
+    def schedule(self, due_time):
+        tick = wake_tick(due_time, self.resolution)
+        if tick in self._scheduled:
+            return
+        self._scheduled.add(tick)
+        self.loop.call_at(self._loop_time(tick * self.resolution), self._expire, tick)
+
+    def _expire(self, tick):
+        self._scheduled.discard(tick)
+        Server.expire_due_leases()
+
+
+# ====================================================================================================
+# ================================= Class DHCPServerProtocol =========================================
+# ====================================================================================================
+class DHCPServerProtocol(asyncio.DatagramProtocol):
+    """
+    Runs the DHCP handlers directly on the event loop for every received datagram.
+
+    The transport is passed to the handlers in place of the server socket; its `sendto()`
+    has the same signature.
+    """
+
+    def __init__(self):
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        client_address = Server.get_client_address(addr)
+        if not Server.admit(data, client_address):
+            return
+        try:
+            Server.handle_client(data, client_address, self.transport)
+        except Exception as e:
+            log_message(f"Failed to handle datagram from {addr}: {e}", "error")
+
+    def error_received(self, exc):
+        log_message(f"DHCP socket error: {exc}", "error")
+
+
+# ====================================================================================================
+# ==================================== Running the Engine ============================================
+# ====================================================================================================
+async def serve(ip_pool_file_path, blocked_mac_addresses_file_path):
+    """
+    Runs the DHCP server on the current event loop until it is cancelled.
+
+    The event loop is the state owner: all lease, pool and cache state is only touched from it.
+    Handlers running on the loop call the state commands inline; background threads (file
+    watcher, journal compaction) hand their work to the loop through `Server.state_owner`.
+
+    Args:
+        ip_pool_file_path (str): The path to the text file containing the IP pool.
+        blocked_mac_addresses_file_path (str): The path to the text file containing the blocked MAC addresses.
+    """
+    loop = asyncio.get_running_loop()
+
+    loop_thread_id = threading.get_ident()
+
+    async def run_on_loop(function, *args):
+        return function(*args)
+
+    def state_owner(function, *args):
+        if threading.get_ident() == loop_thread_id:
+            return function(*args)
+        return asyncio.run_coroutine_threadsafe(run_on_loop(function, *args), loop).result()
+
+    Server.state_owner = state_owner
+    Server.expiry_scheduler = AsyncExpiryScheduler(loop, config.expiry_resolution)
+
+    Server.load_state(ip_pool_file_path, blocked_mac_addresses_file_path)
+
+    server_socket = Server.setup_socket()
+    transport, _ = await loop.create_datagram_endpoint(
+        DHCPServerProtocol, sock=server_socket)
+    log_message(f"DHCP Server (asyncio engine) started on {
+                Server.socket_description(server_socket)}, waiting for clients...", "info")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        transport.close()
+
+
+def start_async_dhcp_server(ip_pool_file_path, blocked_mac_addresses_file_path):
+    """
+    Starts the asyncio engine of the DHCP server and blocks until it stops.
+
+    Args:
+        ip_pool_file_path (str): The path to the text file containing the IP pool.
+        blocked_mac_addresses_file_path (str): The path to the text file containing the blocked MAC addresses.
+    """
+    asyncio.run(serve(ip_pool_file_path, blocked_mac_addresses_file_path))
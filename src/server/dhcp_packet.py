@@ -0,0 +1,207 @@
+import struct
+
+# op, htype, hlen, hops, xid, secs, flags, ciaddr, yiaddr, siaddr, giaddr, chaddr (first 6 bytes)
+HEADER = struct.Struct("!BBBBIHHIIII6s")
+SNAME_OFFSET = 44
+FILE_OFFSET = 108
+MAGIC_COOKIE_OFFSET = 236
+OPTIONS_OFFSET = 240
+MIN_PACKET_SIZE = OPTIONS_OFFSET
+MESSAGE_TYPE_OPTION = b"\x35\x01"  # Option 53, length 1
+MAGIC_COOKIE = b"\x63\x82\x53\x63"
+BOOTREQUEST = 1
+ETHERNET = b"\x01\x06"  # htype 1 (Ethernet), hlen 6
+CLIENT_MESSAGE_TYPES = frozenset((1, 3, 4, 7, 8))  # DISCOVER, REQUEST, DECLINE, RELEASE, INFORM
+INVALID_REASONS = ("short", "op", "hardware", "magic_cookie", "message_type")
+
+
+# ====================================================================================================
+# ====================================== Class DHCPPacket ============================================
+# ====================================================================================================
+class DHCPPacket:
+    """
+    Read-only view of a received DHCP message that decodes only what the handlers ask for.
+
+    The fixed header is unpacked with one call to a precompiled `struct.Struct`; the 64-byte
+    `sname` and 128-byte `file` fields are left out and only decoded when read. Options are
+    scanned lazily: `option(code)` walks the options only until it
+    reaches `code`, so a handler that reads the message type, requested IP and lease time never
+    scans the rest of the packet. Option values are `memoryview` slices of the original datagram
+    and are not copied.
+
+    Raises:
+        ValueError: If the datagram is shorter than the fixed DHCP header.
+    """
+    __slots__ = ("_message", "_view", "_header", "_options", "_scan_offset")
+
+    def __init__(self, message):
+        if len(message) < MIN_PACKET_SIZE:
+            raise ValueError(f"DHCP message too short: {len(message)} bytes")
+        self._message = message
+        self._view = memoryview(message)
+        self._header = HEADER.unpack_from(message)
+        self._options = {}
+        self._scan_offset = OPTIONS_OFFSET
+
+    # ====================================================================================================
+    # ======================================= Header Fields ==============================================
+    # ====================================================================================================
+    op = property(lambda self: self._header[0])
+    htype = property(lambda self: self._header[1])
+    hlen = property(lambda self: self._header[2])
+    hops = property(lambda self: self._header[3])
+    xid = property(lambda self: self._header[4])
+    secs = property(lambda self: self._header[5])
+    flags = property(lambda self: self._header[6])
+    ciaddr = property(lambda self: self._header[7])
+    yiaddr = property(lambda self: self._header[8])
+    siaddr = property(lambda self: self._header[9])
+    giaddr = property(lambda self: self._header[10])
+    chaddr = property(lambda self: self._header[11])
+
+    @property
+    def sname(self):
+        return bytes(self._view[SNAME_OFFSET:FILE_OFFSET]).decode(errors="ignore").strip("\x00")
+
+    @property
+    def file(self):
+        return bytes(self._view[FILE_OFFSET:MAGIC_COOKIE_OFFSET]).decode(errors="ignore").strip("\x00")
+
+    @property
+    def magic_cookie(self):
+        return bytes(self._view[MAGIC_COOKIE_OFFSET:OPTIONS_OFFSET])
+
+    # ====================================================================================================
+    # ========================================== Options =================================================
+    # ====================================================================================================
+    def _scan(self, wanted=None):
+        # Read the option codes and lengths from the datagram, take the values from the view
+        message = self._message
+        end = len(message)
+        i = self._scan_offset
+        while i < end:
+            option_type = message[i]
+            if option_type == 255:  # End option
+                i = end
+                break
+            if option_type == 0:  # Padding
+                i += 1
+                continue
+            if i + 1 >= end:
+                i = end
+                break
+            option_length = message[i + 1]
+            if i + 2 + option_length > end:  # Truncated option: ignore it and the rest
+                i = end
+                break
+            if option_type not in self._options:
+                self._options[option_type] = self._view[i + 2: i + 2 + option_length]
+            i += 2 + option_length
+            if option_type == wanted:
+                break
+        self._scan_offset = i
+
+    def option(self, code, default=None):
+        """
+        Returns the value of one option, scanning the options only as far as needed.
+
+        Args:
+            code (int): The option code.
+            default: Returned when the packet does not carry the option.
+
+        Returns:
+            memoryview: The option value, or `default`.
+        """
+        value = self._options.get(code)
+        if value is None and self._scan_offset < len(self._message):
+            self._scan(code)
+            value = self._options.get(code)
+        return default if value is None else value
+
+    def uint32_option(self, code):
+        """
+        Returns an option that holds one 32-bit value, such as the requested IP address (50) or
+        the lease time (51), as an integer.
+
+        Returns:
+            int: The value, or None if the option is missing or is not exactly 4 bytes long.
+        """
+        value = self.option(code)
+        if value is None or len(value) != 4:
+            return None
+        return int.from_bytes(value, 'big')
+
+    @property
+    def message_type(self):
+        """
+        The DHCP message type (option 53), or None if it is missing.
+        """
+        value = self.option(53)
+        return value[0] if value else None
+
+    @property
+    def options(self):
+        """
+        Every option of the packet as a dict of option code to value. Scans the whole option field.
+        """
+        self._scan()
+        return self._options
+
+
+def peek_message_type(message):
+    """
+    Reads the DHCP message type (option 53) of a raw datagram without building a DHCPPacket.
+
+    Clients put option 53 first, so that case is a single slice compare; otherwise the options
+    are walked until option 53 is found.
+
+    Args:
+        message (bytes): The raw datagram.
+
+    Returns:
+        int: The message type, or None if the datagram is too short or has no option 53.
+    """
+    if message[OPTIONS_OFFSET:OPTIONS_OFFSET + 2] == MESSAGE_TYPE_OPTION and len(message) > OPTIONS_OFFSET + 2:
+        return message[OPTIONS_OFFSET + 2]
+    end = len(message)
+    i = OPTIONS_OFFSET
+    while i + 2 < end:
+        option_type = message[i]
+        if option_type == 255:  # End option
+            return None
+        if option_type == 0:  # Padding
+            i += 1
+            continue
+        if option_type == 53:
+            return message[i + 2] if message[i + 1] else None
+        i += 2 + message[i + 1]
+    return None
+
+
+def validate_packet(message):
+    """
+    Checks that a raw datagram is a DHCP client message the server can handle, with a few byte
+    comparisons and without parsing it.
+
+    Args:
+        message (bytes): The raw datagram.
+
+    Returns:
+        str: Why the datagram is rejected (one of INVALID_REASONS), or None if it is valid:
+            "short": shorter than the fixed header and a message type option.
+            "op": not a BOOTREQUEST, e.g. a reply from another server or relay.
+            "hardware": not an Ethernet address of 6 bytes.
+            "magic_cookie": not a DHCP message (plain BOOTP or other traffic).
+            "message_type": no option 53, or not a message type a client sends.
+    """
+    if len(message) < OPTIONS_OFFSET + 3:
+        return "short"
+    if message[0] != BOOTREQUEST:
+        return "op"
+    if message[1:3] != ETHERNET:
+        return "hardware"
+    if message[MAGIC_COOKIE_OFFSET:OPTIONS_OFFSET] != MAGIC_COOKIE:
+        return "magic_cookie"
+    if peek_message_type(message) not in CLIENT_MESSAGE_TYPES:
+        return "message_type"
+    return None
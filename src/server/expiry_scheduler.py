@@ -0,0 +1,82 @@
+import heapq
+import math
+import threading
+import time
+
+
+def wake_tick(due_time, resolution):
+    """
+    Returns the first tick (a multiple of `resolution`, counted from the epoch) at or after
+    `due_time`. Ticks are integers, so equal wake-up times compare equal.
+    """
+    tick = math.ceil(due_time / resolution)
+    if tick * resolution < due_time:
+        # The division can round down onto a whole tick; never wake before the deadline
+        tick += 1
+    return tick
+
+
+# ====================================================================================================
+# ================================== Class ExpiryScheduler ===========================================
+# ====================================================================================================
+class ExpiryScheduler:
+    """
+    Min-heap of wake-up times for the expiry thread of the threaded engines.
+
+    The lease store keeps the expiry index itself; this scheduler only tells the expiry thread
+    when the next deadline is due, so the thread sleeps until then instead of polling. Scheduling
+    and popping a wake-up time cost O(log n). Wake-ups left behind by renewed leases are harmless:
+    the expiry pass they trigger finds nothing due.
+
+    Wake-up times are rounded up to a multiple of `resolution`, and a time already scheduled is
+    not scheduled again, so a burst of offers shares one wake-up per tick and the heap holds at
+    most one entry per tick however many records expire in it. The heap holds tick numbers
+    (see `wake_tick`).
+    """
+
+    def __init__(self, resolution=0.1):
+        self.resolution = resolution
+        self._heap = []
+        self._scheduled = set()
+        self._condition = threading.Condition()
+
+    def schedule(self, due_time):
+        """
+        Wakes the expiry thread at `due_time` (epoch seconds), or at most `resolution` later.
+        """
+        tick = wake_tick(due_time, self.resolution)
+        with self._condition:
+            if tick in self._scheduled:
+                return
+            self._scheduled.add(tick)
+            heapq.heappush(self._heap, tick)
+            if self._heap[0] == tick:
+                self._condition.notify()
+
+    def wait_due(self, max_wait=None):
+        """
+        Blocks until at least one wake-up time is due, then pops every due wake-up time.
+
+        Args:
+            max_wait (float, optional): Give up after this many seconds if nothing is due.
+
+        Returns:
+            bool: True if a wake-up time was due, False if `max_wait` ran out first.
+        """
+        with self._condition:
+            deadline = None if max_wait is None else time.time() + max_wait
+            while True:
+                now = time.time()
+                if self._heap and self._heap[0] * self.resolution <= now:
+                    break
+                if deadline is not None and now >= deadline:
+                    return False
+                timeout = self._heap[0] * self.resolution - now if self._heap else None
+                if deadline is not None:
+                    timeout = deadline - now if timeout is None else min(
+                        timeout, deadline - now)
+                self._condition.wait(timeout)
+
+            while self._heap and self._heap[0] * self.resolution <= now:
+                self._scheduled.discard(heapq.heappop(self._heap))
+            return True
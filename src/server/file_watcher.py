@@ -0,0 +1,79 @@
+import os
+import threading
+
+
+# ====================================================================================================
+# ==================================== Class FileWatcher =============================================
+# ====================================================================================================
+class FileWatcher:
+    """
+    Watches a set of files for external modifications by polling their modification time and size.
+
+    Each watched file is associated with a reload callback. When the (mtime, size) signature of a
+    file changes, the callback is invoked with the file path from the watcher thread.
+
+    Attributes:
+        interval (float): Seconds between two polls of the watched files.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._callbacks = {}
+        self._signatures = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _signature(file_path):
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def watch(self, file_path, callback):
+        """
+        Registers a file to be watched.
+
+        Args:
+            file_path (str): The path of the file to watch.
+            callback (callable): Called with the file path whenever the file changes on disk.
+        """
+        with self._lock:
+            self._callbacks[file_path] = callback
+            self._signatures[file_path] = FileWatcher._signature(file_path)
+
+    def poll(self):
+        """
+        Checks every watched file once and invokes the callbacks of the files that changed.
+        """
+        with self._lock:
+            changed = []
+            for file_path, old_signature in self._signatures.items():
+                new_signature = FileWatcher._signature(file_path)
+                if new_signature is not None and new_signature != old_signature:
+                    self._signatures[file_path] = new_signature
+                    changed.append((file_path, self._callbacks[file_path]))
+
+        for file_path, callback in changed:
+            callback(file_path)
+
+    def start(self):
+        """
+        Starts polling the watched files in a daemon thread.
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the polling thread.
+        """
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.poll()
@@ -0,0 +1,110 @@
+import time
+
+# Offsets in the fixed DHCP header, read straight from the datagram
+GIADDR_SLICE = slice(24, 28)
+CHADDR_SLICE = slice(28, 34)
+NO_RELAY = b"\x00\x00\x00\x00"
+
+
+# ====================================================================================================
+# ===================================== Class TokenBuckets ===========================================
+# ====================================================================================================
+class TokenBuckets:
+    """
+    One token bucket per key: every key may pass `rate` datagrams per second on average and
+    `burst` at once.
+
+    At most `max_keys` buckets are kept. When the table is full, buckets that have refilled
+    (idle for `burst / rate` seconds, so no different from a new one) are dropped; if more than
+    half of the table is still active, it is cleared. A flood of new keys therefore costs
+    amortised O(1) per datagram and bounded memory.
+    """
+    __slots__ = ("rate", "burst", "max_keys", "resets", "_buckets")
+
+    def __init__(self, rate, burst, max_keys=65536):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.resets = 0
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, key, now):
+        """
+        Takes a token for one datagram of `key`.
+
+        Returns:
+            bool: False if the key is over its rate and the datagram must be dropped.
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._sweep(now)
+            self._buckets[key] = [self.burst - 1.0, now]
+            return True
+        tokens = bucket[0] + (now - bucket[1]) * self.rate
+        if tokens > self.burst:
+            tokens = self.burst
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1.0
+        return True
+
+    def _sweep(self, now):
+        refill_time = self.burst / self.rate
+        self._buckets = {key: bucket for key, bucket in self._buckets.items()
+                         if now - bucket[1] < refill_time}
+        if len(self._buckets) > self.max_keys // 2:
+            self._buckets = {}
+            self.resets += 1
+
+
+# ====================================================================================================
+# ================================= Class IngressRateLimiter =========================================
+# ====================================================================================================
+class IngressRateLimiter:
+    """
+    Rate limits received datagrams before they are parsed, queued or handed to the state owner.
+
+    Two key classes are checked, each with its own token buckets:
+        "source": the relay agent (giaddr) of relayed datagrams, else the source IP address.
+        "mac": the client hardware address (chaddr).
+    Both keys are sliced from fixed offsets of the raw datagram. The limiter is only used from
+    the thread that receives the datagrams, so it does no locking.
+
+    Attributes:
+        source_buckets (TokenBuckets): Buckets per relay or source address, None if not limited.
+        mac_buckets (TokenBuckets): Buckets per client MAC address, None if not limited.
+    """
+
+    def __init__(self, mac_rate=0, mac_burst=20, source_rate=0, source_burst=2000, max_keys=65536):
+        self.mac_buckets = TokenBuckets(mac_rate, mac_burst, max_keys) if mac_rate else None
+        self.source_buckets = TokenBuckets(source_rate, source_burst, max_keys) if source_rate else None
+
+    def check(self, message, source_address):
+        """
+        Checks one received datagram against the limits.
+
+        Args:
+            message (bytes): The raw datagram.
+            source_address (str): The IP address it was received from.
+
+        Returns:
+            str: The key class ("source" or "mac") whose limit the datagram exceeds, or None if it may pass.
+        """
+        if self.source_buckets is None and self.mac_buckets is None:
+            return None
+        now = time.monotonic()
+        if self.source_buckets is not None:
+            giaddr = message[GIADDR_SLICE]
+            key = source_address if len(giaddr) < 4 or giaddr == NO_RELAY else giaddr
+            if not self.source_buckets.take(key, now):
+                return "source"
+        if self.mac_buckets is not None and len(message) >= CHADDR_SLICE.stop:
+            if not self.mac_buckets.take(message[CHADDR_SLICE], now):
+                return "mac"
+        return None
@@ -0,0 +1,213 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from addresses import ip_to_int, int_to_ip, mac_to_int, int_to_mac
+
+
+# ====================================================================================================
+# ==================================== Class LeaseJournal ============================================
+# ====================================================================================================
+class LeaseJournal:
+    """
+    Durable, append-only record of lease and block list changes.
+
+    Every change is appended as one line to the journal file instead of rewriting the whole
+    state. A background compaction folds the current state into a snapshot file and truncates
+    the journal. On restart, `replay()` loads the snapshot and re-applies the journal on top.
+
+    Journal lines:
+        allocate <mac> <ip> <expiry> <xid> <lease>
+        release <mac> <time>
+        expire <mac>
+        block <mac>
+        unblock <mac>
+
+    All events are idempotent, so an event that is already contained in the snapshot can be
+    replayed again without changing the result.
+
+    The server passes MAC and IP addresses as integers; the journal and the snapshot store them
+    as text, so both files stay readable.
+
+    Attributes:
+        journal_path (str): The path of the append-only journal file.
+        snapshot_path (str): The path of the compacted snapshot file.
+        fsync (bool): Whether every appended event is forced to disk.
+        records (int): Number of events appended since the last compaction.
+        blocked_mac_addresses (set): MAC addresses blocked at runtime, as recorded by the journal.
+    """
+
+    def __init__(self, journal_path, snapshot_path, fsync=False):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.fsync = fsync
+        self.records = 0
+        self.blocked_mac_addresses = set()
+        self._lock = threading.Lock()
+        self._file = None
+
+    # ====================================================================================================
+    # ===================================== Append Events ================================================
+    # ====================================================================================================
+    def _append(self, line):
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.journal_path, 'a')
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.records += 1
+
+    def record_allocate(self, mac_address, ip, lease_expiry, xid, lease):
+        self._append(f"allocate {int_to_mac(mac_address)} {int_to_ip(ip)} {
+                     lease_expiry:.3f} {xid} {lease}\n")
+
+    def record_release(self, mac_address, release_time):
+        self._append(
+            f"release {int_to_mac(mac_address)} {release_time:.3f}\n")
+
+    def record_expire(self, mac_address):
+        self._append(f"expire {int_to_mac(mac_address)}\n")
+
+    def record_block(self, mac_address):
+        self.blocked_mac_addresses.add(mac_address)
+        self._append(f"block {mac_address}\n")
+
+    def record_unblock(self, mac_address):
+        self.blocked_mac_addresses.discard(mac_address)
+        self._append(f"unblock {mac_address}\n")
+
+    # ====================================================================================================
+    # ========================================= Replay ===================================================
+    # ====================================================================================================
+    def replay(self):
+        """
+        Rebuilds the lease state from the snapshot and the journal.
+
+        Returns:
+            dict: Maps an integer MAC address to (integer ip, lease_expiry, xid, lease). The MAC
+                addresses blocked at runtime are restored into `blocked_mac_addresses`.
+        """
+        leases = {}
+        blocked_mac_addresses = set()
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r') as file:
+                snapshot = json.load(file)
+            for mac_address, ip, lease_expiry, xid, lease in snapshot["leases"]:
+                leases[mac_to_int(mac_address)] = (
+                    ip_to_int(ip), lease_expiry, xid, lease)
+            blocked_mac_addresses.update(snapshot["blocked"])
+
+        # A rotated journal is left behind if the server stopped during a compaction
+        for journal_path in (self.journal_path + ".old", self.journal_path):
+            if not os.path.exists(journal_path):
+                continue
+            with open(journal_path, 'r') as file:
+                for line in file:
+                    fields = line.split()
+                    if not fields:
+                        continue
+                    event = fields[0]
+                    try:
+                        if event == "allocate":
+                            leases[mac_to_int(fields[1])] = (ip_to_int(fields[2]), float(fields[3]),
+                                                             int(fields[4]), int(fields[5]))
+                        elif event in ("release", "expire"):
+                            # A released lease is due at its release time, which the journal
+                            # rounds to the millisecond; it is never restored
+                            leases.pop(mac_to_int(fields[1]), None)
+                        elif event == "block":
+                            blocked_mac_addresses.add(fields[1])
+                        elif event == "unblock":
+                            blocked_mac_addresses.discard(fields[1])
+                    except (IndexError, ValueError, OSError):
+                        # A torn last line from a crash while appending
+                        continue
+
+        self.blocked_mac_addresses = blocked_mac_addresses
+        return leases
+
+    # ====================================================================================================
+    # ======================================== Compaction ================================================
+    # ====================================================================================================
+    def compact(self, state_provider):
+        """
+        Writes the current state as a new snapshot and truncates the journal.
+
+        The journal is rotated first, so appends never wait for the snapshot to be written.
+        Every event in the rotated journal was applied to the state before it was appended,
+        so the snapshot taken afterwards contains all of them. If a rotated journal is still
+        there because an earlier compaction did not finish, the journal is appended to it rather
+        than replacing it, so its events stay on disk until a snapshot contains them.
+
+        Args:
+            state_provider (callable): Returns the current leases in the format produced
+                by `replay()`.
+        """
+        rotated_path = self.journal_path + ".old"
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            if os.path.exists(self.journal_path):
+                if os.path.exists(rotated_path):
+                    self._append_file(self.journal_path, rotated_path)
+                    os.remove(self.journal_path)
+                else:
+                    os.replace(self.journal_path, rotated_path)
+            self._file = open(self.journal_path, 'a')
+            self.records = 0
+
+        leases = state_provider()
+        snapshot = {
+            "leases": [[int_to_mac(mac_address), int_to_ip(ip), lease_expiry, xid, lease]
+                       for mac_address, (ip, lease_expiry, xid, lease) in leases.items()],
+            "blocked": sorted(self.blocked_mac_addresses),
+        }
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(snapshot, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+        if os.path.exists(rotated_path):
+            os.remove(rotated_path)
+
+    @staticmethod
+    def _append_file(source_path, target_path):
+        with open(target_path, 'ab+') as target:
+            target.seek(0, os.SEEK_END)
+            if target.tell():
+                target.seek(-1, os.SEEK_END)
+                if target.read(1) != b"\n":
+                    # Keep a torn last line of the target from swallowing the first appended event
+                    target.write(b"\n")
+            with open(source_path, 'rb') as source:
+                shutil.copyfileobj(source, target)
+            target.flush()
+            os.fsync(target.fileno())
+
+    def start_compaction(self, state_provider, interval, min_records):
+        """
+        Starts a daemon thread that compacts the journal periodically.
+
+        Args:
+            state_provider (callable): See `compact()`.
+            interval (float): Seconds between two compaction checks.
+            min_records (int): Minimum number of journal events before a compaction is done.
+        """
+        def run():
+            while True:
+                time.sleep(interval)
+                if self.records >= min_records:
+                    try:
+                        self.compact(state_provider)
+                    except OSError:
+                        # The rotated journal is kept and folded in by the next compaction
+                        logging.exception("Lease journal compaction failed")
+
+        threading.Thread(target=run, daemon=True).start()
@@ -0,0 +1,225 @@
+import heapq
+import itertools
+from addresses import int_to_ip, int_to_mac
+
+# Lease states
+OFFERED = "OFFERED"  # Address offered and reserved by a DHCP OFFER, waiting for the client's REQUEST
+BOUND = "BOUND"  # Address acknowledged with a DHCP ACK
+RELEASED = "RELEASED"  # Client sent a DHCP RELEASE, the address is freed on the next expiry pass
+
+STATES = (OFFERED, BOUND, RELEASED)
+
+
+# ====================================================================================================
+# ======================================== Class Lease ===============================================
+# ====================================================================================================
+class Lease:
+    """
+    One client's offer or lease.
+
+    Attributes:
+        mac_address (int): The client's MAC address as a 48-bit integer.
+        ip (int): The offered or leased IPv4 address as a 32-bit integer.
+        state (str): OFFERED, BOUND or RELEASED.
+        expiry (float): When the offer or lease ends (epoch seconds).
+        lease_time (int): Lease duration in seconds: requested while OFFERED, granted once BOUND.
+        xid (int): Transaction ID of the exchange that created or last renewed the record.
+        sequence (int): Sequence number of the record's current entry in the store's expiry index.
+    """
+    __slots__ = ("mac_address", "ip", "state", "expiry", "lease_time", "xid", "sequence")
+
+    def __init__(self, mac_address, ip, state, expiry, lease_time, xid):
+        self.mac_address = mac_address
+        self.ip = ip
+        self.state = state
+        self.expiry = expiry
+        self.lease_time = lease_time
+        self.xid = xid
+        self.sequence = -1
+
+    def __repr__(self):
+        return (f"Lease({int_to_mac(self.mac_address)}, {int_to_ip(self.ip)}, {self.state}, expiry={self.expiry:.3f}, "
+                f"lease_time={self.lease_time}, xid={self.xid})")
+
+
+# ====================================================================================================
+# ===================================== Class LeaseStore =============================================
+# ====================================================================================================
+class LeaseStore:
+    """
+    All offers and leases of the server, with one record per client and secondary indexes.
+
+    Indexes:
+        by MAC address: every record.
+        by IP address: every record; offers reserve their address just like leases hold it.
+        by state: OFFERED, BOUND and RELEASED records.
+        by expiry: a min-heap of (expiry, sequence, record); only the entry whose sequence matches
+            the record is current, entries left behind by renewals are skipped when they reach the
+            top and dropped when the heap grows past twice the number of records.
+
+    Every method updates all indexes together. The store does no locking of its own; it is only
+    used from the server's state owner (a StateActor thread or the asyncio event loop).
+
+    Attributes:
+        expiry_listener (callable): Called with the new expiry time whenever a record's expiry is set,
+            so the server can schedule a wake-up for it.
+    """
+
+    def __init__(self):
+        self._by_mac = {}
+        self._by_ip = {}
+        self._by_state = {state: {} for state in STATES}
+        self._by_expiry = []
+        self._sequence = itertools.count()
+        self.expiry_listener = None
+
+    # ====================================================================================================
+    # ========================================= Lookups ==================================================
+    # ====================================================================================================
+    def get(self, mac_address):
+        return self._by_mac.get(mac_address)
+
+    def find_by_ip(self, ip):
+        return self._by_ip.get(ip)
+
+    def leases(self, state=None):
+        """
+        Returns the records in one state, or every record when no state is given.
+        """
+        if state is None:
+            return list(self._by_mac.values())
+        return list(self._by_state[state].values())
+
+    def count(self, state=None):
+        return len(self._by_mac) if state is None else len(self._by_state[state])
+
+    def oldest(self, state):
+        """
+        Returns the record that has been in `state` the longest, or None. For offers, which all
+        get the same lifetime, that is the offer that expires first.
+        """
+        return next(iter(self._by_state[state].values()), None)
+
+    def held_ips(self):
+        """
+        Returns the addresses currently held by a record: reserved by an offer or held by a lease.
+        """
+        return list(self._by_ip)
+
+    def next_expiry(self):
+        """
+        Returns the earliest expiry time of any record, or None if the store is empty.
+        """
+        self._drop_stale_expiries()
+        return self._by_expiry[0][0] if self._by_expiry else None
+
+    def __contains__(self, mac_address):
+        return mac_address in self._by_mac
+
+    def __len__(self):
+        return len(self._by_mac)
+
+    # ====================================================================================================
+    # ======================================= Transactions ===============================================
+    # ====================================================================================================
+    def _set(self, mac_address, ip, state, expiry, lease_time, xid):
+        lease = self._by_mac.get(mac_address)
+        if lease is None:
+            lease = Lease(mac_address, ip, state, expiry, lease_time, xid)
+            self._by_mac[mac_address] = lease
+        else:
+            del self._by_state[lease.state][mac_address]
+            if self._by_ip.get(lease.ip) is lease:
+                del self._by_ip[lease.ip]
+            lease.ip, lease.state, lease.expiry, lease.lease_time, lease.xid = ip, state, expiry, lease_time, xid
+
+        self._by_state[state][mac_address] = lease
+        self._by_ip[ip] = lease
+        lease.sequence = next(self._sequence)
+        heapq.heappush(self._by_expiry, (expiry, lease.sequence, lease))
+        if len(self._by_expiry) > 2 * len(self._by_mac) + 1024:
+            self._rebuild_expiry_index()
+        if self.expiry_listener:
+            self.expiry_listener(expiry)
+        return lease
+
+    def offer(self, mac_address, ip, requested_lease, xid, offer_expiry):
+        """
+        Records an address offered to a client. Replaces any previous offer of the client.
+
+        Returns:
+            Lease: The client's record, now OFFERED.
+        """
+        return self._set(mac_address, ip, OFFERED, offer_expiry, requested_lease, xid)
+
+    def bind(self, mac_address, ip, lease_expiry, lease_time, xid):
+        """
+        Records an acknowledged lease, or renews the client's existing one.
+
+        Returns:
+            Lease: The client's record, now BOUND.
+        """
+        return self._set(mac_address, ip, BOUND, lease_expiry, lease_time, xid)
+
+    def release(self, mac_address, release_time):
+        """
+        Marks a client's lease as released; it expires at `release_time`.
+
+        Returns:
+            Lease: The client's record, or None if the client has no lease.
+        """
+        lease = self._by_mac.get(mac_address)
+        if lease is None or lease.state == OFFERED:
+            return None
+        return self._set(mac_address, lease.ip, RELEASED, release_time, lease.lease_time, lease.xid)
+
+    def remove(self, mac_address):
+        """
+        Removes a client's record from every index.
+
+        Returns:
+            Lease: The removed record, or None if the client had none.
+        """
+        lease = self._by_mac.pop(mac_address, None)
+        if lease is None:
+            return None
+        del self._by_state[lease.state][mac_address]
+        if self._by_ip.get(lease.ip) is lease:
+            del self._by_ip[lease.ip]
+        return lease
+
+    def pop_expired(self, now):
+        """
+        Removes and returns every record whose expiry time is not later than `now`.
+        Only the expired records are visited.
+
+        Args:
+            now (float): The current time (epoch seconds).
+
+        Returns:
+            list: The expired Lease records.
+        """
+        expired = []
+        while self._by_expiry and self._by_expiry[0][0] <= now:
+            entry = heapq.heappop(self._by_expiry)
+            if self._is_current(entry):
+                lease = entry[2]
+                self.remove(lease.mac_address)
+                expired.append(lease)
+        return expired
+
+    # ====================================================================================================
+    # ===================================== Expiry Index Upkeep ==========================================
+    # ====================================================================================================
+    def _is_current(self, entry):
+        _, sequence, lease = entry
+        return lease.sequence == sequence and self._by_mac.get(lease.mac_address) is lease
+
+    def _drop_stale_expiries(self):
+        while self._by_expiry and not self._is_current(self._by_expiry[0]):
+            heapq.heappop(self._by_expiry)
+
+    def _rebuild_expiry_index(self):
+        self._by_expiry = [
+            entry for entry in self._by_expiry if self._is_current(entry)]
+        heapq.heapify(self._by_expiry)
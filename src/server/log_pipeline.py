@@ -0,0 +1,172 @@
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+
+# ====================================================================================================
+# ==================================== Class LogRateLimiter ==========================================
+# ====================================================================================================
+class LogRateLimiter:
+    """
+    Token bucket per message kind, so a flood of one kind of line cannot crowd out the others.
+
+    Every kind may log `rate` lines per second on average and `burst` lines at once. Lines over
+    the limit are suppressed and counted per kind. Errors and critical lines are never limited.
+
+    Attributes:
+        rate (float): Lines per second allowed per kind. 0 disables the limit.
+        burst (int): Lines a kind may log at once after being quiet.
+        max_kinds (int): Kinds tracked separately; further kinds share one bucket per level.
+        suppressed (dict): Maps a kind to the number of lines suppressed since the last `take_suppressed()`.
+    """
+
+    def __init__(self, rate, burst, max_kinds=1024):
+        self.rate = rate
+        self.burst = burst
+        self.max_kinds = max_kinds
+        self.suppressed = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def allow(self, kind, levelno):
+        """
+        Takes a token for one line of `kind`.
+
+        Returns:
+            bool: False if the line is over the limit and must be dropped.
+        """
+        if not self.rate or levelno >= logging.ERROR:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(kind)
+            if bucket is None:
+                if len(self._buckets) >= self.max_kinds:
+                    kind = logging.getLevelName(levelno)
+                    bucket = self._buckets.get(kind)
+                if bucket is None:
+                    bucket = self._buckets[kind] = [float(self.burst), now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1.0:
+                bucket[0] = tokens
+                self.suppressed[kind] = self.suppressed.get(kind, 0) + 1
+                return False
+            bucket[0] = tokens - 1.0
+            return True
+
+    def take_suppressed(self):
+        """
+        Returns the suppressed counts per kind and starts counting from zero.
+        """
+        with self._lock:
+            suppressed, self.suppressed = self.suppressed, {}
+        return suppressed
+
+
+# ====================================================================================================
+# ================================= Class BoundedQueueHandler ========================================
+# ====================================================================================================
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks and never formats.
+
+    Records are queued with their message template and arguments; the listener thread formats
+    them. When the queue is full the record is dropped and counted; the count is updated under
+    its own lock, since any thread that logs can hit a full queue.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+# ====================================================================================================
+# ===================================== Class LogPipeline ============================================
+# ====================================================================================================
+class LogPipeline:
+    """
+    Moves log formatting and I/O off the packet path.
+
+    The root logger only gets a BoundedQueueHandler; a QueueListener thread formats the records
+    and writes them to the real handlers (log file and console). A slow disk or terminal fills
+    the bounded queue and costs dropped lines, never a delayed DHCP reply. A background thread
+    logs how many lines were dropped or suppressed by the rate limiter.
+
+    Attributes:
+        queue_handler (BoundedQueueHandler): The handler installed on the root logger.
+        rate_limiter (LogRateLimiter): Per-kind rate limit applied by `log_message`.
+    """
+
+    def __init__(self, handlers, queue_size=10000, rate=0, burst=100, stats_interval=10):
+        self.handlers = handlers
+        self.queue_size = queue_size
+        self.queue_handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size))
+        self.rate_limiter = LogRateLimiter(rate, burst)
+        self.stats_interval = stats_interval
+        self._listener = logging.handlers.QueueListener(
+            self.queue_handler.queue, *handlers, respect_handler_level=True)
+        self._reported_drops = 0
+
+    def start(self):
+        """
+        Starts the listener and the drop report threads.
+        """
+        self._listener.start()
+        if self.stats_interval:
+            threading.Thread(target=self._report_drops,
+                             name="log-drop-report", daemon=True).start()
+
+    def stop(self):
+        """
+        Writes the queued records and stops the listener.
+        """
+        try:
+            self._listener.stop()
+        except queue.Full:
+            # No room for the stop marker; the daemon listener ends with the process
+            pass
+
+    def restart_after_fork(self):
+        """
+        Starts a fresh queue and listener in a forked child process, whose copy of the
+        listener thread does not exist.
+        """
+        self.queue_handler.queue = queue.Queue(maxsize=self.queue_size)
+        # Another thread of the parent may have held the drop counter's lock at the fork
+        self.queue_handler._lock = threading.Lock()
+        self._listener = logging.handlers.QueueListener(
+            self.queue_handler.queue, *self.handlers, respect_handler_level=True)
+        self.start()
+
+    def stats(self):
+        """
+        Returns the queue depth and the number of records dropped because the queue was full.
+        """
+        return {"queue_depth": self.queue_handler.queue.qsize(), "dropped": self.queue_handler.dropped}
+
+    def _report_drops(self):
+        while True:
+            time.sleep(self.stats_interval)
+            dropped = self.queue_handler.dropped
+            new_drops, self._reported_drops = dropped - self._reported_drops, dropped
+            suppressed = self.rate_limiter.take_suppressed()
+            if not new_drops and not suppressed:
+                continue
+            busiest = sorted(suppressed.items(), key=lambda item: -item[1])[:3]
+            logging.warning("Logging dropped %d lines (queue full) and suppressed %d lines over the rate limit "
+                            "in the last %ss; most suppressed: %s", new_drops, sum(suppressed.values()),
+                            self.stats_interval, "; ".join(f"{count} x {kind!r}" for kind, count in busiest) or "-")
@@ -0,0 +1,147 @@
+from addresses import mac_to_int, int_to_mac
+
+MAC_BITS = 48
+FULL_MASK = (1 << MAC_BITS) - 1
+
+
+# ====================================================================================================
+# ===================================== Class MacBlockList ===========================================
+# ====================================================================================================
+class MacBlockList:
+    """
+    Blocked MAC addresses and MAC ranges, checked in O(1) per distinct rule mask.
+
+    Every rule is a (mask, value) pair over the 48-bit MAC address. Rules are grouped by mask into
+    hash sets of masked values, so a check is one `(mac & mask) in values` per distinct mask: single
+    addresses share the full mask and all OUI rules share the 24-bit one, however many there are.
+
+    Block list lines:
+        a0:b3:cc:49:fc:d7                   single MAC address
+        a0:b3:cc:*                          every address with this prefix (OUI / vendor range)
+        a0:b3:cc:00:00:00/24                every address whose first 24 bits match
+        02:00:00:00:00:00/02:00:00:00:00:00 every address matching under the mask (here: locally administered)
+        # comment                           ignored
+    """
+
+    def __init__(self, lines=()):
+        self._rules = {}
+        for line in lines:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                self.add(line)
+
+    # ====================================================================================================
+    # ==================================== Parsing Helpers ===============================================
+    # ====================================================================================================
+    mac_to_int = staticmethod(mac_to_int)
+    int_to_mac = staticmethod(int_to_mac)
+
+    @staticmethod
+    def parse_rule(rule):
+        """
+        Parses one block list entry into a (mask, value) pair.
+
+        Args:
+            rule (str): A MAC address, a "prefix:*" wildcard, a "mac/prefix_length" or a "mac/mask" rule.
+
+        Returns:
+            tuple: (mask, value) with `value` already masked.
+
+        Raises:
+            ValueError: If the rule cannot be parsed.
+        """
+        rule = rule.strip().lower()
+        if rule.endswith('*'):
+            octets = [octet for octet in rule[:-1].replace('-', ':').split(':') if octet]
+            if not 0 < len(octets) <= 6:
+                raise ValueError(f"Invalid MAC rule: {rule}")
+            prefix_bits = 8 * len(octets)
+            mask = FULL_MASK ^ ((1 << (MAC_BITS - prefix_bits)) - 1)
+            value = MacBlockList.mac_to_int(':'.join(octets + ['00'] * (6 - len(octets))))
+        elif '/' in rule:
+            address, suffix = rule.split('/', 1)
+            value = MacBlockList.mac_to_int(address)
+            if ':' in suffix or '-' in suffix:
+                mask = MacBlockList.mac_to_int(suffix)
+            else:
+                prefix_bits = int(suffix)
+                if not 0 <= prefix_bits <= MAC_BITS:
+                    raise ValueError(f"Invalid MAC prefix length: {rule}")
+                mask = FULL_MASK ^ ((1 << (MAC_BITS - prefix_bits)) - 1)
+        else:
+            mask, value = FULL_MASK, MacBlockList.mac_to_int(rule)
+        return mask, value & mask
+
+    # ====================================================================================================
+    # ========================================= Updates ==================================================
+    # ====================================================================================================
+    def add(self, rule):
+        """
+        Adds a rule.
+
+        Returns:
+            bool: False if the rule was already present.
+        """
+        mask, value = MacBlockList.parse_rule(rule)
+        values = self._rules.setdefault(mask, set())
+        if value in values:
+            return False
+        values.add(value)
+        return True
+
+    def remove(self, rule):
+        """
+        Removes a rule.
+
+        Returns:
+            bool: False if the rule was not present.
+        """
+        mask, value = MacBlockList.parse_rule(rule)
+        values = self._rules.get(mask)
+        if not values or value not in values:
+            return False
+        values.discard(value)
+        if not values:
+            del self._rules[mask]
+        return True
+
+    # ====================================================================================================
+    # ========================================= Lookups ==================================================
+    # ====================================================================================================
+    def is_blocked(self, mac_address):
+        """
+        Checks a client against every rule.
+
+        Args:
+            mac_address (str | int): The MAC address as text or as a 48-bit integer.
+
+        Returns:
+            bool: True if any rule matches.
+        """
+        if isinstance(mac_address, str):
+            mac_address = MacBlockList.mac_to_int(mac_address)
+        for mask, values in self._rules.items():
+            if (mac_address & mask) in values:
+                return True
+        return False
+
+    __contains__ = is_blocked
+
+    def copy(self):
+        """
+        Returns an independent copy of the block list.
+        """
+        block_list = MacBlockList()
+        block_list._rules = {mask: set(values) for mask, values in self._rules.items()}
+        return block_list
+
+    def rules(self):
+        """
+        Returns every rule as text: single addresses as "aa:bb:cc:dd:ee:ff", ranges as "value/mask".
+        """
+        return [MacBlockList.int_to_mac(value) if mask == FULL_MASK
+                else f"{MacBlockList.int_to_mac(value)}/{MacBlockList.int_to_mac(mask)}"
+                for mask, values in self._rules.items() for value in sorted(values)]
+
+    def __len__(self):
+        return sum(len(values) for values in self._rules.values())
@@ -0,0 +1,234 @@
+import bisect
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the latency histogram buckets, from 50 us to 1 s
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ====================================================================================================
+# ====================================== Metric Types ================================================
+# ====================================================================================================
+# Updates are plain integer and float additions without a lock: they are cheap enough for the
+# packet path, and a rare lost increment between two threads does not matter for monitoring.
+class Counter:
+    """
+    Counter with a fixed set of label values, preallocated so `inc()` never creates anything.
+
+    Args:
+        name (str): Metric name.
+        help_text (str): Description shown by Prometheus.
+        label (str, optional): Label name. None for a counter without labels.
+        label_values (dict, optional): Maps the keys passed to `inc()` to label values. Unknown
+            keys are counted under "other".
+    """
+
+    def __init__(self, name, help_text, label=None, label_values=None):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.label_values = dict(label_values or {None: None})
+        self.values = dict.fromkeys(self.label_values, 0)
+        self.other = 0
+
+    def inc(self, key=None, amount=1):
+        if key in self.values:
+            self.values[key] += amount
+        else:
+            self.other += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        if self.label is None:
+            lines.append(f"{self.name} {self.values[None] + self.other}")
+            return lines
+        for key, label_value in self.label_values.items():
+            lines.append(f'{self.name}{{{self.label}="{label_value}"}} {self.values[key]}')
+        if self.other:
+            lines.append(f'{self.name}{{{self.label}="other"}} {self.other}')
+        return lines
+
+
+class Histogram:
+    """
+    Histogram with fixed buckets. Also renders estimated quantiles as a separate gauge family
+    (`<name>_quantile`), so p50 and p99 can be read without a Prometheus query.
+
+    Args:
+        name (str): Metric name.
+        help_text (str): Description shown by Prometheus.
+        buckets (tuple): Sorted upper bounds of the buckets; +Inf is added.
+        quantiles (tuple): Quantiles estimated from the buckets.
+        label (str, optional): Label name. None for a histogram without labels.
+        label_values (dict, optional): Maps the keys passed to `observe()` to label values.
+    """
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, quantiles=(0.5, 0.99), label=None, label_values=None):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.quantiles = quantiles
+        self.label = label
+        self.label_values = dict(label_values or {None: None})
+        self.counts = {key: [0] * (len(self.buckets) + 1) for key in self.label_values}
+        self.sums = dict.fromkeys(self.label_values, 0.0)
+
+    def observe(self, value, key=None):
+        self.counts[key][bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def quantile(self, q, key=None):
+        """
+        Estimates a quantile by linear interpolation inside its bucket.
+
+        Returns:
+            float: The estimate, or None if nothing was observed.
+        """
+        counts = list(self.counts[key])
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def _labels(self, key, extra=None):
+        labels = [] if self.label is None else [f'{self.label}="{self.label_values[key]}"']
+        if extra:
+            labels.append(extra)
+        return "{" + ",".join(labels) + "}" if labels else ""
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key in self.label_values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), list(self.counts[key])):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{self._labels(key, f'le="{bound}"')} {cumulative}')
+            lines.append(f"{self.name}_sum{self._labels(key)} {self.sums[key]}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+
+        lines.append(f"# HELP {self.name}_quantile Quantiles of {self.name} estimated from its buckets.")
+        lines.append(f"# TYPE {self.name}_quantile gauge")
+        for key in self.label_values:
+            for q in self.quantiles:
+                estimate = self.quantile(q, key)
+                lines.append(f'{self.name}_quantile{self._labels(key, f'quantile="{q}"')} '
+                             f'{"NaN" if estimate is None else estimate}')
+        return lines
+
+
+class Gauge:
+    """
+    Gauge whose value is read from a callback when the metrics are scraped, so the packet path
+    never updates it.
+
+    Args:
+        name (str): Metric name.
+        help_text (str): Description shown by Prometheus.
+        read (callable): Returns the current value, or None if it is not available.
+        metric_type (str, optional): "counter" for a total kept by another component.
+    """
+
+    def __init__(self, name, help_text, read, metric_type="gauge"):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+        self.metric_type = metric_type
+
+    def render(self):
+        try:
+            value = self.read()
+        except Exception:
+            value = None
+        if value is None:
+            return []
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}", f"{self.name} {value}"]
+
+
+# ====================================================================================================
+# =================================== Class MetricsRegistry ==========================================
+# ====================================================================================================
+class MetricsRegistry:
+    """
+    The metrics of one server process, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, label=None, label_values=None):
+        return self._register(Counter(name, help_text, label, label_values))
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, quantiles=(0.5, 0.99), label=None, label_values=None):
+        return self._register(Histogram(name, help_text, buckets, quantiles, label, label_values))
+
+    def gauge(self, name, help_text, read, metric_type="gauge"):
+        return self._register(Gauge(name, help_text, read, metric_type))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    # ====================================================================================================
+    # ===================================== HTTP Endpoint ================================================
+    # ====================================================================================================
+    def serve(self, address, port, routes=None):
+        """
+        Serves the metrics at http://<address>:<port>/metrics from a daemon thread.
+
+        Args:
+            address (str): The address to listen on.
+            port (int): The TCP port to listen on.
+            routes (dict, optional): Further plain-text pages: maps a path to a callable that
+                receives the query parameters (dict) and returns the page.
+
+        Returns:
+            ThreadingHTTPServer: The running server.
+        """
+        registry = self
+        routes = dict(routes or {})
+        routes["/metrics"] = routes["/"] = lambda query: registry.render()
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path, _, query = self.path.partition('?')
+                if path not in routes:
+                    self.send_error(404)
+                    return
+                body = routes[path](dict(urllib.parse.parse_qsl(query))).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes are not DHCP events; keep them out of the server log
+                pass
+
+        http_server = ThreadingHTTPServer((address, port), MetricsHandler)
+        http_server.daemon_threads = True
+        threading.Thread(target=http_server.serve_forever,
+                         name="metrics-http", daemon=True).start()
+        return http_server
@@ -0,0 +1,88 @@
+import collections
+import threading
+import time
+
+
+# ====================================================================================================
+# ===================================== Class ReplayCache ============================================
+# ====================================================================================================
+class ReplayCache:
+    """
+    Bounded LRU cache of the replies sent to recent DISCOVERs and REQUESTs.
+
+    Clients retransmit with the same xid when a reply is slow or lost. Keyed on
+    (MAC, xid, message type), the cache lets the server answer a retransmission with the bytes
+    it already sent, without a lease decision, a state command or encoding. That keeps the answer
+    consistent: a second DISCOVER cannot be offered a different address, and a retransmitted
+    REQUEST is not processed twice. Callers must `discard()` an entry as soon as the state it
+    describes ends, e.g. when the offered address goes back to the pool.
+
+    Entries expire `ttl` seconds after they were stored. When the cache is full the least
+    recently used entry is evicted.
+
+    Attributes:
+        capacity (int): Entries kept at most. 0 disables the cache.
+        ttl (float): Seconds an entry is replayed for.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that found nothing, or an expired entry.
+        evictions (int): Entries dropped because the cache was full.
+    """
+
+    def __init__(self, capacity=10000, ttl=10.0):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Returns the value stored for `key`, or None if there is none or it expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        """
+        Stores `value` for `key` for the next `ttl` seconds.
+        """
+        if not self.capacity:
+            return
+        now = time.monotonic()
+        entries = self._entries
+        with self._lock:
+            entries[key] = (now + self.ttl, value)
+            entries.move_to_end(key)
+            # Entries are mostly in expiry order; drop the expired ones at the front
+            while entries:
+                oldest_key, (expires, _) = next(iter(entries.items()))
+                if expires > now and len(entries) <= self.capacity:
+                    break
+                del entries[oldest_key]
+                if expires > now:
+                    self.evictions += 1
+
+    def discard(self, key):
+        """
+        Drops the entry stored for `key`, if any, e.g. once the reply no longer holds.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,78 @@
+import struct
+
+# Offsets of the per-client fields in the fixed DHCP header
+XID_OFFSET = 4
+CIADDR_OFFSET = 12
+YIADDR_OFFSET = 16
+CHADDR_OFFSET = 28
+OPTIONS_OFFSET = 240  # After the 236-byte header and the magic cookie
+
+# Options whose 4-byte values are patched per reply
+LEASE_TIME_OPTION = 51
+T1_OPTION = 58
+T2_OPTION = 59
+
+_uint32 = struct.Struct("!I")
+
+
+# ====================================================================================================
+# ===================================== Class ReplyTemplate ==========================================
+# ====================================================================================================
+class ReplyTemplate:
+    """
+    A complete DHCP reply compiled once, with the offsets of its per-client fields.
+
+    Everything that is the same for every client of the scope (server address, router, DNS
+    servers, domain name, ...) stays in the template; `render()` copies it into a new buffer
+    and patches xid, ciaddr, yiaddr, chaddr and the lease, T1 and T2 option values.
+
+    Attributes:
+        data (bytes): The compiled reply.
+        option_offsets (dict): Maps the lease time, T1 and T2 option codes to the offset of their value.
+    """
+    __slots__ = ("data", "option_offsets")
+
+    def __init__(self, message):
+        self.data = bytes(message)
+        self.option_offsets = {}
+        i = OPTIONS_OFFSET
+        while i < len(self.data):
+            option_type = self.data[i]
+            if option_type == 255:
+                break
+            if option_type == 0:
+                i += 1
+                continue
+            option_length = self.data[i + 1]
+            if option_type in (LEASE_TIME_OPTION, T1_OPTION, T2_OPTION) and option_length == 4:
+                self.option_offsets[option_type] = i + 2
+            i += 2 + option_length
+
+    def render(self, xid, client_mac, your_ip=None, client_ip=None, lease_time=None, t1_time=None, t2_time=None):
+        """
+        Builds one reply from the template.
+
+        Args:
+            xid (int): Transaction ID.
+            client_mac (int): Client MAC address as a 48-bit integer.
+            your_ip (int, optional): 'Your' IP address as a 32-bit integer. Keeps the template's value if None.
+            client_ip (int, optional): Client IP address as a 32-bit integer. Keeps the template's value if None.
+            lease_time (int, optional): Lease time in seconds. Keeps the template's value if None.
+            t1_time (int, optional): Renewal (T1) time in seconds. Keeps the template's value if None.
+            t2_time (int, optional): Rebinding (T2) time in seconds. Keeps the template's value if None.
+
+        Returns:
+            bytearray: The reply, ready for `sendto()`.
+        """
+        buffer = bytearray(self.data)
+        _uint32.pack_into(buffer, XID_OFFSET, xid)
+        buffer[CHADDR_OFFSET:CHADDR_OFFSET + 6] = client_mac.to_bytes(6, 'big')
+        if client_ip is not None:
+            _uint32.pack_into(buffer, CIADDR_OFFSET, client_ip)
+        if your_ip is not None:
+            _uint32.pack_into(buffer, YIADDR_OFFSET, your_ip)
+        for option_type, value in ((LEASE_TIME_OPTION, lease_time), (T1_OPTION, t1_time), (T2_OPTION, t2_time)):
+            if value is not None:
+                _uint32.pack_into(
+                    buffer, self.option_offsets[option_type], value)
+        return buffer
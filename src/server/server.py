@@ -1,5 +1,24 @@
 import server_config as config
+from file_watcher import FileWatcher
+from lease_journal import LeaseJournal
+from address_pool import AddressPool
+from worker_pool import WorkerPool
+from expiry_scheduler import ExpiryScheduler
+from lease_store import OFFERED, BOUND
+from reply_templates import ReplyTemplate
+from dhcp_packet import DHCPPacket, peek_message_type, validate_packet, INVALID_REASONS
+from mac_block_list import MacBlockList
+from addresses import ip_to_int, int_to_ip, int_to_mac, IpText, MacText
+from state_actor import StateActor
+from log_pipeline import LogPipeline
+from metrics import MetricsRegistry
+from stage_profiler import StageProfiler, STAGES
+from replay_cache import ReplayCache
+from address_history import AddressHistory
+from ingress_limiter import IngressRateLimiter
 import sys
+import atexit
+import argparse
 import logging
 import time
 import threading
@@ -10,7 +29,21 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(os.path.dirname(current_dir))
 sys.path.append(parent_dir)
 
-lease_duration, server_ip, lease_table, discover_cache, log_message, discover_table = config.lease_duration, config.server_ip, config.lease_table, config.discover_cache, config.log_message, config.discover_table
+lease_duration, lease_store, log_message = config.lease_duration, config.lease_store, config.log_message
+
+# Label values of the per-type packet counters, by DHCP message type (option 53)
+CLIENT_MESSAGE_TYPES = {1: "discover", 3: "request", 4: "decline", 7: "release", 8: "inform"}
+SERVER_MESSAGE_TYPES = {2: "offer", 5: "ack", 6: "nak"}
+# DHCP message type of each reply template
+REPLY_TYPES = {"offer": 2, "ack": 5, "inform_ack": 5, "nak": 6, "offer_nak": 6}
+# Message type answered by each reply template that is kept for retransmissions (see ReplayCache)
+# NAKs are not replayed: a client refused for a full pool must be able to get an address once one frees up
+REPLAYED_REQUEST_TYPES = {"offer": 1, "ack": 3}
+# Worker pool lanes: REQUEST, DECLINE and RELEASE go to the first lane, everything else to the second
+REQUEST_LANE, DISCOVER_LANE = 0, 1
+REQUEST_LANE_TYPES = {3, 4, 7}
+# Fibonacci hashing spreads consecutive MAC addresses over the pool (see `allocate_address`)
+MAC_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
 
 # ====================================================================================================
 # ====================================================================================================
@@ -184,45 +217,187 @@ class Server:
     # ====================================================================================================
     def __init__(self):
         """
-        Initializes the Server class by setting up locks for lease table, IP pool, and discover cache.
+        Initializes the Server class with an empty IP pool and block list.
         Also configures logging to output to both a file and the console.
 
         Attributes:
-            lease_table_lock (threading.Lock): Lock for synchronizing access to the lease table.
-            ip_pool_lock (threading.Lock): Lock for synchronizing access to the IP pool.
-            discover_cache_lock (threading.Lock): Lock for synchronizing access to the discover cache.
+            state_owner (callable): Runs a function in the context that owns the lease store, the
+                IP pool and the block list (see `call_state_owner`). None runs it inline.
+            state_actor (StateActor): The state owner of the threaded engines.
         """
         # self.ip_pool_file_path
-        # Server.IP_GUI.keys == Server.ip_pool
-        Server.lease_table_lock = threading.Lock()
-        Server.ip_pool_lock = threading.Lock()
-        Server.discover_cache_lock = threading.Lock()
-        Server.ip_pool = []
-        Server.IP_GUI = {}
+        Server.ip_pool = AddressPool()
+        Server.compile_reply_templates()
 
         Server.ip_pool_file_path = os.path.join(
             os.getcwd(), "src/server/ip_pool.txt")
-        Server.blocked_mac_addresses = []
+        Server.blocked_mac_addresses = MacBlockList()
+        Server.file_watcher = None
+        Server.lease_journal = None
+        Server.worker_pool = None
+        Server.expiry_scheduler = None
+        Server.state_owner = None
+        Server.state_actor = None
+        Server.pool_shard = None
+        Server.log_pipeline = None
+        Server.define_metrics()
+        Server.profiler = StageProfiler(
+            config.profile_sample_every, Server.stage_latency)
+        Server.replay_cache = ReplayCache(
+            config.replay_cache_size, config.replay_cache_ttl)
+        Server.address_history = AddressHistory(config.address_history_size)
+        Server.ingress_limiter = IngressRateLimiter(
+            config.ingress_mac_rate, config.ingress_mac_burst,
+            config.ingress_source_rate, config.ingress_source_burst, config.ingress_max_keys)
+        handlers = [
+            logging.FileHandler("output/log.log"),
+            logging.StreamHandler()
+        ]
+        if config.log_async and not logging.root.handlers:
+            # Packet handlers only queue their records; a listener thread formats and writes them
+            formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+            for handler in handlers:
+                handler.setFormatter(formatter)
+            Server.log_pipeline = LogPipeline(handlers, config.log_queue_size, config.log_rate_limit,
+                                              config.log_rate_burst, config.log_stats_interval)
+            Server.log_pipeline.start()
+            atexit.register(Server.log_pipeline.stop)
+            config.log_rate_limiter = Server.log_pipeline.rate_limiter
+            handlers = [Server.log_pipeline.queue_handler]
         logging.basicConfig(
             level=logging.INFO,
             format="%(asctime)s - %(levelname)s - %(message)s",
-            handlers=[
-                logging.FileHandler("output/log.log"),
-                logging.StreamHandler()
-            ]
+            handlers=handlers
         )
 
+    # ====================================================================================================
+    # ===================================== Server Metrics ===============================================
+    # ====================================================================================================
+    @staticmethod
+    def define_metrics():
+        """
+        Creates the metrics registry and the metrics updated on the packet path. Counters and the
+        latency histogram are preallocated; pool, lease and queue sizes are gauges read only when
+        the metrics are scraped.
+        """
+        Server.metrics = MetricsRegistry()
+        Server.packets_received = Server.metrics.counter(
+            "dhcp_packets_received_total", "DHCP messages received, by message type.", "type", CLIENT_MESSAGE_TYPES)
+        Server.replies_sent = Server.metrics.counter(
+            "dhcp_replies_sent_total", "DHCP replies sent, by message type.", "type", SERVER_MESSAGE_TYPES)
+        Server.pool_exhausted = Server.metrics.counter(
+            "dhcp_pool_exhausted_total", "DISCOVERs answered with a NAK because no address was free.")
+        Server.blocked_requests = Server.metrics.counter(
+            "dhcp_blocked_requests_total", "DISCOVERs and REQUESTs from blocked MAC addresses.")
+        Server.ingress_dropped = Server.metrics.counter(
+            "dhcp_ingress_dropped_total", "Datagrams dropped by the ingress rate limit before parsing, by key class.",
+            "key", {"mac": "mac", "source": "source"})
+        Server.invalid_dropped = Server.metrics.counter(
+            "dhcp_invalid_dropped_total", "Datagrams dropped on receipt because they are not valid DHCP client messages, by reason.",
+            "reason", {reason: reason for reason in INVALID_REASONS})
+        Server.offers_made = Server.metrics.counter(
+            "dhcp_offers_total", "Addresses reserved for a client by a DHCP OFFER.")
+        Server.offer_outcomes = Server.metrics.counter(
+            "dhcp_offer_outcomes_total",
+            "Offers that ended, by outcome: acknowledged, expired, declined, or evicted to stay under max_offers.",
+            "outcome", {"ack": "ack", "expired": "expired", "declined": "declined", "evicted": "evicted"})
+        Server.returning_offers = Server.metrics.counter(
+            "dhcp_returning_client_offers_total", "Offers of the address a returning client was bound to before.")
+        Server.reply_latency = Server.metrics.histogram(
+            "dhcp_reply_latency_seconds", "Time spent handling one DHCP message, from parsing to sending the reply.")
+        Server.stage_latency = Server.metrics.histogram(
+            "dhcp_stage_seconds", "Time spent in each stage of the sampled DHCP messages (see profile_sample_every).",
+            label="stage", label_values={stage: stage for stage in STAGES})
+        Server.metrics.gauge("dhcp_pool_free_addresses", "Free addresses in the IP pool.",
+                             lambda: Server.ip_pool.free_count)
+        Server.metrics.gauge("dhcp_pool_size_addresses", "Addresses in the IP pool.",
+                             lambda: Server.ip_pool.size)
+        Server.metrics.gauge("dhcp_leases", "Bound leases.",
+                             lambda: lease_store.count(BOUND))
+        Server.metrics.gauge("dhcp_offers_reserved", "Addresses reserved by offers waiting for a REQUEST.",
+                             lambda: lease_store.count(OFFERED))
+        Server.metrics.gauge("dhcp_offer_conversion_ratio", "Share of the ended offers that were acknowledged.",
+                             Server.offer_conversion_ratio)
+        Server.metrics.gauge("dhcp_address_history_entries", "Clients whose last bound address is remembered.",
+                             lambda: len(Server.address_history))
+        Server.metrics.gauge("dhcp_lease_table_size", "Records in the lease store (offers, bound and released leases).",
+                             lambda: len(lease_store))
+        Server.metrics.gauge("dhcp_worker_queue_depth", "Packets waiting for a worker thread.",
+                             lambda: Server.worker_pool.queue_depth() if Server.worker_pool else None)
+        Server.metrics.gauge("dhcp_worker_dropped_total", "Packets dropped because their worker queue lane was full.",
+                             lambda: Server.worker_pool.dropped if Server.worker_pool else None, metric_type="counter")
+        Server.metrics.gauge("dhcp_worker_expired_total",
+                             "Packets dropped because they waited longer than their lane's max age.",
+                             lambda: Server.worker_pool.expired if Server.worker_pool else None, metric_type="counter")
+        Server.metrics.gauge("dhcp_state_queue_depth", "Commands waiting for the state actor.",
+                             lambda: Server.state_actor.queue_depth() if Server.state_actor else None)
+        Server.metrics.gauge("dhcp_log_lines_dropped_total", "Log lines dropped because the log queue was full.",
+                             lambda: Server.log_pipeline.stats()["dropped"] if Server.log_pipeline else None,
+                             metric_type="counter")
+        Server.metrics.gauge("dhcp_replay_cache_hits_total", "Retransmitted DISCOVERs and REQUESTs answered from the replay cache.",
+                             lambda: Server.replay_cache.hits, metric_type="counter")
+        Server.metrics.gauge("dhcp_replay_cache_misses_total", "Replay cache lookups that found no reply.",
+                             lambda: Server.replay_cache.misses, metric_type="counter")
+        Server.metrics.gauge("dhcp_replay_cache_evictions_total", "Replies evicted from the full replay cache.",
+                             lambda: Server.replay_cache.evictions, metric_type="counter")
+        Server.metrics.gauge("dhcp_replay_cache_entries", "Replies held in the replay cache.",
+                             lambda: len(Server.replay_cache))
+
+    @staticmethod
+    def define_shard_metrics():
+        """
+        Adds the metrics of one shard of the sharded engine, once `Server.pool_shard` is set.
+        """
+        shard_index = Server.pool_shard[0]
+        Server.shard_pool_exhausted = Server.metrics.counter(
+            "dhcp_shard_pool_exhausted_total",
+            "DISCOVERs answered with a NAK because this shard's slice of the pool was full, by shard.",
+            "shard", {shard_index: str(shard_index)})
+        Server.metrics.gauge("dhcp_shard_pool_size_addresses", "Addresses in this shard's slice of the pool.",
+                             lambda: Server.ip_pool.size)
+
+    @staticmethod
+    def offer_conversion_ratio():
+        outcomes = Server.offer_outcomes.values
+        ended = sum(outcomes.values())
+        return outcomes["ack"] / ended if ended else None
+
+    @staticmethod
+    def start_metrics_endpoint():
+        """
+        Serves `Server.metrics` over HTTP when enabled in server_config. Every shard of the sharded
+        engine serves its own metrics on `metrics_port` plus its shard index. `/profile` returns the
+        folded stacks of `Server.profiler` (`/profile?reset=1` also clears them).
+        """
+        if not config.metrics_enabled:
+            return
+        port = config.metrics_port + (Server.pool_shard[0] if Server.pool_shard else 0)
+        routes = {"/profile": lambda query: Server.profiler.folded_stacks(query.get("reset") == "1")}
+        try:
+            Server.metrics.serve(config.metrics_address, port, routes)
+        except OSError as e:
+            log_message(f"Failed to start the metrics endpoint on {
+                        config.metrics_address}:{port}: {e}", "error")
+            return
+        log_message(f"Serving metrics on http://{config.metrics_address}:{port}/metrics "
+                    f"and sampled stage timings (folded stacks) on /profile", "info")
+
     # ====================================================================================================
     # ==================== Initiate connection between client and Server =================================
     # ====================================================================================================
     @staticmethod
-    def setup_socket():
+    def setup_socket(reuse_port=False):
         """
         Sets up a UDP socket for the DHCP server.
 
         This function creates a UDP socket, sets socket options to allow address reuse
-        and enable broadcasting, and binds the socket to the server's IP address on port 67,
-        which is the standard port for DHCP servers.
+        and enable broadcasting, and binds the socket to `listen_address` (the server's IP
+        address by default) on `server_port`, 67 by default. `receive_buffer_size` sets SO_RCVBUF,
+        which bounds how many datagrams queue up in the kernel while the server is busy.
+
+        Args:
+            reuse_port (bool, optional): Set SO_REUSEPORT so several processes can bind the port
+                and the kernel spreads the datagrams between them. Defaults to False.
 
         Returns:
             socket.socket: The configured UDP socket ready for use by the DHCP server.
@@ -232,26 +407,41 @@ class Server:
             socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         server_socket.setsockopt(
             socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        # DHCP server listens on port 67
-        server_socket.bind((server_ip, 67))
+        if reuse_port:
+            server_socket.setsockopt(
+                socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        if config.receive_buffer_size:
+            server_socket.setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVBUF, config.receive_buffer_size)
+        # DHCP server listens on port 67 unless configured otherwise
+        server_socket.bind((config.listen_address or config.resolve_server_ip(), config.server_port))
         return server_socket
 
+    @staticmethod
+    def socket_description(server_socket):
+        """
+        Returns "address:port" of a server socket with its receive buffer size, for the startup log.
+        """
+        address, port = server_socket.getsockname()[:2]
+        receive_buffer = server_socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        return f"{address}:{port} (server identifier {config.server_ip}, replies to port {
+            config.client_port}, SO_RCVBUF {receive_buffer} bytes)"
+
     # ====================================================================================================
     # =================================== Load Ip Pool ===================================================
     # ====================================================================================================
     @staticmethod
     def load_ip_pool(file_path):
         """
-        Loads the IP pool from a text file.
+        Loads the lines of the IP pool file.
 
         Args:
             file_path (str): The path to the text file containing the IP pool.
 
         Returns:
-            list: A list of IP addresses.
+            list: The non-empty lines: addresses, ranges, CIDR blocks, `!` exclusions and comments.
         """
         with open(file_path, 'r') as file:
-            # ip_pool = list(set(line.strip() for line in file if line.strip()))
             ip_pool = [line.strip()for line in file if line.strip()]
         return ip_pool
 
@@ -278,30 +468,115 @@ class Server:
                 if ip not in existing_ips:
                     file.write(f"{ip}\n")
 
+    @staticmethod
+    def append_ip_exclusion(file_path, ip_address):
+        """
+        Appends a `!<ip>` exclusion line to the IP pool text file.
+
+        Args:
+            file_path (str): The path to the IP pool text file.
+            ip_address (str): The IP address to exclude.
+        """
+        line = f"!{ip_address}\n"
+        if os.path.exists(file_path) and os.path.getsize(file_path):
+            with open(file_path, 'rb') as file:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    # Start on a new line if the file does not end with one
+                    line = "\n" + line
+        with open(file_path, 'a') as file:
+            file.write(line)
+
     # ====================================================================================================
     # =================================== Write Ip Pool ==================================================
     # ====================================================================================================
     @staticmethod
     def write_ip_pool(file_path, ip_pool):
         """
-        Writes the IP pool to a text file from the beginning, avoiding duplicates.
+        Writes the IP pool to a text file from the beginning. The lines are checked first, so an
+        invalid entry never replaces a working file.
 
         Args:
             file_path (str): The path to the text file where the IP pool will be saved.
-            ip_pool (list): A list of IP addresses to be written to the file.
+            ip_pool (list): The lines of the pool file: addresses, ranges, CIDR blocks,
+                `!` exclusions and comments.
+
+        Raises:
+            ValueError: If a line is not a valid pool entry.
         """
         # Check if the directory exists
         if not os.path.exists(os.path.dirname(file_path)):
             raise FileNotFoundError(f"Directory does not exist: {
                                     os.path.dirname(file_path)}")
 
-        # unique_ips = set(ip_pool)
+        try:
+            AddressPool(ip_pool)
+        except OSError as e:
+            raise ValueError(f"Invalid IP pool: {e}") from None
 
-        # Write the unique IPs to the file
+        # Write the lines to the file
         with open(file_path, 'w') as file:
             for ip in ip_pool:
                 file.write(f"{ip}\n")
 
+    # ====================================================================================================
+    # ================================= Build the Ip Pool ================================================
+    # ====================================================================================================
+    @staticmethod
+    def build_ip_pool(lines):
+        """
+        Builds the AddressPool for the lines of the IP pool file. When the server runs as one shard
+        of a sharded server, only the shard's contiguous slice of the address space is kept.
+
+        Args:
+            lines (list): The lines of the IP pool file.
+
+        Returns:
+            AddressPool: The pool this server allocates from.
+        """
+        ip_pool = AddressPool(lines)
+        if Server.pool_shard:
+            shard_index, shard_count = Server.pool_shard
+            slice_size = -(-ip_pool.size // shard_count)
+            ip_pool = ip_pool.slice(
+                shard_index * slice_size, (shard_index + 1) * slice_size)
+        return ip_pool
+
+    # ====================================================================================================
+    # ================================ Reload Ip Pool ====================================================
+    # ====================================================================================================
+    @staticmethod
+    def reload_ip_pool(file_path):
+        """
+        Reloads the IP pool after ip_pool.txt was edited outside the server.
+
+        The file is parsed into a new AddressPool on the calling thread, then the state owner
+        marks the currently leased addresses as allocated in it and swaps it in at once.
+
+        Args:
+            file_path (str): The path to the text file containing the IP pool.
+        """
+        start = time.perf_counter()
+        try:
+            new_pool = Server.build_ip_pool(Server.load_ip_pool(file_path))
+        except (OSError, ValueError) as e:
+            log_message(f"Failed to reload IP pool from {
+                        file_path}: {e}", "error")
+            return
+
+        Server.call_state_owner(Server.install_ip_pool, new_pool)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        log_message(f"Reloaded IP pool from {file_path}: {new_pool.free_count} free of {
+                    new_pool.size} addresses in {elapsed_ms:.2f} ms", "info")
+
+    @staticmethod
+    def install_ip_pool(new_pool):
+        for ip in lease_store.held_ips():
+            new_pool.allocate(ip)
+        Server.ip_pool = new_pool
+        Server.replay_cache.clear()
+
     # ====================================================================================================
     # ============================ Delete from Ip Pool ===================================================
     # ====================================================================================================
@@ -309,21 +584,27 @@ class Server:
     @staticmethod
     def delete_ip_from_pool(ip_address, file_path):
         """
-        Deletes a specific IP address from the IP pool and updates the text file.
+        Deletes a specific IP address from the IP pool and appends a `!<ip>` exclusion line to
+        the text file, so the address stays out of the pool when the file is reloaded even if a
+        range or CIDR line covers it.
 
         Args:
             ip_address (str): The IP address to be deleted.
             file_path (str): The path to the text file containing the IP pool.
         """
-        with Server.ip_pool_lock:
-            if ip_address in Server.ip_pool:
-                Server.ip_pool.remove(ip_address)
-                Server.append_ip_pool(file_path, Server.ip_pool)
-                log_message(f"Deleted IP address {
-                            ip_address} from the IP pool.", "info")
-            else:
-                log_message(
-                    f"IP address {ip_address} not found in the IP pool.", "warning")
+        Server.call_state_owner(Server._delete_ip_from_pool, ip_address, file_path)
+
+    @staticmethod
+    def _delete_ip_from_pool(ip_address, file_path):
+        if Server.ip_pool.is_configured(ip_address):
+            # A leased address is not free; the reload drops it from the pool either way
+            Server.ip_pool.allocate(ip_address)
+            Server.append_ip_exclusion(file_path, ip_address)
+            log_message(f"Deleted IP address {
+                        ip_address} from the IP pool.", "info")
+        else:
+            log_message(
+                f"IP address {ip_address} not found in the IP pool.", "warning")
 
     # ====================================================================================================
     # =================================== Load Ip Pool ===================================================
@@ -331,33 +612,86 @@ class Server:
     @staticmethod
     def load_blocked_mac_addresses(file_path):
         """
-        Loads the IP pool from a text file.
+        Loads the blocked MAC addresses and MAC ranges from a text file. MAC addresses that were
+        blocked at runtime and recorded in the lease journal are added to the ones from the file.
 
         Args:
-            file_path (str): The path to the text file containing the IP pool.
+            file_path (str): The path to the text file containing the blocked MAC addresses.
 
         Returns:
-            list: A list of IP addresses.
+            MacBlockList: The block list.
         """
         with open(file_path, 'r') as file:
-            blocked_mac_addresses = [line.strip()
-                                     for line in file if line.strip()]
+            blocked_mac_addresses = MacBlockList(file)
+        if Server.lease_journal:
+            for rule in Server.lease_journal.blocked_mac_addresses:
+                blocked_mac_addresses.add(rule)
         return blocked_mac_addresses
 
+    # ====================================================================================================
+    # ============================= Reload Blocked MAC Addresses =========================================
+    # ====================================================================================================
+    @staticmethod
+    def reload_blocked_mac_addresses(file_path):
+        """
+        Reloads the blocked MAC addresses after blocked_mac.txt was edited outside the server.
+
+        Args:
+            file_path (str): The path to the text file containing the blocked MAC addresses.
+        """
+        start = time.perf_counter()
+        try:
+            blocked_mac_addresses = Server.load_blocked_mac_addresses(
+                file_path)
+        except (OSError, ValueError) as e:
+            log_message(f"Failed to reload blocked MAC addresses from {
+                        file_path}: {e}", "error")
+            return
+        Server.blocked_mac_addresses = blocked_mac_addresses
+        Server.replay_cache.clear()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        log_message(f"Reloaded {len(blocked_mac_addresses)} MAC block rules from {
+                    file_path} in {elapsed_ms:.2f} ms", "info")
+
     # ====================================================================================================
     # ================================ Block Client's MAC Address ========================================
     # ====================================================================================================
     @staticmethod
     def dhcp_block_client(mac_address):
-        Server.blocked_mac_addresses.add(mac_address)
+        """
+        Blocks a MAC address or a MAC range at runtime, without touching blocked_mac.txt.
+
+        Args:
+            mac_address (str): A MAC address or any rule accepted by MacBlockList, e.g. "a0:b3:cc:*".
+        """
+        Server.call_state_owner(Server._dhcp_block_client, mac_address)
+
+    @staticmethod
+    def _dhcp_block_client(mac_address):
+        # Workers check the block list without the state owner, so it is replaced instead of changed
+        blocked_mac_addresses = Server.blocked_mac_addresses.copy()
+        blocked_mac_addresses.add(mac_address)
+        Server.blocked_mac_addresses = blocked_mac_addresses
+        Server.replay_cache.clear()
+        if Server.lease_journal:
+            Server.lease_journal.record_block(mac_address)
 
     # ====================================================================================================
     # ================================ UnBlock Client's MAC Address ======================================
     # ====================================================================================================
     @staticmethod
     def dhcp_unblock_client(mac_address):
-        if mac_address in Server.blocked_mac_addresses:
-            Server.blocked_mac_addresses.remove(mac_address)
+        Server.call_state_owner(Server._dhcp_unblock_client, mac_address)
+
+    @staticmethod
+    def _dhcp_unblock_client(mac_address):
+        blocked_mac_addresses = Server.blocked_mac_addresses.copy()
+        if blocked_mac_addresses.remove(mac_address):
+            Server.blocked_mac_addresses = blocked_mac_addresses
+            Server.replay_cache.clear()
+            if Server.lease_journal:
+                Server.lease_journal.record_unblock(mac_address)
         else:
             log_message(f"Client with MAC address {
                         mac_address} is not blocked.", "warning")
@@ -367,38 +701,108 @@ class Server:
     # ====================================================================================================
     @staticmethod
     def dhcp_send_block_nack(xid, mac_address, server_socket, client_tuple):
+        Server.blocked_requests.inc()
         Server.dhcp_send_nack(
             xid, mac_address, server_socket, client_tuple)
-        log_message(
-            f"Client with MAC address {mac_address} is blocked.", "warning")
+        log_message("Client with MAC address %s is blocked.",
+                    "warning", MacText(mac_address))
 
     # ====================================================================================================
     # ============================ Get the client's MAC Address ==========================================
     # ====================================================================================================
     @staticmethod
     def get_mac_address(parsed_message):
-        return ':'.join(['%02x' % b for b in parsed_message['chaddr']])
+        return int.from_bytes(parsed_message.chaddr, 'big')
+
+    # ====================================================================================================
+    # ================================== Ingress Admission ===============================================
+    # ====================================================================================================
+    @staticmethod
+    def admit(message, client_address):
+        """
+        Decides whether a received datagram is handled at all. Called by the receive loop of the
+        threaded and asyncio engines before the datagram is parsed or queued.
+
+        Args:
+            message (bytes): The raw datagram.
+            client_address (str): The IP address it was received from.
+
+        Returns:
+            bool: False if the datagram is invalid (see `screen`) or over a rate limit (see
+                `rate_limit`) and must be dropped.
+        """
+        return Server.screen(message) and Server.rate_limit(message, client_address)
+
+    @staticmethod
+    def screen(message):
+        """
+        Drops datagrams that are not valid DHCP client messages (see `validate_packet`), counted
+        by reason, so that noise on the segment never reaches a worker or the parser.
+
+        Returns:
+            bool: False if the datagram must be dropped.
+        """
+        reason = validate_packet(message)
+        if reason is None:
+            return True
+        Server.invalid_dropped.inc(reason)
+        return False
+
+    @staticmethod
+    def rate_limit(message, client_address):
+        """
+        Applies the ingress rate limits (see IngressRateLimiter) to a received datagram.
+
+        Returns:
+            bool: False if the datagram is over a limit and must be dropped.
+        """
+        limited = Server.ingress_limiter.check(message, client_address)
+        if limited is None:
+            return True
+        Server.ingress_dropped.inc(limited)
+        return False
+
+    # ====================================================================================================
+    # ================================== Worker Pool Lanes ===============================================
+    # ====================================================================================================
+    @staticmethod
+    def lane_of(message):
+        """
+        Returns the worker pool lane of a received datagram, from a peek at its message type.
+        """
+        return REQUEST_LANE if peek_message_type(message) in REQUEST_LANE_TYPES else DISCOVER_LANE
+
+    @staticmethod
+    def worker_lanes():
+        """
+        Returns the worker pool lanes configured in server_config, or None for a single FIFO queue.
+        """
+        if not config.worker_priority_lanes:
+            return None
+        return [("request", config.request_lane_size, config.request_lane_max_age),
+                ("discover", config.discover_lane_size, config.discover_lane_max_age)]
 
     # ====================================================================================================
     # ==================== Constructing the client tuple for socket ======================================
     # ====================================================================================================
     @staticmethod
     def get_client_tuple(client_address):
-        return (client_address, 68) if client_address != "0.0.0.0" else ("255.255.255.255", 68)
+        client_port = config.client_port
+        return (client_address, client_port) if client_address != "0.0.0.0" else ("255.255.255.255", client_port)
 
     # ====================================================================================================
     # ============================= Get the Message Type =================================================
     # ====================================================================================================
     @staticmethod
     def get_msg_type(parsed_message):
-        return parsed_message['options'][53][0]
+        return parsed_message.message_type
 
     # ====================================================================================================
     # ============================= Get the Transaction's ID =============================================
     # ====================================================================================================
     @staticmethod
     def get_xid(parsed_message):
-        return int(parsed_message['xid'])
+        return parsed_message.xid
 
     # ====================================================================================================
     # ==================== Get the client's current IP address ===========================================
@@ -580,6 +984,75 @@ class Server:
 
         return dhcp_message
 
+    # ====================================================================================================
+    # ============================== Compile the Reply Templates =========================================
+    # ====================================================================================================
+    @staticmethod
+    def compile_reply_templates():
+        """
+        Builds the OFFER, ACK, NAK and INFORM-ACK replies of the scope once with `construct_dhcp_message`.
+        Each reply is then rendered from its template by patching the per-client fields, which
+        keeps the replies byte-for-byte identical to the ones the builder produces.
+
+        Call it again when the server address or the scope options change.
+        """
+        server_ip = config.resolve_server_ip()
+        common = dict(
+            xid=0,
+            client_mac="00:00:00:00:00:00",
+            server_ip=server_ip,
+            gateway_ip="192.168.1.2",
+            subnet_mask="255.255.255.0",
+            dns_servers=["208.67.222.222", "208.67.220.220"],
+            domain_name="example.com",
+            broadcast_address="192.168.1.255",
+            max_message_size=1500  # Maximum DHCP message size
+        )
+        Server.reply_templates = {
+            "offer": ReplyTemplate(Server.construct_dhcp_message(
+                msg_type=2,  # DHCP Offer
+                lease_time=config.offer_lease_time,
+                option_overload=1,  # Option Overload for file and sname fields
+                **common)),
+            "ack": ReplyTemplate(Server.construct_dhcp_message(
+                msg_type=5,  # DHCP ACK
+                option_overload=0,  # No option overload
+                **common)),
+            "inform_ack": ReplyTemplate(Server.construct_dhcp_message(
+                msg_type=5,  # DHCP ACK
+                lease_time=0,  # No lease time for INFORM
+                option_overload=0,  # No option overload
+                **common)),
+            "nak": ReplyTemplate(Server.construct_dhcp_message(
+                xid=0,
+                client_mac="00:00:00:00:00:00",
+                msg_type=6,  # DHCP NAK message type
+                server_ip=server_ip,
+                client_ip="0.0.0.0",  # No IP assigned to the client
+                gateway_ip="192.168.1.2",
+                domain_name="example.com",
+                dns_servers=["208.67.222.222", "208.67.220.220"],
+                broadcast_address="192.167",
+                time_offset=0,  # Default time offset
+                time_servers=["192.168.1.10"],  # Example Time Server
+                name_servers=["192.168.1.20"],  # Example Name Server
+                log_servers=["192.168.1.30"],  # Example Log Server
+                cookie_servers=["192.168.1.40"],  # Example Cookie Server
+                lpr_servers=["192.168.1.50"],  # Example LPR Server
+                impress_servers=["192.168.1.60"],  # Example Impress Server
+                rlp_servers=["192.168.1.70"],  # Example RLP Server
+                error_message="Requested IP is not available."
+            )),
+            # NAK for a DISCOVER whose address is gone, carrying the server identifier (option 54)
+            "offer_nak": ReplyTemplate(Server.construct_dhcp_message(
+                xid=0,
+                client_mac="00:00:00:00:00:00",
+                msg_type=6,  # DHCP NAK message type
+                server_ip=server_ip,
+                options=b'\x36\x04' + socket.inet_aton(server_ip)
+            )),
+        }
+
     # ====================================================================================================
     # ========================= Parse the Incoming DHCP Message Format ===================================
     # ====================================================================================================
@@ -670,181 +1143,359 @@ class Server:
 
         return parsed_options
 
+    # ====================================================================================================
+    # ============================= Restore Leases from the Journal ======================================
+    # ====================================================================================================
+    @staticmethod
+    def restore_leases():
+        """
+        Rebuilds the lease store and IP pool from the lease journal.
+
+        Leases that expired while the server was down are dropped and their addresses
+        stay free in the pool; they are still remembered in the address history.
+        """
+        start = time.perf_counter()
+        leases = Server.lease_journal.replay()
+        current_time = time.time()
+
+        for mac_address, (ip, lease_expiry, xid, lease) in leases.items():
+            Server.address_history.remember(mac_address, ip)
+            if lease_expiry <= current_time:
+                continue
+            lease_store.bind(mac_address, ip, lease_expiry, lease, xid)
+        for ip in lease_store.held_ips():
+            Server.ip_pool.allocate(ip)
+
+        for rule in Server.lease_journal.blocked_mac_addresses:
+            Server.blocked_mac_addresses.add(rule)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        log_message(f"Restored {lease_store.count(BOUND)} leases from the lease journal in {
+                    elapsed_ms:.2f} ms", "info")
+
+    # ====================================================================================================
+    # =============================== Lease State for Compaction =========================================
+    # ====================================================================================================
+    @staticmethod
+    def lease_state_snapshot():
+        """
+        Returns the leases in the format stored by the lease journal snapshot.
+
+        Returns:
+            dict: Maps a MAC address to (ip, lease_expiry, xid, lease).
+        """
+        return {
+            lease.mac_address: (lease.ip, lease.expiry, lease.xid, lease.lease_time)
+            for lease in lease_store.leases(BOUND)
+        }
+
     # ====================================================================================================
     # ========================= Checking for the lease Duration Expiration ===============================
     # ====================================================================================================
     @staticmethod
     def lease_expiry_checker():
         """
-        Continuously checks for expired leases and handles their expiration.
-        This function runs an infinite loop that periodically checks the lease table
-        for expired leases. When a lease is found to be expired, it performs the following actions:
-        1. Removes the expired lease from the lease table.
-        2. Returns the associated IP address back to the IP pool.
-        3. Logs the expiration event.
-        4. Removes the client from the discover cache if present.
-        The function ensures thread safety by using locks when accessing shared resources
-        such as the lease table, IP pool, and discover cache.
+        Continuously expires leases and offers as their deadlines come due.
+        The thread sleeps on `Server.expiry_scheduler` until the earliest deadline it was given,
+        then has the state owner run `expire_due_leases`, which pops everything that is due from
+        the lease store's expiry index.
         Note:
             This function is intended to be run in a separate thread.
-        Sleep Duration:
-            The function sleeps for 1 second between each check to avoid excessive CPU usage.
         """
         while True:
-            current_time = time.time()
-            expired_clients = []
-
-            with Server.lease_table_lock:
-                for ip in Server.IP_GUI:
-                    if isinstance(Server.IP_GUI[ip], list) and len(Server.IP_GUI[ip]) > 1:
-                        if Server.IP_GUI[ip][1] > 0:
-                            Server.IP_GUI[ip][1] -= 1
-                    else:
-                        print(f"Skipping {ip}, unexpected value: {
-                              Server.IP_GUI[ip]}")
-
-                for key in list(discover_table.keys()):
-                    mac_ip_pairs = [(mac, value[0])
-                                    for mac, value in lease_table.items()]
-                    if (key, discover_table[key][0]) not in mac_ip_pairs:
-                        discover_table.pop(key)
-
-                for mac_address, (ip, lease_expiry, xid) in lease_table.items():
-                    if lease_expiry < current_time:
-                        expired_clients.append((mac_address, xid, mac_address))
-
-                for mac_address, xid, mac_address in expired_clients:
-                    ip, _, _ = lease_table.pop(mac_address)
-                    discover_table.pop(mac_address)
-                    Server.IP_GUI[ip] = ["Not Assigned", 0]
-
-                    with Server.ip_pool_lock:
-                        Server.ip_pool.append(ip)
-                        Server.write_ip_pool(
-                            Server.ip_pool_file_path, list(Server.ip_pool))
-
-                    log_message(f"Lease expired: Released IP {
-                                ip} for client(MAC: {mac_address})(XID: {xid})", "info")
-
-                    with Server.discover_cache_lock:  # Ensure thread safety if discover_cache is shared across threads
-                        for key in list(discover_cache.keys()):
-                            log_message(f"Checking {mac_address} with {
-                                        discover_cache[key].get('mac_address')}", "debug")
-                            if key == mac_address:
-                                del discover_cache[key]
-                                log_message(
-                                    f"Removed client(MAC: {mac_address}) from discover_cache", "info")
-                                break  # Exit loop once the entry is found and removed
-            time.sleep(1)  # Check every 5 seconds
+            Server.expiry_scheduler.wait_due()
+            Server.call_state_owner(Server.expire_due_leases)
+
+    # ====================================================================================================
+    # ================================= Expiring Due Leases ==============================================
+    # ====================================================================================================
+    @staticmethod
+    def expire_due_leases():
+        """
+        Expires every offer and lease whose deadline has passed. Expired offers give their
+        reserved address back to the pool; expired and released leases return their IP address
+        to the pool and are recorded in the journal. Only the records that are due are visited.
+        """
+        for lease in lease_store.pop_expired(time.time()):
+            Server.ip_pool.release(lease.ip)
+            Server.forget_replies(lease)
+            if lease.state == OFFERED:
+                Server.offer_outcomes.inc("expired")
+                continue
+
+            if Server.lease_journal:
+                Server.lease_journal.record_expire(lease.mac_address)
+
+            log_message("Lease expired: Released IP %s for client(MAC: %s)(XID: %s)", "info",
+                        IpText(lease.ip), MacText(lease.mac_address), lease.xid)
+
+        # A wake-up that came early found nothing due; make sure the earliest record still has one
+        next_expiry = lease_store.next_expiry()
+        if next_expiry is not None and Server.expiry_scheduler:
+            Server.expiry_scheduler.schedule(next_expiry)
+
+    # ====================================================================================================
+    # ================================= Rows of the GUI Table ============================================
+    # ====================================================================================================
+    @staticmethod
+    def ip_gui_rows():
+        """
+        Returns the rows of the GUI's IP table: every configured address with the client that
+        holds it, looked up in the lease store's IP index.
+
+        Returns:
+            list: (ip, client MAC address or "Not Assigned", remaining seconds) tuples.
+        """
+        return Server.call_state_owner(Server._ip_gui_rows)
+
+    @staticmethod
+    def _ip_gui_rows():
+        current_time = time.time()
+        rows = []
+        for ip in Server.ip_pool.addresses():
+            lease = lease_store.find_by_ip(ip)
+            if lease:
+                rows.append((int_to_ip(ip), int_to_mac(lease.mac_address),
+                             max(0, int(lease.expiry - current_time))))
+            else:
+                rows.append((int_to_ip(ip), "Not Assigned", 0))
+        return rows
 
     # ====================================================================================================
     # =============================== Sending ACK Message ================================================
     # ====================================================================================================
     @staticmethod
     def dhcp_send_ack(xid, mac_address, server_socket, client_tuple, requested_ip, requested_lease):
-        ack_message = Server.construct_dhcp_message(
-            xid=xid,
-            client_mac=mac_address,
-            msg_type=5,  # DHCP ACK
-            server_ip=server_ip,
+        Server.send_reply(
+            "ack", server_socket, client_tuple, xid, mac_address,
             your_ip=requested_ip,
-            gateway_ip="192.168.1.2",
             lease_time=requested_lease,
-            subnet_mask="255.255.255.0",
-            dns_servers=["208.67.222.222", "208.67.220.220"],
-            domain_name="example.com",
-            broadcast_address="192.168.1.255",
             t1_time=requested_lease // 2,
-            t2_time=(requested_lease * 7) // 8,
-            option_overload=0,  # No option overload
-            max_message_size=1500  # Maximum DHCP message size
+            t2_time=(requested_lease * 7) // 8
         )
-        server_socket.sendto(ack_message, client_tuple)
-        with Server.ip_pool_lock:
-            Server.write_ip_pool(Server.ip_pool_file_path,
-                                 list(Server.ip_pool))
 
     # ====================================================================================================
     # =============================== Sending NACK Message ===============================================
     # ====================================================================================================
     @staticmethod
     def dhcp_send_nack(xid, mac_address, server_socket, client_tuple):
-        nak_message = Server.construct_dhcp_message(
-            xid=xid,
-            client_mac=mac_address,
-            msg_type=6,  # DHCP NAK message type
-            server_ip=server_ip,
-            client_ip="0.0.0.0",  # No IP assigned to the client
-            gateway_ip="192.168.1.2",
-            domain_name="example.com",
-            dns_servers=["208.67.222.222", "208.67.220.220"],
-            broadcast_address="192.167",
-            time_offset=0,  # Default time offset
-            time_servers=["192.168.1.10"],  # Example Time Server
-            name_servers=["192.168.1.20"],  # Example Name Server
-            log_servers=["192.168.1.30"],  # Example Log Server
-            cookie_servers=["192.168.1.40"],  # Example Cookie Server
-            lpr_servers=["192.168.1.50"],  # Example LPR Server
-            impress_servers=["192.168.1.60"],  # Example Impress Server
-            rlp_servers=["192.168.1.70"],  # Example RLP Server
-            error_message="Requested IP is not available."
-        )
-        server_socket.sendto(nak_message, client_tuple)
+        Server.send_reply("nak", server_socket, client_tuple, xid, mac_address)
 
     # ====================================================================================================
     # =============================== Sending OFFER Message ==============================================
     # ====================================================================================================
     @staticmethod
-    def dhcp_send_offer(requested_ip, requested_lease, xid, client_address, mac_address, server_socket, client_tuple):
-        with Server.ip_pool_lock:
-            if requested_ip and requested_ip in Server.ip_pool:
-                with Server.lease_table_lock:
-                    discover_table[mac_address] = (
-                        requested_ip, requested_lease, xid)
-                log_message(f"Offering Requested IP {requested_ip} to {client_address}(MAC: {
-                            mac_address}) with lease duration {requested_lease} seconds", "info")
-
-                offer_message = Server.construct_dhcp_message(
-                    xid=xid,
-                    client_mac=mac_address,
-                    msg_type=2,  # DHCP Offer
-                    server_ip=server_ip,
-                    your_ip=requested_ip,
-                    gateway_ip="192.168.1.2",
-                    lease_time=20,
-                    subnet_mask="255.255.255.0",
-                    dns_servers=["208.67.222.222", "208.67.220.220"],
-                    domain_name="example.com",
-                    broadcast_address="192.168.1.255",
-                    t1_time=0,
-                    t2_time=0,
-                    option_overload=1,  # Option Overload for file and sname fields
-                    max_message_size=1500  # Maximum DHCP message size
-                )
-
-                server_socket.sendto(offer_message, client_tuple)
-            else:
-                if mac_address not in lease_table.keys():
-                    log_message(
-                        f"Requested IP {requested_ip} is not available.", "warning")
-                    # DHCP NAK (Not Acknowledged)
-                    nak_options = b'\x36\x04' + socket.inet_aton(server_ip)
-                    nak_message = Server.construct_dhcp_message(
-                        xid=xid,
-                        client_mac=mac_address,
-                        msg_type=6,  # DHCP NAK message type
-                        server_ip=server_ip,
-                        options=nak_options
-                    )
-                    server_socket.sendto(nak_message, client_tuple)
+    def dhcp_send_offer(offered_ip, requested_lease, xid, client_address, mac_address, server_socket, client_tuple):
+        log_message("Offering Requested IP %s to %s(MAC: %s) with lease duration %s seconds", "info",
+                    IpText(offered_ip), client_address, MacText(mac_address), requested_lease)
+
+        Server.send_reply("offer", server_socket, client_tuple,
+                          xid, mac_address, your_ip=offered_ip)
+
+    # ====================================================================================================
+    # =================================== Sending a Reply ================================================
+    # ====================================================================================================
+    @staticmethod
+    def send_reply(template, server_socket, client_tuple, xid, mac_address, **fields):
+        """
+        Renders a reply from one of `Server.reply_templates`, sends it and counts it. Replies to
+        DISCOVERs and REQUESTs are also kept in `Server.replay_cache` for retransmissions.
+
+        Args:
+            template (str): The template name ("offer", "ack", "inform_ack", "nak" or "offer_nak").
+            server_socket (socket.socket): The server's socket used to send responses.
+            client_tuple (tuple): The address of the client in the form (IP, port).
+            xid (int): The transaction ID.
+            mac_address (int): The client's MAC address.
+            **fields: The per-client fields passed to `ReplyTemplate.render()`.
+        """
+        with Server.profiler.stage("encode"):
+            reply = Server.reply_templates[template].render(xid, mac_address, **fields)
+        with Server.profiler.stage("send"):
+            server_socket.sendto(reply, client_tuple)
+        reply_type = REPLY_TYPES[template]
+        Server.replies_sent.inc(reply_type)
+        request_type = REPLAYED_REQUEST_TYPES.get(template)
+        if request_type:
+            Server.replay_cache.put((mac_address, xid, request_type), (reply, reply_type))
+
+    @staticmethod
+    def replay_reply(msg_type, mac_address, xid, server_socket, client_tuple):
+        """
+        Answers a retransmitted DISCOVER or REQUEST with the reply already sent for it.
+
+        Returns:
+            bool: True if the reply was found in `Server.replay_cache` and sent again.
+        """
+        if msg_type != 1 and msg_type != 3:
+            return False
+        cached = Server.replay_cache.get((mac_address, xid, msg_type))
+        if cached is None:
+            return False
+        reply, reply_type = cached
+        with Server.profiler.stage("send"):
+            server_socket.sendto(reply, client_tuple)
+        Server.replies_sent.inc(reply_type)
+        return True
+
+    @staticmethod
+    def forget_replies(lease):
+        """
+        Drops the cached OFFER and ACK of a lease whose state ended, so a retransmission can no
+        longer hand out an address that went back to the pool.
+        """
+        Server.replay_cache.discard((lease.mac_address, lease.xid, 1))
+        Server.replay_cache.discard((lease.mac_address, lease.xid, 3))
+
+    # ====================================================================================================
+    # ================================== Lease State Commands ============================================
+    # ====================================================================================================
+    # These run in the state owner (see `call_state_owner`), the only place that changes the lease
+    # store and the IP pool. They return plain values, so replies are encoded and logged outside.
+    @staticmethod
+    def offer_address(mac_address, requested_ip, requested_lease, xid):
+        """
+        Picks the address offered to a client and reserves it until the client's REQUEST
+        arrives or `offer_reservation_time` runs out, so concurrent DISCOVERs are never offered
+        the same address. At most `max_offers` offers are kept: when a new client would exceed
+        it, the oldest offer is evicted, so a DISCOVER flood cannot grow the offer state.
+
+        A client that already holds a lease is offered its current address again, and a client
+        with a pending offer keeps its reserved address unless it asks for another free one.
+        Otherwise the requested address is offered if it is free, else one picked by
+        `allocate_address`.
+
+        Returns:
+            int: The offered IP address, or None if no address is free.
+        """
+        lease = lease_store.get(mac_address)
+        if lease is not None and lease.state != OFFERED:
+            return lease.ip
+        if lease is not None:
+            if lease.xid != xid:
+                # A new DISCOVER supersedes the offer cached for the previous one
+                Server.forget_replies(lease)
+            offered_ip = lease.ip
+            if requested_ip is not None and requested_ip != offered_ip \
+                    and Server.ip_pool.allocate(requested_ip) is not None:
+                Server.ip_pool.release(offered_ip)
+                offered_ip = requested_ip
+        else:
+            if lease_store.count(OFFERED) >= config.max_offers:
+                Server.evict_oldest_offer()
+            offered_ip = None if requested_ip is None else Server.ip_pool.allocate(requested_ip)
+            if offered_ip is None:
+                offered_ip = Server.allocate_address(mac_address)
+                if offered_ip is None:
+                    return None
+            Server.offers_made.inc()
+        lease_store.offer(mac_address, offered_ip, requested_lease,
+                          xid, time.time() + config.offer_reservation_time)
+        return offered_ip
+
+    @staticmethod
+    def allocate_address(mac_address):
+        """
+        Allocates an address for a client that did not ask for a free one.
+
+        A returning client gets the address it was last bound to if it is free (see
+        AddressHistory). Otherwise `allocation_policy` decides: "sequential" takes the lowest
+        free address; "hashed" takes the first free address from a position hashed from the MAC
+        address, so clients are spread over the pool and a client tends to land on the same
+        address again even once the history has forgotten it.
+
+        Returns:
+            int: The allocated IP address, or None if the pool is exhausted.
+        """
+        previous_ip = Server.address_history.get(mac_address)
+        if previous_ip is not None and Server.ip_pool.allocate(previous_ip) is not None:
+            Server.returning_offers.inc()
+            return previous_ip
+        if config.allocation_policy == "hashed":
+            return Server.ip_pool.allocate_from(((mac_address * MAC_HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) >> 32)
+        return Server.ip_pool.allocate()
+
+    @staticmethod
+    def evict_oldest_offer():
+        oldest = lease_store.oldest(OFFERED)
+        if oldest is not None:
+            lease_store.remove(oldest.mac_address)
+            Server.ip_pool.release(oldest.ip)
+            Server.forget_replies(oldest)
+            Server.offer_outcomes.inc("evicted")
+
+    @staticmethod
+    def commit_request(mac_address, requested_lease, xid):
+        """
+        Binds the address a client was offered, or renews the lease it holds. The record takes
+        the xid of the REQUEST, the key its ACK is cached under, so `forget_replies` drops that
+        ACK when the lease ends.
+
+        Returns:
+            tuple: (ip, lease_time) of the bound lease, or None if the client has no offer or lease.
+        """
+        lease = lease_store.get(mac_address)
+        if lease is None:
+            return None
+        ip, lease_time = lease.ip, lease.lease_time or requested_lease
+        if lease.state == OFFERED:
+            # The address was taken from the pool when it was offered
+            Server.offer_outcomes.inc("ack")
+        if lease.xid != xid:
+            # Only the replies of the latest transaction stay cached
+            Server.forget_replies(lease)
+        lease = lease_store.bind(
+            mac_address, ip, time.time() + lease_time, lease_time, xid)
+        Server.address_history.remember(mac_address, ip)
+        if Server.lease_journal:
+            with Server.profiler.stage("persist"):
+                Server.lease_journal.record_allocate(
+                    mac_address, ip, lease.expiry, lease.xid, lease_time)
+        return ip, lease_time
+
+    @staticmethod
+    def decline_offer(mac_address):
+        """
+        Drops a declined offer and returns its address to the pool.
+
+        Returns:
+            int: The declined IP address, or None if the client has no offer or lease.
+        """
+        lease = lease_store.get(mac_address)
+        if lease is None:
+            return None
+        if lease.state == OFFERED:
+            lease_store.remove(mac_address)
+            Server.ip_pool.release(lease.ip)
+            Server.forget_replies(lease)
+            Server.offer_outcomes.inc("declined")
+            # The client found the address in use; do not offer it again on its next DISCOVER
+            if Server.address_history.get(mac_address) == lease.ip:
+                Server.address_history.forget(mac_address)
+        return lease.ip
+
+    @staticmethod
+    def release_lease(mac_address):
+        """
+        Releases a client's lease; the address goes back to the pool on the next expiry pass.
+
+        Returns:
+            int: The released IP address, or None if the client holds no lease.
+        """
+        lease = lease_store.release(mac_address, time.time())
+        if lease is None:
+            return None
+        Server.forget_replies(lease)
+        if Server.lease_journal:
+            with Server.profiler.stage("persist"):
+                Server.lease_journal.record_release(mac_address, lease.expiry)
+        return lease.ip
 
     # ====================================================================================================
     # ======================== Handling DISCOVER Message Type (1) ========================================
     # ====================================================================================================
     @staticmethod
     def handle_dhcp_discover(parsed_message, client_address, mac_address, xid, server_socket, client_tuple):
-
-        options = parsed_message['options']
         requested_ip = None
         requested_lease = lease_duration
 
@@ -853,40 +1504,40 @@ class Server:
                 xid, mac_address, server_socket, client_tuple)
             return
 
-        if not Server.ip_pool and (mac_address not in discover_table.keys()):
-            log_message(
-                "IP pool is empty. Cannot assign IP to client.", "warning")
-            Server.dhcp_send_nack(
-                xid, mac_address, server_socket, client_tuple)
+        # Options 50 and 51 are ignored unless they hold exactly 4 bytes
+        option_value = parsed_message.uint32_option(50)
+        if option_value is not None:  # Requested IP (Option 50)
+            requested_ip = option_value
+            log_message("Requested IP: %s", "info", IpText(requested_ip))
+        option_value = parsed_message.uint32_option(51)
+        if option_value is not None:  # Lease Duration (Option 51)
+            requested_lease = option_value
+            log_message("Requested Lease Duration: %s seconds",
+                        "info", requested_lease)
+        requested_lease = requested_lease or lease_duration
+
+        offered_ip = Server.call_state_owner(
+            Server.offer_address, mac_address, requested_ip, requested_lease, xid)
+        if offered_ip is None:
+            if Server.pool_shard:
+                # Each shard allocates from its own slice only; the others may still have free addresses
+                log_message("IP pool slice of shard %s/%s is empty. Cannot assign IP to client.", "warning",
+                            Server.pool_shard[0] + 1, Server.pool_shard[1])
+                Server.shard_pool_exhausted.inc(Server.pool_shard[0])
+            else:
+                log_message(
+                    "IP pool is empty. Cannot assign IP to client.", "warning")
+            # DHCP NAK (Not Acknowledged)
+            Server.send_reply("offer_nak", server_socket,
+                              client_tuple, xid, mac_address)
+            Server.pool_exhausted.inc()
             return
-
-        i = 0
-        for i in options.keys():
-            option_value = options[i]
-            if i == 50:  # Requested IP (Option 50)
-                requested_ip = socket.inet_ntoa(option_value)
-                log_message(f"Requested IP: {requested_ip}", "info")
-            elif i == 51:  # Lease Duration (Option 51)
-                requested_lease = int.from_bytes(
-                    option_value, byteorder='big')
-                log_message(f"Requested Lease Duration: {
-                            requested_lease} seconds", "info")
-
-        if requested_ip and requested_ip not in Server.ip_pool:
-            log_message(
-                f"Requested IP {requested_ip} is not available.", "warning")
-            requested_ip = Server.ip_pool[0]
-
-        if not requested_ip:
-            requested_ip = Server.ip_pool[0]
-        with Server.discover_cache_lock:
-            discover_cache[mac_address] = {
-                'requested_ip': requested_ip,
-                'requested_lease': lease_duration if requested_lease == 0 else requested_lease
-            }
+        if requested_ip is not None and offered_ip != requested_ip:
+            log_message("Requested IP %s is not available.",
+                        "warning", IpText(requested_ip))
 
         # Send DHCP Offer
-        Server.dhcp_send_offer(requested_ip, requested_lease, xid,
+        Server.dhcp_send_offer(offered_ip, requested_lease, xid,
                                client_address, mac_address, server_socket, client_tuple)
 
     # ====================================================================================================
@@ -901,71 +1552,53 @@ class Server:
                 xid, mac_address, server_socket, client_tuple)
             return
 
-        if 50 in parsed_message['options']:
-            requested_ip = parsed_message['options'][50]
+        # The client is given the address it was offered (or renews the one it holds)
+        bound = Server.call_state_owner(
+            Server.commit_request, mac_address, requested_lease, xid)
+        if bound:
+            requested_ip, requested_lease = bound
+            log_message("Received DHCP Request from %s for IP %s with lease duration %s seconds", "info",
+                        client_address, IpText(requested_ip), requested_lease)
+
+            Server.dhcp_send_ack(
+                xid, mac_address, server_socket, client_tuple, requested_ip, requested_lease)
+            log_message("Assigned IP %s to(MAC: %s) with lease duration %s seconds", "info",
+                        IpText(requested_ip), MacText(mac_address), requested_lease)
         else:
-            requested_ip = client_address
-        # print("requested_ip", requested_ip)
-        mac_address = Server.get_mac_address(parsed_message)  # MAC is 6 bytes
-
-        with Server.discover_cache_lock:
-            discover_data = discover_cache.get(mac_address)
-            if discover_data:
-                requested_ip = discover_data['requested_ip'] or requested_ip
-                requested_lease = discover_data['requested_lease'] or requested_lease
-                log_message(f"Received DHCP Request from {client_address} for IP {
-                            requested_ip} with lease duration {requested_lease} seconds", "info")
-
-        with Server.lease_table_lock:
-            if mac_address in discover_table and discover_table[mac_address][0] == requested_ip:
-                lease_table[mac_address] = (
-                    requested_ip, time.time() +
-                    requested_lease, discover_table[mac_address][2]
-                )
-                Server.IP_GUI[requested_ip] = [mac_address, requested_lease]
-                with Server.ip_pool_lock:
-                    if requested_ip in Server.ip_pool:
-                        Server.ip_pool.remove(requested_ip)
-
-                Server.dhcp_send_ack(
-                    xid, mac_address, server_socket, client_tuple, requested_ip, requested_lease)
-                log_message(f"Assigned IP {requested_ip} to(MAC: {
-                            mac_address}) with lease duration {requested_lease} seconds", "info")
-            else:
-                Server.dhcp_send_nack(
-                    xid, mac_address, server_socket, client_tuple)
+            requested_ip = parsed_message.uint32_option(50)
+            if requested_ip is None:
+                requested_ip = ip_to_int(client_address)
+
+            Server.dhcp_send_nack(
+                xid, mac_address, server_socket, client_tuple)
 
-                log_message(f"Rejected IP request {requested_ip} from {
-                            client_tuple}(MAC: {mac_address})", "warning")
+            log_message("Rejected IP request %s from %s(MAC: %s)", "warning",
+                        IpText(requested_ip), client_tuple, MacText(mac_address))
 
     # ====================================================================================================
     # ======================== Handling DECLINE Message Type (4) =========================================
     # ====================================================================================================
     @staticmethod
-    def handle_dhcp_decline(mac_address, declined_ip):
-        if mac_address in discover_table:
-            discover_table.pop(mac_address)
+    def handle_dhcp_decline(mac_address):
+        declined_ip = Server.call_state_owner(Server.decline_offer, mac_address)
+        if declined_ip is None:
+            log_message("Client with MAC address %s didn't send a discover message",
+                        "warning", MacText(mac_address))
         else:
-            log_message(f"Client with MAC address {
-                        mac_address} didn't send a discover message", "warning")
+            log_message("Received DHCP Decline for IP %s from %s", "info",
+                        IpText(declined_ip), MacText(mac_address))
 
     # ====================================================================================================
     # ======================== Handling RELEASE Message Type (7) =========================================
     # ====================================================================================================
     @staticmethod
     def handle_dhcp_release(mac_address):
-        if mac_address in lease_table:
-            lease_record = lease_table[mac_address]
-            lease_record = list(lease_record)
-            released_ip = lease_record[0]
-            log_message(f"Received DHCP Release for IP {
-                        released_ip} from {mac_address}", "info")
-            lease_record[1] = time.time()
-            lease_record = tuple(lease_record)
-            # Update the record in the table
-            lease_table[mac_address] = lease_record
-            log_message(
-                f"Updated lease expiry for / IP {released_ip} to current time", "info")
+        released_ip = Server.call_state_owner(Server.release_lease, mac_address)
+        if released_ip is not None:
+            log_message("Received DHCP Release for IP %s from %s", "info",
+                        IpText(released_ip), MacText(mac_address))
+            log_message("Updated lease expiry for / IP %s to current time",
+                        "info", IpText(released_ip))
 
     # ====================================================================================================
     # ======================== Handling INFORM Message Type (8) ==========================================
@@ -975,96 +1608,186 @@ class Server:
         """
         Handles DHCP INFORM messages from clients.
         Args:
-            parsed_message (dict): The parsed DHCP message.
+            parsed_message (DHCPPacket): The parsed DHCP message.
             client_address (str): The IP address of the client.
-            mac_address (str): The MAC address of the client.
+            mac_address (int): The MAC address of the client as a 48-bit integer.
             xid (int): The transaction ID.
             server_socket (socket.socket): The server's socket used to send responses.
             client_tuple (tuple): The address of the client in the form (IP, port).
         """
-        log_message(f"Received DHCP INFORM from {mac_address}", "info")
-
-        # Construct DHCP ACK message with additional configuration parameters
-        ack_message = Server.construct_dhcp_message(
-            xid=xid,
-            client_mac=mac_address,
-            msg_type=5,  # DHCP ACK
-            server_ip=server_ip,
-            client_ip=client_address,
-            your_ip=client_address,
-            gateway_ip="192.168.1.2",
-            lease_time=0,  # No lease time for INFORM
-            subnet_mask="255.255.255.0",
-            dns_servers=["208.67.222.222", "208.67.220.220"],
-            domain_name="example.com",
-            broadcast_address="192.168.1.255",
-            t1_time=0,
-            t2_time=0,
-            option_overload=0,  # No option overload
-            max_message_size=1500  # Maximum DHCP message size
-        )
+        log_message("Received DHCP INFORM from %s", "info", MacText(mac_address))
 
-        server_socket.sendto(ack_message, client_tuple)
-        log_message(f"Sent DHCP ACK to {mac_address}", "info")
+        # DHCP ACK carrying the scope's configuration parameters
+        Server.send_reply("inform_ack", server_socket, client_tuple, xid, mac_address,
+                          client_ip=ip_to_int(client_address), your_ip=ip_to_int(client_address))
+        log_message("Sent DHCP ACK to %s", "info", MacText(mac_address))
 
     # ====================================================================================================
     # ========================= Handling the incoming client =============================================
     # ====================================================================================================
     @staticmethod
-    def handle_client(message, client_address, server_socket, ip_pool_file_path, blocked_mac_addresses_file_path):
+    def handle_client(message, client_address, server_socket, received_at=None):
         """
         Handles incoming DHCP messages from clients and responds accordingly.
         Parameters:
         message (bytes): The DHCP message received from the client.
         client_address (tuple): The address of the client in the form (IP, port).
         server_socket (socket.socket): The server's socket used to send responses.
+        received_at (float, optional): `time.perf_counter()` when the datagram was received, so a
+            sampled message also shows how long it waited before being handled.
         The function processes different types of DHCP messages:
         - DHCP Discover: Logs the discovery, checks IP pool, and sends a DHCP Offer or NAK.
         - DHCP Request: Logs the request, checks lease table, and sends a DHCP ACK or NAK.
         - DHCP Decline: Logs the decline and updates the lease expiry time.
         - DHCP Release: Logs the release and updates the lease expiry time.
         - Other message types: Logs a warning for invalid message types.
-        The function uses several locks to ensure thread-safe access to shared resources like
-        the IP pool, lease table, and discover cache.
+        Changes to the lease store and the IP pool are handed to the state owner
+        (see `call_state_owner`); parsing and encoding run on the calling thread.
+        The IP pool and blocked MAC addresses are served from memory; the files are only
+        re-read by the file watcher when they are edited outside the server.
+        One message out of every `profile_sample_every` is timed stage by stage by `Server.profiler`.
+        """
+        start = time.perf_counter()
+        trace = Server.profiler.start(received_at)
+        try:
+            with Server.profiler.stage("parse"):
+                parsed_message = DHCPPacket(message)
+                client_tuple = Server.get_client_tuple(client_address)
+                mac_address = Server.get_mac_address(parsed_message)
+                msg_type = Server.get_msg_type(parsed_message)
+                xid = Server.get_xid(parsed_message)
+            Server.packets_received.inc(msg_type)
+            if Server.replay_reply(msg_type, mac_address, xid, server_socket, client_tuple):
+                Server.reply_latency.observe(time.perf_counter() - start)
+                return
+            with Server.profiler.stage("decision"):
+                match msg_type:
+                    case 1:  # DHCP Discover
+                        log_message("Received DHCP Discover from %s",
+                                    "info", MacText(mac_address))
+                        Server.handle_dhcp_discover(
+                            parsed_message, client_address, mac_address, xid, server_socket, client_tuple)
+
+                    case 3:  # DHCP Request
+                        Server.handle_dhcp_request(
+                            parsed_message, client_address, mac_address, xid, server_socket, client_tuple)
+                    case 4:  # DHCP Decline
+                        Server.handle_dhcp_decline(mac_address)
+                    case 7:  # DHCP Release
+                        Server.handle_dhcp_release(mac_address)
+                    case 8:
+                        Server.handle_dhcp_inform(
+                            parsed_message, client_address, mac_address, xid, server_socket, client_tuple)
+                    case _:
+                        log_message("invalid message type from %s (MAC: %s", "warning",
+                                    client_tuple, MacText(mac_address))
+        finally:
+            if trace is not None:
+                Server.profiler.finish(trace)
+        Server.reply_latency.observe(time.perf_counter() - start)
+
+    # ====================================================================================================
+    # ================================ Running in the State Owner ========================================
+    # ====================================================================================================
+    @staticmethod
+    def call_state_owner(function, *args):
+        """
+        Runs a function that touches the lease state in the context that owns that state.
+
+        Every engine keeps the state on a single thread and sets `Server.state_owner`: the
+        threaded and sharded engines run a StateActor, the asyncio engine its event loop.
+        Packet handlers and background threads like the file watcher and the journal
+        compaction go through this method instead of touching the state directly. Without a
+        state owner the function runs inline.
+
+        Args:
+            function (callable): The function to run.
+            *args: Arguments passed to the function.
+
+        Returns:
+            The function's return value.
+        """
+        trace = Server.profiler.current()
+        if trace is not None:
+            # A sampled message: time the wait for the owner and the command itself
+            with Server.profiler.stage("state_wait"):
+                if Server.state_owner:
+                    return Server.state_owner(Server.profiler.run_traced, trace, function, *args)
+                return Server.profiler.run_traced(trace, function, *args)
+        if Server.state_owner:
+            return Server.state_owner(function, *args)
+        return function(*args)
+
+    @staticmethod
+    def start_state_actor():
+        """
+        Starts a StateActor thread and makes it the state owner.
+        """
+        Server.state_actor = StateActor()
+        Server.state_actor.start()
+        Server.state_owner = Server.state_actor.call
+
+    # ====================================================================================================
+    # ==================================== Loading Server State ==========================================
+    # ====================================================================================================
+    @staticmethod
+    def load_state(ip_pool_file_path, blocked_mac_addresses_file_path):
+        """
+        Loads the IP pool and blocked MAC addresses, restores the leases from the lease journal,
+        and starts the journal compaction and the file watcher. Shared by all server engines.
+
+        Args:
+            ip_pool_file_path (str): The path to the text file containing the IP pool.
+            blocked_mac_addresses_file_path (str): The path to the text file containing the blocked MAC addresses.
         """
-        with Server.ip_pool_lock:
-            Server.ip_pool = Server.load_ip_pool(ip_pool_file_path)
+        Server.ip_pool_file_path = ip_pool_file_path
+        Server.ip_pool = Server.build_ip_pool(
+            Server.load_ip_pool(ip_pool_file_path))
         Server.blocked_mac_addresses = Server.load_blocked_mac_addresses(
             blocked_mac_addresses_file_path)
-        # print(Server.ip_pool)
-        parsed_message = Server.parse_dhcp_message(message)
-        client_tuple = Server.get_client_tuple(client_address)
-        mac_address = Server.get_mac_address(parsed_message)
-        msg_type = Server.get_msg_type(parsed_message)
-        xid = Server.get_xid(parsed_message)
-        match msg_type:
-            case 1:  # DHCP Discover
-                log_message(f"Received DHCP Discover from {
-                            mac_address}", "info")
-                log_message(f"Client MAC Address: {mac_address}", "info")
-                Server.handle_dhcp_discover(
-                    parsed_message, client_address, mac_address, xid, server_socket, client_tuple)
-
-            case 3:  # DHCP Request
-                Server.handle_dhcp_request(
-                    parsed_message, client_address, mac_address, xid, server_socket, client_tuple)
-            case 4:  # DHCP Decline
-                declined_ip = discover_table[mac_address][0]
-                log_message(f"Received DHCP Decline for IP {
-                            declined_ip} from {mac_address}", "info")
-                Server.handle_dhcp_decline(mac_address, declined_ip)
-            case 7:  # DHCP Release
-                Server.handle_dhcp_release(mac_address)
-            case 8:
-                Server.handle_dhcp_inform(
-                    parsed_message, client_address, mac_address, xid, server_socket, client_tuple)
-            case _:
-                log_message(f"invalid message type from {
-                            client_tuple} (MAC: {mac_address}", "warning")
-
-        with Server.ip_pool_lock:
-            Server.write_ip_pool(ip_pool_file_path, list(Server.ip_pool))
-        # print("ip pool after write", Server.ip_pool)
+
+        # Leases survive restarts through the journal, ip_pool.txt only declares the configured addresses
+        if Server.expiry_scheduler:
+            lease_store.expiry_listener = Server.expiry_scheduler.schedule
+        Server.lease_journal = LeaseJournal(
+            config.lease_journal_path, config.lease_snapshot_path, config.lease_journal_fsync)
+        Server.restore_leases()
+        Server.lease_journal.start_compaction(
+            lambda: Server.call_state_owner(Server.lease_state_snapshot),
+            config.lease_compaction_interval, config.lease_compaction_min_records)
+
+        # Pick up external edits of the pool and block list without re-reading them per packet
+        Server.file_watcher = FileWatcher(config.file_watch_interval)
+        Server.file_watcher.watch(ip_pool_file_path, Server.reload_ip_pool)
+        Server.file_watcher.watch(blocked_mac_addresses_file_path, lambda file_path: Server.call_state_owner(
+            Server.reload_blocked_mac_addresses, file_path))
+        Server.file_watcher.start()
+
+        Server.start_metrics_endpoint()
+
+    # ====================================================================================================
+    # ============================== Logging Worker Pool Stats ===========================================
+    # ====================================================================================================
+    @staticmethod
+    def worker_stats_logger(interval):
+        """
+        Periodically logs the worker pool's queue depth, wait times and drop count.
+
+        Args:
+            interval (float): Seconds between two log lines.
+        """
+        while True:
+            time.sleep(interval)
+            stats = Server.worker_pool.stats(reset_max_wait=True)
+            ingress_dropped = Server.ingress_dropped.values
+            invalid = sum(Server.invalid_dropped.values.values())
+            lanes = ", ".join(f"{name} {lane['queue_depth']} queued / {lane['dropped']} dropped / {lane['expired']} stale"
+                              for name, lane in stats["lanes"].items())
+            log_message(f"Worker pool: queue depth {stats['queue_depth']}, processed {stats['processed']}, dropped {
+                        stats['dropped']}, stale {stats['expired']}, avg wait {stats['avg_wait_ms']:.2f} ms, max wait {
+                        stats['max_wait_ms']:.2f} ms; lanes: {lanes}; "
+                        f"rate limited: {ingress_dropped['mac']} by MAC, {ingress_dropped['source']} by relay/source; "
+                        f"invalid: {invalid}", "info")
 
     # ====================================================================================================
     # ============================== Starting the DHCP Agent =============================================
@@ -1074,41 +1797,55 @@ class Server:
         Starts the DHCP server.
         This method sets up a UDP socket for the DHCP server, logs the server start,
         and waits for client messages. It also starts a separate thread to check for
-        lease expiries and handles incoming DHCP messages in separate threads.
+        lease expiries and hands incoming DHCP messages to a fixed-size worker pool.
+        The workers parse and encode in parallel; every lease and pool change runs on the
+        state actor thread.
         The server listens for DHCP messages on the configured IP address and port,
-        and processes each message in a new thread to handle multiple clients concurrently.
+        and queues each message for the workers in a lane chosen by its message type, so that
+        REQUESTs and RELEASEs are handled before DISCOVERs. Messages are dropped when their lane
+        is full or they waited too long in it, or before they are queued when they are not valid
+        DHCP client messages or their client or relay is over its ingress rate limit.
         Note:
             This method runs indefinitely, handling incoming DHCP messages and checking
             for lease expiries.
         Raises:
             Exception: If there is an error setting up the socket or handling client messages.
         """
-        Server.ip_pool_file_path = ip_pool_file_path
-        Server.ip_pool = Server.load_ip_pool(ip_pool_file_path)
-        Server.IP_GUI = {ip: ["Not Assigned", 0] for ip in Server.ip_pool}
+        Server.expiry_scheduler = ExpiryScheduler(config.expiry_resolution)
+        Server.start_state_actor()
+        Server.load_state(ip_pool_file_path, blocked_mac_addresses_file_path)
 
         server_socket = Server.setup_socket()
-        log_message(f"DHCP Server started on {
-                    server_ip}, waiting for clients...", "info")
+        log_message(f"DHCP Server started on {Server.socket_description(server_socket)}, waiting for clients...", "info")
 
         # Start the lease expiry checker in a separate thread
         threading.Thread(target=Server.lease_expiry_checker,
                          daemon=True).start()
-        while True:
 
-            message, client_address = server_socket.recvfrom(1024)
+        Server.worker_pool = WorkerPool(
+            Server.handle_client, config.worker_count, config.worker_queue_size, Server.worker_lanes())
+        lanes = config.worker_priority_lanes
+        Server.worker_pool.start()
+        threading.Thread(target=Server.worker_stats_logger, args=(
+            config.worker_stats_interval,), daemon=True).start()
+        while True:
+            message, client_address = server_socket.recvfrom(config.BUFFER_SIZE)
+            received_at = time.perf_counter()
             client_address = Server.get_client_address(client_address)
-            threading.Thread(target=Server.handle_client, args=(
-                message, client_address, server_socket, ip_pool_file_path, blocked_mac_addresses_file_path)).start()
-            # try:
-            # Server.handle_client(
-            #     message, client_address, server_socket, ip_pool_file_path, blocked_mac_addresses_file_path)
-            # except KeyboardInterrupt:
-            #     log_message(
-            #         "\033[91mKEYBOARD INTERRUPT DHCP Server stopped\033[0m", "info")
+            if not Server.admit(message, client_address):
+                continue
+            Server.worker_pool.submit(message, client_address, server_socket, received_at,
+                                      lane=Server.lane_of(message) if lanes else 0)
 
     @staticmethod
-    def main():
+    def main(engine=None):
+        """
+        Creates the server and runs it with the chosen engine.
+
+        Args:
+            engine (str, optional): "threaded", "asyncio" or "sharded". Defaults to `server_engine` in server_config.
+        """
+        engine = engine or config.server_engine
         ip_pool_file_path = os.path.join(os.getcwd(), "src/server/ip_pool.txt")
         # ip_pool = [
         #     # "192.168.1.100",
@@ -1123,8 +1860,18 @@ class Server:
             os.getcwd(), "src/server/blocked_mac.txt")
         # Seif: a0:b3:cc:49:fc:d7
         try:
-            server.start_dhcp_server(ip_pool_file_path=ip_pool_file_path,
-                                     blocked_mac_addresses_file_path=blocked_mac_addresses_file_path)
+            if engine == "asyncio":
+                from async_server import start_async_dhcp_server
+                start_async_dhcp_server(ip_pool_file_path=ip_pool_file_path,
+                                        blocked_mac_addresses_file_path=blocked_mac_addresses_file_path)
+            elif engine == "sharded":
+                from sharded_server import start_sharded_dhcp_server
+                start_sharded_dhcp_server(ip_pool_file_path=ip_pool_file_path,
+                                          blocked_mac_addresses_file_path=blocked_mac_addresses_file_path,
+                                          shard_count=config.shard_count)
+            else:
+                server.start_dhcp_server(ip_pool_file_path=ip_pool_file_path,
+                                         blocked_mac_addresses_file_path=blocked_mac_addresses_file_path)
         except KeyboardInterrupt:
             log_message(
                 "\033[91mKEYBOARD INTERRUPT DHCP Server stopped\033[0m", "info")
@@ -1134,21 +1881,28 @@ class Server:
 # ========================================= MAIN =====================================================
 # ====================================================================================================
 if __name__ == "__main__":
-    ip_pool_file_path = os.path.join(os.getcwd(), "src/server/ip_pool.txt")
-    # ip_pool = [
-    # "192.168.1.100",
-    # "192.168.1.101",
-    # "192.168.1.102",
-    # "192.168.1.103",
-    # "192.168.1.104",
-    # ]
-    server = Server()
-    # Server.write_ip_pool(ip_pool_file_path, ip_pool)
-    blocked_mac_addresses_file_path = os.path.join(
-        os.getcwd(), "src/server/blocked_mac.txt")
-    try:
-        server.start_dhcp_server(ip_pool_file_path=ip_pool_file_path,
-                                 blocked_mac_addresses_file_path=blocked_mac_addresses_file_path)
-    except KeyboardInterrupt:
-        log_message(
-            "\033[91mKEYBOARD INTERRUPT DHCP Server stopped\033[0m", "info")
+    parser = argparse.ArgumentParser(description="RFC-compliant DHCP server")
+    parser.add_argument("--engine", choices=["threaded", "asyncio", "sharded"], default=config.server_engine,
+                        help="threaded: worker pool over a blocking socket, asyncio: single event loop, "
+                             "sharded: one process per shard sharing port 67 with SO_REUSEPORT")
+    parser.add_argument("--shards", type=int, default=config.shard_count,
+                        help="number of shard processes for the sharded engine (0 = one per CPU)")
+    parser.add_argument("--listen", default=config.listen_address,
+                        help="address to bind (default: the server IP, 0.0.0.0 = every interface)")
+    parser.add_argument("--server-ip", default=config.server_ip,
+                        help="server identifier sent to clients (default: the listen address or the host name's address)")
+    parser.add_argument("--port", type=int, default=config.server_port, help="port to listen on")
+    parser.add_argument("--client-port", type=int, default=config.client_port, help="port the replies are sent to")
+    parser.add_argument("--rcvbuf", type=int, default=config.receive_buffer_size,
+                        help="SO_RCVBUF of the server socket in bytes (0 = OS default)")
+    parser.add_argument("--metrics-port", type=int, default=config.metrics_port,
+                        help="port of the metrics endpoint (the sharded engine uses one port per shard from here)")
+    args = parser.parse_args()
+    config.shard_count = args.shards
+    config.listen_address, config.server_ip = args.listen, args.server_ip
+    config.server_port, config.client_port = args.port, args.client_port
+    config.receive_buffer_size = args.rcvbuf
+    config.metrics_port = args.metrics_port
+    # Run through the importable module so the engine modules share the same Server class
+    import server
+    server.Server.main(engine=args.engine)
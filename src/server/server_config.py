@@ -1,35 +1,138 @@
+import os
 import socket
+import sys
 import logging
+from lease_store import LeaseStore
 # Server configuration
 SERVER_PORT = 67
 CLIENT_PORT = 68
 BUFFER_SIZE = 1024
 
+# Network: where the server listens and where its replies go
+listen_address = None  # Address the server socket binds to, "0.0.0.0" = every interface, None = server_ip
+server_port = SERVER_PORT
+client_port = CLIENT_PORT  # Destination port of the replies
+receive_buffer_size = 0  # SO_RCVBUF of the server socket in bytes, 0 = the OS default
+
 
 # Lease duration (time in seconds that the client can use the assigned IP address)
 lease_duration = 60  # Default lease time set to 1 hour (3600 seconds)
+offer_lease_time = 20  # Lease time announced in a DHCP OFFER
+offer_reservation_time = offer_lease_time  # Seconds an offered address stays reserved for the client's REQUEST
+max_offers = 10000  # Offers waiting for a REQUEST at most; the oldest one is evicted to make room
+expiry_resolution = 0.1  # Seconds: expiry deadlines are rounded up to this tick and share one wake-up
+
+# Address selection for clients that do not ask for a free address
+address_history_size = 65536  # Clients whose last bound address is remembered and offered again when free, 0 = off
+allocation_policy = "sequential"  # "sequential": lowest free address; "hashed": spread over the pool by MAC hash
+
+# Server's IP address (server identifier and siaddr of the replies)
+# None = the listen address, or the address of the host name, looked up when the server starts
+server_ip = None
+
+# Lease store: one offer / lease record per client, indexed by MAC, IP, xid, state and expiry
+lease_store = LeaseStore()
+
+# Seconds between two checks of ip_pool.txt / blocked_mac.txt for external edits
+file_watch_interval = 1.0
+
+# Lease journal: append-only record of lease changes, compacted into a snapshot in the background
+lease_journal_path = "src/server/lease_journal.log"
+lease_snapshot_path = "src/server/lease_snapshot.json"
+lease_journal_fsync = False  # Force every journal event to disk (slower, survives power loss)
+lease_compaction_interval = 30  # Seconds between two compaction checks
+lease_compaction_min_records = 1000  # Journal events needed before compacting
+
+# Server engine: "threaded" (worker pool), "asyncio" (single event loop) or "sharded" (one process per shard)
+server_engine = "threaded"
+shard_count = 0  # Shard processes for the sharded engine, 0 = one per CPU. Keep it stable across restarts
+
+# Worker pool: fixed number of handler threads fed by a bounded queue
+worker_count = 8
+worker_queue_size = 1024  # Packets waiting for a worker before new ones are dropped (single FIFO lane)
+# Priority lanes: the receive loop peeks at the message type (option 53) and queues REQUEST, DECLINE
+# and RELEASE packets ahead of DISCOVER and INFORM, so a DISCOVER flood cannot starve the exchanges
+# already in progress. Packets that waited longer than the client's retransmit window are dropped.
+worker_priority_lanes = True  # False queues every packet in one FIFO of worker_queue_size
+request_lane_size = 1024  # REQUEST / DECLINE / RELEASE packets waiting for a worker
+request_lane_max_age = 3.0  # Seconds; clients retransmit after 4 +/- 1 s (RFC 2131)
+discover_lane_size = 1024  # DISCOVER / INFORM / unrecognised packets waiting for a worker
+discover_lane_max_age = 3.0
+worker_stats_interval = 60  # Seconds between two worker pool stats log lines
+
+# Ingress rate limit: token buckets checked on every received datagram before it is parsed or queued
+ingress_mac_rate = 10  # Datagrams per second per client MAC (chaddr), 0 = off
+ingress_mac_burst = 20  # Datagrams a client MAC may send at once
+# Per relay agent (giaddr), or per source address for datagrams that were not relayed. Clients that
+# broadcast without a relay all share source 0.0.0.0, so keep this well above their total rate
+ingress_source_rate = 0  # Datagrams per second per relay / source, 0 = off
+ingress_source_burst = 2000
+ingress_max_keys = 65536  # Buckets kept per key class
 
-# Server's IP address, retrieved dynamically
-# Get the local IP address of the server
-server_ip = socket.gethostbyname(socket.gethostname())
+# Replay cache: replies to recent DISCOVERs / REQUESTs, resent as they are when the client retransmits
+replay_cache_size = 10000  # Replies kept at most, 0 = off
+replay_cache_ttl = 10  # Seconds a reply is replayed for; clients retransmit after about 4 s (RFC 2131)
+
+# Metrics: Prometheus text format at http://<metrics_address>:<metrics_port>/metrics
+metrics_enabled = True
+metrics_address = "127.0.0.1"
+metrics_port = 9167  # The sharded engine serves shard i on metrics_port + i
+profile_sample_every = 0  # Time the stages of one message out of this many (served on /profile), 0 = off
 
-# Lease table: Keeps track of active leases and expiry times
-lease_table = {}  # 'mac_address':(requested_id,lease_time,xid)
-discover_cache = {}
-discover_table = {}
 # Logging configurations (Optional for better debugging)
 log_file = "dhcp_server.log"  # Path to log file
 log_level = "INFO"  # Log level: INFO, DEBUG, ERROR, etc.
 
+# Logging pipeline: records are queued and written to the file and console by a background thread
+log_async = True  # False writes every line synchronously on the thread that logs it
+log_queue_size = 10000  # Records waiting to be written before new ones are dropped
+log_rate_limit = 100  # Lines per second per message kind, 0 = unlimited (errors are never limited)
+log_rate_burst = 500  # Lines a message kind may log at once after being quiet
+log_stats_interval = 10  # Seconds between two reports of dropped / suppressed lines
+log_rate_limiter = None  # Set by the server when the pipeline is started
+
+
+
+def resolve_server_ip():
+    """
+    Fills in `server_ip` if it is not configured: the listen address if it is a single
+    address, else the address the host name resolves to.
+
+    Returns:
+        str: The server IP address.
+    """
+    global server_ip
+    if server_ip is None:
+        if listen_address and listen_address != "0.0.0.0":
+            server_ip = listen_address
+        else:
+            server_ip = socket.gethostbyname(socket.gethostname())
+    return server_ip
+
+
+LOG_LEVELS = {"debug": logging.DEBUG, "info": logging.INFO,
+              "warning": logging.WARNING, "error": logging.ERROR}
+
+
+def log_message(message, level="info", *args, kind=None):
+    """
+    Logs a message at the given level.
 
-def log_message(message, level="info"):
-    if level == "info":
-        logging.info(message)
-    elif level == "debug":
-        logging.debug(message)
-    elif level == "error":
-        logging.error(message)
-    elif level == "warning":
-        logging.warning(message)
-    else:
-        logging.info(message)
+    With `args` the message is a %-style template that is only formatted when the line is
+    written, and the template itself is the message kind used for rate limiting. Messages
+    without arguments (usually f-strings) are rate limited per call site ("server.py:1234")
+    unless `kind` is given, so unrelated lines never share a bucket.
+    """
+    levelno = LOG_LEVELS.get(level, logging.INFO)
+    if not logging.root.isEnabledFor(levelno):
+        return
+    if log_rate_limiter is not None:
+        if kind is None:
+            if args:
+                kind = message
+            else:
+                caller = sys._getframe(1)
+                kind = f"{os.path.basename(caller.f_code.co_filename)}:{caller.f_lineno}"
+        if not log_rate_limiter.allow(kind, levelno):
+            return
+    logging.log(levelno, message, *args)
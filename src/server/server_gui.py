@@ -2,6 +2,8 @@ import sys
 from threading import Thread
 import time
 from server import Server
+from address_pool import AddressPool
+from addresses import ip_to_int
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
 import customtkinter as ctk
@@ -27,7 +29,7 @@ class LogFileHandler(FileSystemEventHandler):
 class DHCPServerGUI:
 
     def __init__(self, root):
-        self.ip_list = []  # Stores the IP addresses in the table
+        self.ip_list = []  # Stores the lines of the IP pool file; the table shows its entries
         self.root = root
         self.root.title("DHCP Server GUI")
         self.root.geometry("600x600")
@@ -93,16 +95,17 @@ class DHCPServerGUI:
 
         if self.table is None:
             self.table = ttk.Treeview(self.modify_frame, columns=(
-                "#", "IP Address"), show="headings")
+                "#", "Pool Entry"), show="headings")
             self.table.heading("#", text="#")
-            self.table.heading("IP Address", text="IP Address")
+            self.table.heading("Pool Entry", text="Pool Entry")
             self.table.column("#", width=40, anchor="center")
-            self.table.column("IP Address", width=150, anchor="w")
-            default_ips = Server.load_ip_pool(os.path.join(
+            self.table.column("Pool Entry", width=250, anchor="w")
+            self.ip_list = Server.load_ip_pool(os.path.join(
                 os.getcwd(), "src/server/ip_pool.txt"))
-            for idx, ip in enumerate(default_ips, start=1):
-                self.table.insert("", "end", values=(idx, ip))
-                self.ip_list.append(ip)
+            # Comment lines are kept in the file but not listed
+            entries = [line for line in self.ip_list if not line.startswith('#')]
+            for idx, entry in enumerate(entries, start=1):
+                self.table.insert("", "end", values=(idx, entry))
             self.table.pack(fill="both", expand=True, padx=10, pady=10)
 
         if self.add_button is None:
@@ -199,8 +202,8 @@ class DHCPServerGUI:
         Thread(target=continuous_log_update, daemon=True).start()
 
         def display_ip_table():
-            """Open a new window to display Server.IP_GUI dictionary."""
-            if not hasattr(Server, 'IP_GUI') or not Server.IP_GUI:
+            """Open a new window to display the IP pool and the clients holding its addresses."""
+            if not hasattr(Server, 'ip_pool') or not Server.ip_pool.size:
                 messagebox.showerror(
                     "Error", "No IP data available to display.")
                 return
@@ -220,10 +223,10 @@ class DHCPServerGUI:
             ip_tree.heading("Time", text="Time")
             ip_tree.pack(fill="both", expand=True, padx=10, pady=10)
 
-            # print(Server.IP_GUI)
+            # print(Server.ip_gui_rows())
 
             def insert_ip_data():
-                for ip, (value, time) in Server.IP_GUI.items():
+                for ip, value, time in Server.ip_gui_rows():
                     found = False
                     for row in ip_tree.get_children():
                         if ip_tree.item(row, "values")[0] == ip:
@@ -281,10 +284,28 @@ class DHCPServerGUI:
     def delete_ip(self):
         selected_item = self.table.selection()
         if selected_item:
-            ip_to_remove = self.table.item(selected_item, "values")[1]
+            entry_to_remove = self.table.item(selected_item, "values")[1]
+            text = entry_to_remove.split('#', 1)[0].strip()
+            if not text.startswith('!') and ('-' in text or '/' in text):
+                # A range or CIDR block: take a single address out of it with an exclusion line
+                ip = askstring("Delete IP", f"Enter an address to exclude from {
+                               text}, or leave empty to delete the whole entry:")
+                if ip is None:
+                    return
+                ip = ip.strip()
+                if ip:
+                    if not self.is_valid_ip(ip):
+                        return
+                    first, last = AddressPool.parse_range(text, hosts_only=False)
+                    if not first <= ip_to_int(ip) <= last:
+                        messagebox.showerror(
+                            "Invalid Entry", f"The IP address {ip} is not part of {text}.")
+                        return
+                    self.add_entry(f"!{ip}")
+                    return
             self.table.delete(selected_item)
-            if ip_to_remove in self.ip_list:
-                self.ip_list.remove(ip_to_remove)
+            if entry_to_remove in self.ip_list:
+                self.ip_list.remove(entry_to_remove)
             self.update_indexes()
             Server.write_ip_pool(os.path.join(
                 os.getcwd(), "src/server/ip_pool.txt"), self.ip_list)
@@ -303,20 +324,35 @@ class DHCPServerGUI:
         self.main_frame.pack(fill="both", expand=True)
 
     def add_ip(self):
-        ip = askstring("Add IP", "Enter IP Address:")
-        if ip and self.is_valid_ip(ip):
-            existing_ips = [self.table.item(
-                item)["values"][1] for item in self.table.get_children()]
-            if ip in existing_ips:
-                messagebox.showwarning("Duplicate IP", f"The IP address {
-                                       ip} already exists.")
-                return
-            current_row_count = len(self.table.get_children())
-            self.table.insert("", "end", values=(current_row_count + 1, ip))
-            self.ip_list.append(ip)
-            Server.write_ip_pool(os.path.join(
-                os.getcwd(), "src/server/ip_pool.txt"), self.ip_list)
-            print("IP List Updated:", self.ip_list)
+        entry = askstring(
+            "Add IP", "Enter an IP address, a range (first-last), a CIDR block or an exclusion (!entry):")
+        if entry and self.is_valid_entry(entry.strip()):
+            self.add_entry(entry.strip())
+
+    def add_entry(self, entry):
+        existing_entries = [self.table.item(
+            item)["values"][1] for item in self.table.get_children()]
+        if entry in existing_entries:
+            messagebox.showwarning("Duplicate Entry", f"The entry {
+                                   entry} already exists.")
+            return
+        current_row_count = len(self.table.get_children())
+        self.table.insert("", "end", values=(current_row_count + 1, entry))
+        self.ip_list.append(entry)
+        Server.write_ip_pool(os.path.join(
+            os.getcwd(), "src/server/ip_pool.txt"), self.ip_list)
+        print("IP List Updated:", self.ip_list)
+
+    def is_valid_entry(self, entry):
+        text = entry[1:].strip() if entry.startswith('!') else entry
+        if '-' not in text and '/' not in text:
+            return self.is_valid_ip(text)
+        try:
+            AddressPool([entry])
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Invalid Entry", f"Invalid pool entry {entry}: {e}")
+            return False
+        return True
 
     def is_valid_ip(self, ip):
         parts = ip.split(".")
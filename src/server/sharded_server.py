@@ -0,0 +1,197 @@
+import multiprocessing
+import os
+import selectors
+import shutil
+import socket
+import tempfile
+import threading
+import zlib
+import server_config as config
+from server import Server
+from expiry_scheduler import ExpiryScheduler
+
+log_message = config.log_message
+
+# Client's IPv4 address prepended to a datagram forwarded to another shard
+FORWARD_HEADER_SIZE = 4
+# IP_PKTINFO tells a datagram sent to this host from a broadcast that every shard receives
+IP_PKTINFO = getattr(socket, "IP_PKTINFO", None)
+PKTINFO_SPACE = socket.CMSG_SPACE(12)  # struct in_pktinfo
+
+
+# ====================================================================================================
+# ===================================== Shard Ownership ==============================================
+# ====================================================================================================
+def shard_of(message, shard_count):
+    """
+    Returns the shard that owns the client of a raw DHCP message, from a hash of its chaddr.
+
+    Args:
+        message (bytes): The raw DHCP message.
+        shard_count (int): The number of shards.
+
+    Returns:
+        int: The index of the owning shard.
+    """
+    return zlib.crc32(message[28:34]) % shard_count
+
+
+def receive(server_socket):
+    """
+    Receives one datagram from the server socket of a shard.
+
+    Linux hands every datagram sent to a broadcast address to each socket of the SO_REUSEPORT
+    group, while a unicast datagram reaches a single shard. The two are told apart by IP_PKTINFO:
+    a unicast datagram's destination is the local address it arrived on.
+
+    Args:
+        server_socket (socket.socket): The shard's server socket, with IP_PKTINFO enabled.
+
+    Returns:
+        tuple: (message, client_address, shared), `shared` being True when every shard received
+            its own copy of the datagram.
+    """
+    if IP_PKTINFO is None:
+        message, client_address = server_socket.recvfrom(config.BUFFER_SIZE)
+        return message, client_address, False
+    message, ancillary, _, client_address = server_socket.recvmsg(config.BUFFER_SIZE, PKTINFO_SPACE)
+    for level, kind, data in ancillary:
+        if level == socket.IPPROTO_IP and kind == IP_PKTINFO:
+            # ipi_ifindex, ipi_spec_dst (local address), ipi_addr (header destination)
+            return message, client_address, data[4:8] != data[8:12]
+    return message, client_address, False
+
+
+def shard_file_path(file_path, shard_index):
+    """
+    Returns the per-shard variant of a state file path, e.g. lease_journal.log -> lease_journal.shard2.log.
+    """
+    root, extension = os.path.splitext(file_path)
+    return f"{root}.shard{shard_index}{extension}"
+
+
+# ====================================================================================================
+# ====================================== Running a Shard =============================================
+# ====================================================================================================
+def run_shard(shard_index, shard_count, ipc_dir, ip_pool_file_path, blocked_mac_addresses_file_path):
+    """
+    Runs one shard of the sharded DHCP server inside its own process.
+
+    The shard owns a contiguous slice of the IP pool and the clients whose chaddr hashes to it,
+    so its lease tables never need to be shared with another process. It only allocates from its
+    own slice: once the slice is full, its clients get a NAK even if other shards still have free
+    addresses. Those NAKs are counted in `dhcp_shard_pool_exhausted_total`.
+
+    Broadcasts (most DISCOVERs and REQUESTs) reach every shard, so each shard handles only the
+    copies of its own clients and drops the others. A unicast datagram (e.g. a renewal) reaches
+    one shard only; when that is the wrong one, it is forwarded to the owner over a Unix datagram
+    socket.
+
+    Args:
+        shard_index (int): The index of this shard.
+        shard_count (int): The number of shards.
+        ipc_dir (str): Directory holding the shards' Unix sockets.
+        ip_pool_file_path (str): The path to the text file containing the IP pool.
+        blocked_mac_addresses_file_path (str): The path to the text file containing the blocked MAC addresses.
+    """
+    Server.pool_shard = (shard_index, shard_count)
+    Server.define_shard_metrics()
+    if Server.log_pipeline:
+        Server.log_pipeline.restart_after_fork()
+    Server.expiry_scheduler = ExpiryScheduler(config.expiry_resolution)
+    Server.start_state_actor()
+    config.lease_journal_path = shard_file_path(
+        config.lease_journal_path, shard_index)
+    config.lease_snapshot_path = shard_file_path(
+        config.lease_snapshot_path, shard_index)
+    Server.load_state(ip_pool_file_path, blocked_mac_addresses_file_path)
+
+    server_socket = Server.setup_socket(reuse_port=True)
+    if IP_PKTINFO is not None:
+        server_socket.setsockopt(socket.IPPROTO_IP, IP_PKTINFO, 1)
+    peer_paths = [os.path.join(ipc_dir, f"shard-{i}.sock")
+                  for i in range(shard_count)]
+    ipc_socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    ipc_socket.bind(peer_paths[shard_index])
+    ipc_socket.setblocking(False)
+
+    threading.Thread(target=Server.lease_expiry_checker, daemon=True).start()
+    log_message(f"DHCP shard {shard_index + 1}/{shard_count} started with {
+                Server.ip_pool.size} addresses", "info")
+
+    forward_drops = 0
+    selector = selectors.DefaultSelector()
+    selector.register(server_socket, selectors.EVENT_READ)
+    selector.register(ipc_socket, selectors.EVENT_READ)
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj is server_socket:
+                message, client_address, shared = receive(server_socket)
+                client_address = Server.get_client_address(client_address)
+                # Invalid datagrams are dropped here rather than forwarded to their owner
+                if not Server.screen(message):
+                    continue
+                owner = shard_of(message, shard_count)
+                if owner != shard_index:
+                    if shared:
+                        # The owner received its own copy of this broadcast
+                        continue
+                    try:
+                        ipc_socket.sendto(socket.inet_aton(
+                            client_address) + message, peer_paths[owner])
+                    except OSError:
+                        forward_drops += 1
+                        log_message(f"Shard {shard_index + 1}: dropped a datagram for shard {
+                                    owner + 1} ({forward_drops} so far)", "warning")
+                    continue
+            else:
+                try:
+                    data = ipc_socket.recv(config.BUFFER_SIZE + FORWARD_HEADER_SIZE)
+                except BlockingIOError:
+                    continue
+                client_address = socket.inet_ntoa(data[:FORWARD_HEADER_SIZE])
+                message = data[FORWARD_HEADER_SIZE:]
+
+            # Limited in the shard that owns the MAC address, which sees all of its datagrams
+            if not Server.rate_limit(message, client_address):
+                continue
+            try:
+                Server.handle_client(message, client_address, server_socket)
+            except Exception as e:
+                log_message(f"Shard {shard_index + 1}: failed to handle datagram from {
+                            client_address}: {e}", "error")
+
+
+# ====================================================================================================
+# ==================================== Running the Engine ============================================
+# ====================================================================================================
+def start_sharded_dhcp_server(ip_pool_file_path, blocked_mac_addresses_file_path, shard_count=0):
+    """
+    Forks one process per shard, each binding port 67 with SO_REUSEPORT, and waits for them.
+
+    Args:
+        ip_pool_file_path (str): The path to the text file containing the IP pool.
+        blocked_mac_addresses_file_path (str): The path to the text file containing the blocked MAC addresses.
+        shard_count (int, optional): The number of shards. Defaults to one per CPU.
+    """
+    shard_count = shard_count or os.cpu_count() or 1
+    ipc_dir = tempfile.mkdtemp(prefix="dhcp-shards-")
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=run_shard, name=f"dhcp-shard-{i}", daemon=True,
+                        args=(i, shard_count, ipc_dir, ip_pool_file_path, blocked_mac_addresses_file_path))
+        for i in range(shard_count)
+    ]
+    for process in processes:
+        process.start()
+    log_message(f"DHCP Server (sharded engine) started {
+                shard_count} shards on {config.listen_address or config.server_ip}:{
+                config.server_port}, waiting for clients...", "info")
+
+    try:
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            process.terminate()
+        shutil.rmtree(ipc_dir, ignore_errors=True)
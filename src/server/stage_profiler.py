@@ -0,0 +1,191 @@
+import contextlib
+import threading
+import time
+
+STAGES = ("receive", "parse", "decision", "state_wait", "state_command", "persist", "encode", "send")
+
+_NO_STAGE = contextlib.nullcontext()
+
+
+# ====================================================================================================
+# ========================================= Class Trace ==============================================
+# ====================================================================================================
+class Trace:
+    """
+    Stage timings of one sampled message.
+
+    Stages nest: a stage entered while another one is open is its child, and the parent's
+    self time excludes it. Every closed stage adds its self time to the folded stack made of
+    the open stages, e.g. "handle_client;decision;state_wait".
+    """
+    __slots__ = ("stack", "self_times", "stage_times")
+
+    def __init__(self):
+        self.stack = [["handle_client", time.perf_counter(), 0.0]]
+        self.self_times = []
+        self.stage_times = []
+
+    def enter(self, stage):
+        self.stack.append([stage, time.perf_counter(), 0.0])
+
+    def leave(self):
+        stage, start, child_time = self.stack.pop()
+        elapsed = time.perf_counter() - start
+        self.stack[-1][2] += elapsed
+        path = ";".join(frame[0] for frame in self.stack) + ";" + stage
+        self.self_times.append((path, elapsed - child_time))
+        self.stage_times.append((stage, elapsed))
+
+    def record(self, stage, elapsed, path=None):
+        """
+        Adds a stage measured outside the trace, such as the wait before the message was handled.
+        """
+        self.self_times.append((path or stage, elapsed))
+        self.stage_times.append((stage, elapsed))
+
+
+class _Stage:
+    __slots__ = ("trace",)
+
+    def __init__(self, trace):
+        self.trace = trace
+
+    def __enter__(self):
+        return self.trace
+
+    def __exit__(self, *exc_info):
+        self.trace.leave()
+
+
+# ====================================================================================================
+# ==================================== Class StageProfiler ===========================================
+# ====================================================================================================
+class StageProfiler:
+    """
+    Sampling per-stage timer for the request pipeline.
+
+    One message out of every `sample_every` is traced. Its stages (receive, parse, decision,
+    state wait, state command, persist, encode, send) are timed into a per-stage histogram and
+    into folded stacks, the input format of flamegraph.pl and speedscope. Messages that are not
+    sampled only pay for a counter and an attribute check per stage.
+
+    The trace of a message lives in a thread-local; `run_traced()` carries it over to the state
+    owner thread while the handler waits for its command.
+
+    Attributes:
+        sample_every (int): Trace one message out of this many. 0 turns the profiler off.
+        histogram (metrics.Histogram, optional): Histogram with one `stage` label value per stage.
+        traces (int): Messages traced so far.
+    """
+
+    def __init__(self, sample_every=0, histogram=None):
+        self.sample_every = sample_every
+        self.histogram = histogram
+        self.traces = 0
+        self.active = 0
+        self._messages = 0
+        self._local = threading.local()
+        self._folded = {}
+        self._lock = threading.Lock()
+
+    # ====================================================================================================
+    # ====================================== Taking Samples ==============================================
+    # ====================================================================================================
+    def start(self, received_at=None):
+        """
+        Starts a trace for the current message if it is sampled.
+
+        Args:
+            received_at (float, optional): `time.perf_counter()` when the datagram was received;
+                the time until now is recorded as the receive stage.
+
+        Returns:
+            Trace: The trace, or None if the message is not sampled.
+        """
+        if not self.sample_every:
+            return None
+        self._messages += 1
+        if self._messages % self.sample_every:
+            return None
+        trace = Trace()
+        if received_at is not None:
+            trace.record("receive", trace.stack[0][1] - received_at)
+        self._local.trace = trace
+        with self._lock:
+            self.active += 1
+        return trace
+
+    def current(self):
+        """
+        Returns the trace of the message handled by this thread, or None.
+        """
+        if not self.active:
+            return None
+        return getattr(self._local, "trace", None)
+
+    def stage(self, name):
+        """
+        Returns a context manager that times a stage of the current trace; a no-op when the
+        current message is not sampled.
+        """
+        trace = self.current()
+        if trace is None:
+            return _NO_STAGE
+        trace.enter(name)
+        return _Stage(trace)
+
+    def run_traced(self, trace, function, *args):
+        """
+        Runs a state command on the state owner thread as the "state_command" stage of `trace`.
+        """
+        previous = getattr(self._local, "trace", None)
+        self._local.trace = trace
+        with self._lock:
+            self.active += 1
+        trace.enter("state_command")
+        try:
+            return function(*args)
+        finally:
+            trace.leave()
+            self._local.trace = previous
+            with self._lock:
+                self.active -= 1
+
+    def finish(self, trace):
+        """
+        Closes a trace and adds it to the folded stacks and the stage histogram.
+        """
+        self._local.trace = None
+        total = time.perf_counter() - trace.stack[0][1]
+        trace.self_times.append(("handle_client", total - trace.stack[0][2]))
+        with self._lock:
+            self.active -= 1
+            self.traces += 1
+            for path, elapsed in trace.self_times:
+                self._folded[path] = self._folded.get(path, 0.0) + elapsed
+        if self.histogram is not None:
+            for stage, elapsed in trace.stage_times:
+                self.histogram.observe(elapsed, stage)
+
+    # ====================================================================================================
+    # ====================================== Folded Stacks ===============================================
+    # ====================================================================================================
+    def folded_stacks(self, reset=False):
+        """
+        Returns the sampled time as folded stacks, one "stage;stage;stage microseconds" line per path.
+
+        Args:
+            reset (bool, optional): Start collecting from zero afterwards.
+        """
+        with self._lock:
+            folded = dict(self._folded)
+            if reset:
+                self._folded = {}
+        return "".join(f"{path} {round(seconds * 1e6)}\n" for path, seconds in sorted(folded.items()))
+
+    def dump(self, file_path, reset=False):
+        """
+        Writes the folded stacks to a file, e.g. for `flamegraph.pl file_path > profile.svg`.
+        """
+        with open(file_path, 'w') as file:
+            file.write(self.folded_stacks(reset))
@@ -0,0 +1,110 @@
+import logging
+import queue
+import threading
+
+
+class _Reply:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Lock()
+        self.done.acquire()
+        self.value = None
+        self.error = None
+
+
+# ====================================================================================================
+# ===================================== Class StateActor =============================================
+# ====================================================================================================
+class StateActor:
+    """
+    Single thread that owns the lease store, the IP pool and the block list.
+
+    Every change to that state is sent to the actor as a command (a function and its arguments)
+    over a queue and executed there one at a time, so the state needs no locks and no lock order
+    can deadlock. Workers only parse requests and encode replies in parallel; they wait for the
+    result of their command with `call()`. Commands issued from the actor thread itself run inline.
+
+    Attributes:
+        processed (int): Commands executed so far.
+        failed (int): Commands that raised an exception.
+        thread_id (int): Identifier of the actor thread once started.
+    """
+
+    def __init__(self, name="dhcp-state"):
+        self.name = name
+        self.processed = 0
+        self.failed = 0
+        self.thread_id = None
+        self._commands = queue.SimpleQueue()
+        self._replies = threading.local()
+
+    def start(self):
+        """
+        Starts the actor thread.
+        """
+        started = threading.Event()
+
+        def run():
+            self.thread_id = threading.get_ident()
+            started.set()
+            self._run()
+
+        threading.Thread(target=run, name=self.name, daemon=True).start()
+        started.wait()
+
+    def call(self, function, *args):
+        """
+        Runs a command on the actor thread and waits for its result.
+
+        Args:
+            function (callable): The command.
+            *args: Arguments passed to the command.
+
+        Returns:
+            The command's return value. An exception raised by the command is raised again here.
+        """
+        if threading.get_ident() == self.thread_id:
+            return function(*args)
+        # One reply slot per calling thread, reused for every command it sends
+        reply = getattr(self._replies, "reply", None)
+        if reply is None:
+            reply = self._replies.reply = _Reply()
+        self._commands.put((function, args, reply))
+        reply.done.acquire()
+        value, error = reply.value, reply.error
+        reply.value = reply.error = None
+        if error is not None:
+            raise error
+        return value
+
+    def submit(self, function, *args):
+        """
+        Queues a command without waiting for it. Exceptions are logged by the actor.
+        """
+        self._commands.put((function, args, None))
+
+    def queue_depth(self):
+        """
+        Returns the number of commands waiting for the actor.
+        """
+        return self._commands.qsize()
+
+    def _run(self):
+        while True:
+            function, args, reply = self._commands.get()
+            try:
+                value = function(*args)
+            except Exception as e:
+                self.failed += 1
+                if reply is None:
+                    logging.exception("State command %s failed", getattr(
+                        function, "__name__", function))
+                else:
+                    reply.error = e
+            else:
+                if reply is not None:
+                    reply.value = value
+            self.processed += 1
+            if reply is not None:
+                reply.done.release()
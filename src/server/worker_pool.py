@@ -0,0 +1,188 @@
+import collections
+import logging
+import threading
+import time
+
+
+# ====================================================================================================
+# ======================================== Class Lane ================================================
+# ====================================================================================================
+class Lane:
+    """
+    One admission lane of the worker pool: a bounded FIFO of jobs with an optional deadline.
+
+    Attributes:
+        name (str): Lane name, used in the stats.
+        queue_size (int): Maximum number of jobs waiting in the lane.
+        max_age (float): Seconds a job may wait before it is dropped as stale, None for no limit.
+        submitted (int): Jobs accepted into the lane.
+        dropped (int): Jobs rejected because the lane was full.
+        expired (int): Jobs dropped because they waited longer than `max_age`.
+    """
+    __slots__ = ("name", "queue_size", "max_age", "jobs", "submitted", "dropped", "expired")
+
+    def __init__(self, name, queue_size, max_age=None):
+        self.name = name
+        self.queue_size = queue_size
+        self.max_age = max_age
+        self.jobs = collections.deque()
+        self.submitted = 0
+        self.dropped = 0
+        self.expired = 0
+
+
+# ====================================================================================================
+# ===================================== Class WorkerPool =============================================
+# ====================================================================================================
+class WorkerPool:
+    """
+    Fixed number of worker threads fed by bounded admission lanes.
+
+    The receive loop calls `submit()`, which never blocks: when the job's lane is full the job
+    is dropped and counted instead of creating more threads. Workers always take the oldest job
+    of the first non-empty lane, so a later lane is only served while the earlier ones are
+    empty. A job that waited longer than its lane's `max_age` is dropped when a worker reaches
+    it: its sender has retransmitted by then, and handling it would only delay fresher jobs.
+
+    Without `lanes` the pool has a single FIFO lane of `queue_size` jobs and no deadline.
+
+    Attributes:
+        worker_count (int): Number of worker threads.
+        lanes (list): The Lane objects, highest priority first.
+        processed (int): Jobs completed by a worker.
+        failed (int): Jobs whose handler raised an exception.
+    """
+
+    def __init__(self, handler, worker_count=8, queue_size=1024, lanes=None):
+        """
+        Args:
+            handler (callable): Called by a worker with the arguments of each job.
+            worker_count (int, optional): Number of worker threads.
+            queue_size (int, optional): Size of the single lane used when `lanes` is not given.
+            lanes (list, optional): (name, queue_size, max_age) of each lane, highest priority first.
+        """
+        self.handler = handler
+        self.worker_count = worker_count
+        self.lanes = [Lane(*lane) for lane in lanes] if lanes else [Lane("fifo", queue_size)]
+        self.processed = 0
+        self.failed = 0
+        self._depth = 0
+        self._not_empty = threading.Condition(threading.Lock())
+        self._stats_lock = threading.Lock()
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._threads = []
+
+    @property
+    def submitted(self):
+        return sum(lane.submitted for lane in self.lanes)
+
+    @property
+    def dropped(self):
+        return sum(lane.dropped for lane in self.lanes)
+
+    @property
+    def expired(self):
+        return sum(lane.expired for lane in self.lanes)
+
+    def start(self):
+        """
+        Starts the worker threads.
+        """
+        for i in range(self.worker_count):
+            thread = threading.Thread(
+                target=self._run, name=f"dhcp-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, *args, lane=0):
+        """
+        Queues a job for the workers without blocking.
+
+        Args:
+            *args: Arguments passed to the handler.
+            lane (int, optional): Index of the lane to queue the job in.
+
+        Returns:
+            bool: True if the job was queued, False if it was dropped because the lane is full.
+        """
+        lane = self.lanes[lane]
+        with self._not_empty:
+            if len(lane.jobs) >= lane.queue_size:
+                lane.dropped += 1
+                return False
+            lane.jobs.append((time.monotonic(), args))
+            lane.submitted += 1
+            self._depth += 1
+            self._not_empty.notify()
+        return True
+
+    def queue_depth(self):
+        """
+        Returns the number of jobs waiting for a worker, in every lane.
+        """
+        return self._depth
+
+    def _next_job(self):
+        # Oldest job of the first non-empty lane, skipping the stale ones
+        with self._not_empty:
+            while True:
+                while not self._depth:
+                    self._not_empty.wait()
+                now = time.monotonic()
+                for lane in self.lanes:
+                    if lane.jobs:
+                        break
+                enqueued_at, args = lane.jobs.popleft()
+                self._depth -= 1
+                wait = now - enqueued_at
+                if lane.max_age is not None and wait > lane.max_age:
+                    lane.expired += 1
+                    continue
+                return wait, args
+
+    def _run(self):
+        while True:
+            wait, args = self._next_job()
+            try:
+                self.handler(*args)
+            except Exception:
+                logging.exception("Worker failed to handle a job")
+                with self._stats_lock:
+                    self.failed += 1
+            with self._stats_lock:
+                self.processed += 1
+                self._total_wait += wait
+                if wait > self._max_wait:
+                    self._max_wait = wait
+
+    def stats(self, reset_max_wait=False):
+        """
+        Returns the current queue statistics.
+
+        Args:
+            reset_max_wait (bool, optional): Start a new maximum wait window after reading it.
+
+        Returns:
+            dict: queue_depth, submitted, dropped, expired, processed, failed, avg_wait_ms,
+                max_wait_ms, and `lanes`: name -> {queue_depth, submitted, dropped, expired}.
+        """
+        with self._not_empty:
+            lanes = {lane.name: {"queue_depth": len(lane.jobs), "submitted": lane.submitted,
+                                 "dropped": lane.dropped, "expired": lane.expired} for lane in self.lanes}
+        with self._stats_lock:
+            avg_wait = self._total_wait / self.processed if self.processed else 0.0
+            stats = {
+                "queue_depth": sum(lane["queue_depth"] for lane in lanes.values()),
+                "submitted": sum(lane["submitted"] for lane in lanes.values()),
+                "dropped": sum(lane["dropped"] for lane in lanes.values()),
+                "expired": sum(lane["expired"] for lane in lanes.values()),
+                "processed": self.processed,
+                "failed": self.failed,
+                "avg_wait_ms": avg_wait * 1000,
+                "max_wait_ms": self._max_wait * 1000,
+                "lanes": lanes,
+            }
+            if reset_max_wait:
+                self._max_wait = 0.0
+        return stats
@@ -0,0 +1,179 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+from address_pool import AddressPool, WORD_BITS  # noqa: E402
+from addresses import ip_to_int, int_to_ip  # noqa: E402
+
+
+def addresses(pool):
+    return [int_to_ip(address) for address in pool.addresses()]
+
+
+class PoolParsingTest(unittest.TestCase):
+    def test_single_address(self):
+        self.assertEqual(addresses(AddressPool(["192.168.1.100"])), ["192.168.1.100"])
+
+    def test_range_is_inclusive(self):
+        pool = AddressPool(["192.168.1.100-192.168.1.102"])
+        self.assertEqual(addresses(pool), ["192.168.1.100", "192.168.1.101", "192.168.1.102"])
+
+    def test_cidr_leaves_out_network_and_broadcast(self):
+        self.assertEqual(addresses(AddressPool(["10.0.0.0/30"])), ["10.0.0.1", "10.0.0.2"])
+        self.assertEqual(AddressPool(["10.0.0.0/24"]).size, 254)
+
+    def test_cidr_31_and_32_keep_every_address(self):
+        self.assertEqual(addresses(AddressPool(["10.0.0.0/31"])), ["10.0.0.0", "10.0.0.1"])
+        self.assertEqual(addresses(AddressPool(["10.0.0.7/32"])), ["10.0.0.7"])
+
+    def test_comments_and_blank_lines_are_ignored(self):
+        pool = AddressPool(["# pool", "", "  10.0.0.5  # gateway side", "   "])
+        self.assertEqual(addresses(pool), ["10.0.0.5"])
+
+    def test_overlapping_entries_are_merged(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.5", "10.0.0.4-10.0.0.8", "10.0.0.9"])
+        self.assertEqual(pool.size, 9)
+        self.assertEqual(addresses(pool)[0], "10.0.0.1")
+        self.assertEqual(addresses(pool)[-1], "10.0.0.9")
+
+    def test_exclusion_of_a_single_address(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.5", "!10.0.0.3"])
+        self.assertEqual(addresses(pool), ["10.0.0.1", "10.0.0.2", "10.0.0.4", "10.0.0.5"])
+
+    def test_exclusion_of_a_range_and_a_cidr_block(self):
+        pool = AddressPool(["10.0.0.0/24", "!10.0.0.1-10.0.0.10", "!10.0.0.128/25"])
+        self.assertEqual(pool.size, 254 - 10 - 127)
+        self.assertEqual(addresses(pool)[0], "10.0.0.11")
+        self.assertEqual(addresses(pool)[-1], "10.0.0.127")
+
+    def test_exclusion_applies_regardless_of_line_order(self):
+        pool = AddressPool(["!10.0.0.2", "10.0.0.1-10.0.0.3"])
+        self.assertEqual(addresses(pool), ["10.0.0.1", "10.0.0.3"])
+
+    def test_exclusion_covering_the_whole_pool(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.3", "! 10.0.0.0/24"])
+        self.assertEqual(pool.size, 0)
+        self.assertIsNone(pool.allocate())
+
+    def test_invalid_address_raises(self):
+        with self.assertRaises(OSError):
+            AddressPool(["10.0.0.300"])
+
+    def test_reversed_range_raises_naming_the_line(self):
+        with self.assertRaisesRegex(ValueError, "line 2 '10.0.0.20-10.0.0.10'"):
+            AddressPool(["10.0.0.1", "10.0.0.20-10.0.0.10"])
+        with self.assertRaisesRegex(ValueError, "line 1 '!10.0.0.9-10.0.0.2'"):
+            AddressPool(["!10.0.0.9-10.0.0.2"])
+
+
+class PoolAllocationTest(unittest.TestCase):
+    def test_allocate_returns_the_lowest_free_address(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.3"])
+        self.assertEqual(pool.allocate(), ip_to_int("10.0.0.1"))
+        self.assertEqual(pool.allocate(), ip_to_int("10.0.0.2"))
+        self.assertEqual(pool.free_count, 1)
+        self.assertEqual(pool.used_count, 2)
+
+    def test_allocate_a_given_address(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.3"])
+        self.assertEqual(pool.allocate("10.0.0.2"), "10.0.0.2")
+        self.assertIsNone(pool.allocate("10.0.0.2"))
+        self.assertIsNone(pool.allocate("10.0.0.9"))
+        self.assertNotIn("10.0.0.2", pool)
+        self.assertIn("10.0.0.1", pool)
+        self.assertTrue(pool.is_configured("10.0.0.2"))
+        self.assertFalse(pool.is_configured("10.0.0.9"))
+
+    def test_exhausted_pool(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.2"])
+        pool.allocate()
+        pool.allocate()
+        self.assertIsNone(pool.allocate())
+        self.assertIsNone(pool.first_free())
+        self.assertEqual(len(pool), 0)
+
+    def test_release(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.3"])
+        first = pool.allocate()
+        self.assertTrue(pool.release(first))
+        self.assertFalse(pool.release(first))
+        self.assertFalse(pool.release("10.0.0.9"))
+        self.assertEqual(pool.free_count, 3)
+        self.assertEqual(pool.allocate(), first)
+
+    def test_allocation_crosses_bitmap_words(self):
+        pool = AddressPool(["10.0.0.0/24"])
+        allocated = [pool.allocate() for _ in range(WORD_BITS + 1)]
+        self.assertEqual(allocated[-1], ip_to_int("10.0.0.1") + WORD_BITS)
+        # A full word that gets an address back is found again
+        pool.release(allocated[3])
+        self.assertEqual(pool.allocate(), allocated[3])
+        self.assertEqual(pool.allocate(), allocated[-1] + 1)
+
+    def test_exhaust_and_refill_a_multi_word_pool(self):
+        pool = AddressPool(["10.0.0.0/23"])
+        allocated = [pool.allocate() for _ in range(pool.size)]
+        self.assertEqual(len(set(allocated)), pool.size)
+        self.assertIsNone(pool.allocate())
+        for address in reversed(allocated):
+            pool.release(address)
+        self.assertEqual(list(pool), list(pool.addresses()))
+
+    def test_allocation_skips_excluded_addresses(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.4", "!10.0.0.2"])
+        self.assertEqual([int_to_ip(pool.allocate()) for _ in range(3)], ["10.0.0.1", "10.0.0.3", "10.0.0.4"])
+
+
+class PoolAllocateFromTest(unittest.TestCase):
+    def test_position_is_taken_modulo_the_pool_size(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.10"])
+        self.assertEqual(pool.allocate_from(3), ip_to_int("10.0.0.4"))
+        self.assertEqual(pool.allocate_from(12), ip_to_int("10.0.0.3"))
+
+    def test_takes_the_next_free_address(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.10"])
+        pool.allocate("10.0.0.5")
+        pool.allocate("10.0.0.6")
+        self.assertEqual(pool.allocate_from(4), ip_to_int("10.0.0.7"))
+
+    def test_wraps_around_at_the_end_of_the_pool(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.10"])
+        pool.allocate("10.0.0.9")
+        pool.allocate("10.0.0.10")
+        self.assertEqual(pool.allocate_from(8), ip_to_int("10.0.0.1"))
+
+    def test_wraps_around_across_bitmap_words(self):
+        pool = AddressPool(["10.0.0.0/24"])
+        for index in range(WORD_BITS + 10, pool.size):
+            pool.allocate_from(index)
+        pool.allocate_from(0)
+        self.assertEqual(pool.allocate_from(WORD_BITS + 20), ip_to_int("10.0.0.2"))
+
+    def test_jumps_over_full_words(self):
+        pool = AddressPool(["10.0.0.0/23"])
+        for _ in range(2 * WORD_BITS):
+            pool.allocate()
+        self.assertEqual(pool.allocate_from(5), ip_to_int("10.0.0.1") + 2 * WORD_BITS)
+
+    def test_exhausted_pool(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.3"])
+        for position in range(3):
+            pool.allocate_from(position)
+        self.assertIsNone(pool.allocate_from(1))
+        self.assertEqual(pool.free_count, 0)
+
+
+class PoolSliceTest(unittest.TestCase):
+    def test_slices_partition_the_pool(self):
+        pool = AddressPool(["10.0.0.1-10.0.0.5", "10.0.1.1-10.0.1.5"])
+        first, second = pool.slice(0, 7), pool.slice(7, 10)
+        self.assertEqual(addresses(first)[-2:], ["10.0.1.1", "10.0.1.2"])
+        self.assertEqual(addresses(second), ["10.0.1.3", "10.0.1.4", "10.0.1.5"])
+        self.assertEqual(first.size + second.size, pool.size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import struct
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+from dhcp_packet import DHCPPacket, peek_message_type, validate_packet  # noqa: E402
+
+MAC = bytes.fromhex("02aabbccddee")
+
+
+def message(op=1, htype=1, hlen=6, cookie=b"\x63\x82\x53\x63", options=b"\x35\x01\x01"):
+    header = struct.pack("!BBBBIHHIIII16s64s128s4s", op, htype, hlen, 0, 1, 0, 0x8000, 0, 0, 0, 0,
+                         MAC + b"\x00" * 10, b"\x00" * 64, b"\x00" * 128, cookie)
+    return header + options + b"\x3d\x07\x01" + MAC + b"\xff"
+
+
+class ValidatePacketTest(unittest.TestCase):
+    def test_valid_client_messages(self):
+        for msg_type in (1, 3, 4, 7, 8):
+            with self.subTest(msg_type=msg_type):
+                self.assertIsNone(validate_packet(message(options=bytes([53, 1, msg_type]))))
+
+    def test_rejected_datagrams(self):
+        cases = {
+            "short": message()[:242],
+            "op": message(op=2, options=b"\x35\x01\x02"),
+            "hardware": message(htype=6, hlen=16),
+            "magic_cookie": message(cookie=b"\x00" * 4),
+        }
+        for reason, datagram in cases.items():
+            with self.subTest(reason=reason):
+                self.assertEqual(validate_packet(datagram), reason)
+
+    def test_wrong_hardware_length(self):
+        self.assertEqual(validate_packet(message(hlen=8)), "hardware")
+
+    def test_missing_or_server_message_type(self):
+        for options in (b"", b"\x35\x01\x02", b"\x35\x01\x05", b"\x35\x00"):
+            with self.subTest(options=options):
+                self.assertEqual(validate_packet(message(options=options)), "message_type")
+
+    def test_empty_datagram(self):
+        self.assertEqual(validate_packet(b""), "short")
+
+
+class PeekMessageTypeTest(unittest.TestCase):
+    def test_message_type_first(self):
+        self.assertEqual(peek_message_type(message(options=b"\x35\x01\x03")), 3)
+
+    def test_message_type_after_other_options_and_padding(self):
+        options = b"\x00\x00\x32\x04\x0a\x00\x00\x05\x35\x01\x03"
+        self.assertEqual(peek_message_type(message(options=options)), 3)
+
+    def test_no_message_type(self):
+        self.assertIsNone(peek_message_type(message(options=b"")))
+        self.assertIsNone(peek_message_type(message()[:240]))
+
+
+class DHCPPacketTest(unittest.TestCase):
+    def test_too_short(self):
+        with self.assertRaises(ValueError):
+            DHCPPacket(b"\x01" * 100)
+
+    def test_uint32_option_needs_exactly_four_bytes(self):
+        packet = DHCPPacket(message(options=b"\x35\x01\x01\x32\x04\x0a\x00\x00\x05\x33\x02\x0e\x10"))
+        self.assertEqual(packet.uint32_option(50), 0x0A000005)
+        self.assertIsNone(packet.uint32_option(51))
+        self.assertIsNone(packet.uint32_option(54))
+
+    def test_truncated_last_option_is_ignored(self):
+        packet = DHCPPacket(message()[:240] + b"\x35\x01\x01\x32\x04\x0a")
+        self.assertIsNone(packet.uint32_option(50))
+
+
+if __name__ == "__main__":
+    unittest.main()
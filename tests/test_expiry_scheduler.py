@@ -0,0 +1,49 @@
+import math
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+import expiry_scheduler  # noqa: E402
+from expiry_scheduler import ExpiryScheduler, wake_tick  # noqa: E402
+
+# Just past a whole tick, where ceil(due / 0.1) * 0.1 rounds back onto the tick itself
+DUE = math.nextafter(1792195000.0, math.inf)
+
+
+class WakeTickTest(unittest.TestCase):
+    def test_wake_time_is_never_before_the_due_time(self):
+        self.assertLess(math.ceil(DUE / 0.1) * 0.1, DUE)
+        self.assertGreaterEqual(wake_tick(DUE, 0.1) * 0.1, DUE)
+
+    def test_due_times_in_one_tick_share_it(self):
+        self.assertEqual(wake_tick(100.01, 0.1), wake_tick(100.09, 0.1))
+        self.assertEqual(wake_tick(100.1, 0.1), 1001)
+
+
+class ExpirySchedulerTest(unittest.TestCase):
+    def wait_due_at(self, scheduler, now):
+        with mock.patch.object(expiry_scheduler.time, "time", return_value=now):
+            return scheduler.wait_due(max_wait=0)
+
+    def test_does_not_wake_before_the_due_time(self):
+        scheduler = ExpiryScheduler(0.1)
+        scheduler.schedule(DUE)
+        self.assertFalse(self.wait_due_at(scheduler, 1792195000.0))
+        self.assertTrue(self.wait_due_at(scheduler, 1792195000.2))
+
+    def test_pops_every_due_wake_up_once(self):
+        scheduler = ExpiryScheduler(0.1)
+        for due_time in (10.05, 10.01, 20.0, 10.3):
+            scheduler.schedule(due_time)
+        self.assertEqual(len(scheduler._heap), 3)
+        self.assertTrue(self.wait_due_at(scheduler, 15.0))
+        self.assertEqual(scheduler._heap, [200])
+        self.assertFalse(self.wait_due_at(scheduler, 15.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+from ingress_limiter import IngressRateLimiter, TokenBuckets  # noqa: E402
+
+
+def datagram(mac=b"\x02\xaa\xbb\xcc\xdd\xee", giaddr=b"\x00\x00\x00\x00"):
+    return b"\x01\x01\x06\x00" + b"\x00" * 20 + giaddr + mac + b"\x00" * 210
+
+
+class TokenBucketsTest(unittest.TestCase):
+    def test_burst_then_rate(self):
+        buckets = TokenBuckets(rate=2, burst=3)
+        self.assertEqual([buckets.take("a", 0.0) for _ in range(4)], [True, True, True, False])
+        self.assertFalse(buckets.take("a", 0.4))
+        self.assertTrue(buckets.take("a", 0.5))
+        self.assertFalse(buckets.take("a", 0.5))
+
+    def test_tokens_are_capped_at_the_burst(self):
+        buckets = TokenBuckets(rate=10, burst=2)
+        buckets.take("a", 0.0)
+        self.assertEqual([buckets.take("a", 100.0) for _ in range(3)], [True, True, False])
+
+    def test_keys_are_independent(self):
+        buckets = TokenBuckets(rate=1, burst=1)
+        self.assertTrue(buckets.take("a", 0.0))
+        self.assertFalse(buckets.take("a", 0.0))
+        self.assertTrue(buckets.take("b", 0.0))
+
+    def test_full_table_drops_refilled_buckets(self):
+        buckets = TokenBuckets(rate=1, burst=1, max_keys=4)
+        for key in range(4):
+            buckets.take(key, float(key))
+        buckets.take("new", 3.5)
+        # Keys 0-2 refilled (idle >= 1 s); key 3 is still active
+        self.assertEqual(len(buckets), 2)
+        self.assertEqual(buckets.resets, 0)
+
+    def test_full_table_of_active_buckets_is_cleared(self):
+        buckets = TokenBuckets(rate=1, burst=1, max_keys=4)
+        for key in range(4):
+            buckets.take(key, 0.0)
+        buckets.take("new", 0.5)
+        self.assertEqual(len(buckets), 1)
+        self.assertEqual(buckets.resets, 1)
+
+
+class IngressRateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("ingress_limiter.time.monotonic", return_value=0.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unlimited_by_default(self):
+        limiter = IngressRateLimiter()
+        self.assertIsNone(limiter.source_buckets)
+        self.assertIsNone(limiter.mac_buckets)
+        self.assertIsNone(limiter.check(datagram(), "10.0.0.1"))
+
+    def test_mac_limit(self):
+        limiter = IngressRateLimiter(mac_rate=1, mac_burst=2)
+        self.assertIsNone(limiter.check(datagram(), "10.0.0.1"))
+        self.assertIsNone(limiter.check(datagram(), "10.0.0.2"))
+        self.assertEqual(limiter.check(datagram(), "10.0.0.3"), "mac")
+        self.assertIsNone(limiter.check(datagram(mac=b"\x02" * 6), "10.0.0.3"))
+
+    def test_source_limit_keys_on_the_relay_address(self):
+        limiter = IngressRateLimiter(source_rate=1, source_burst=1)
+        relay = b"\x0a\x00\x00\x01"
+        self.assertIsNone(limiter.check(datagram(giaddr=relay), "10.0.0.1"))
+        self.assertEqual(limiter.check(datagram(giaddr=relay), "10.0.0.2"), "source")
+        self.assertIsNone(limiter.check(datagram(), "10.0.0.1"))
+        self.assertEqual(limiter.check(datagram(), "10.0.0.1"), "source")
+
+    def test_source_limit_is_checked_first(self):
+        limiter = IngressRateLimiter(mac_rate=1, mac_burst=5, source_rate=1, source_burst=1)
+        limiter.check(datagram(), "10.0.0.1")
+        self.assertEqual(limiter.check(datagram(), "10.0.0.1"), "source")
+
+    def test_short_datagram_is_only_source_limited(self):
+        limiter = IngressRateLimiter(mac_rate=1, mac_burst=1)
+        for _ in range(3):
+            self.assertIsNone(limiter.check(b"\x01" * 20, "10.0.0.1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
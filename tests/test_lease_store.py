@@ -0,0 +1,99 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+from lease_store import LeaseStore, OFFERED, BOUND, RELEASED  # noqa: E402
+
+
+class LeaseStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store = LeaseStore()
+
+    def test_indexes_follow_a_dora(self):
+        store = self.store
+        store.offer(1, 101, 3600, 0xA, 100.0)
+        self.assertEqual(store.get(1).state, OFFERED)
+        self.assertIs(store.find_by_ip(101), store.get(1))
+        store.bind(1, 101, 3700.0, 3600, 0xB)
+        self.assertEqual(store.count(OFFERED), 0)
+        self.assertEqual(store.count(BOUND), 1)
+        self.assertEqual(store.get(1).xid, 0xB)
+
+    def test_a_new_offer_frees_the_previous_address(self):
+        store = self.store
+        store.offer(1, 101, 3600, 0xA, 100.0)
+        store.offer(1, 102, 3600, 0xB, 100.0)
+        self.assertIsNone(store.find_by_ip(101))
+        self.assertEqual(store.held_ips(), [102])
+        self.assertEqual(len(store), 1)
+
+    def test_release_keeps_the_address_until_expiry(self):
+        store = self.store
+        self.assertIsNone(store.release(1, 50.0))
+        store.offer(1, 101, 3600, 0xA, 100.0)
+        self.assertIsNone(store.release(1, 50.0))
+        store.bind(1, 101, 3700.0, 3600, 0xA)
+        self.assertEqual(store.release(1, 50.0).state, RELEASED)
+        self.assertIs(store.find_by_ip(101), store.get(1))
+        self.assertEqual(store.next_expiry(), 50.0)
+
+    def test_pop_expired_returns_due_records_in_expiry_order(self):
+        store = self.store
+        store.bind(1, 101, 30.0, 3600, 1)
+        store.bind(2, 102, 10.0, 3600, 2)
+        store.bind(3, 103, 20.0, 3600, 3)
+        store.bind(4, 104, 40.0, 3600, 4)
+        self.assertEqual(store.pop_expired(5.0), [])
+        expired = store.pop_expired(30.0)
+        self.assertEqual([lease.mac_address for lease in expired], [2, 3, 1])
+        self.assertEqual(len(store), 1)
+        self.assertIsNone(store.find_by_ip(102))
+        self.assertEqual(store.next_expiry(), 40.0)
+
+    def test_renewal_moves_the_expiry(self):
+        store = self.store
+        store.bind(1, 101, 10.0, 3600, 1)
+        store.bind(2, 102, 20.0, 3600, 2)
+        store.bind(1, 101, 30.0, 3600, 3)
+        self.assertEqual(store.next_expiry(), 20.0)
+        self.assertEqual([lease.mac_address for lease in store.pop_expired(25.0)], [2])
+        self.assertEqual([lease.mac_address for lease in store.pop_expired(30.0)], [1])
+
+    def test_removed_records_do_not_expire(self):
+        store = self.store
+        store.bind(1, 101, 10.0, 3600, 1)
+        self.assertEqual(store.remove(1).ip, 101)
+        self.assertIsNone(store.remove(1))
+        self.assertIsNone(store.next_expiry())
+        self.assertEqual(store.pop_expired(100.0), [])
+
+    def test_oldest_offer(self):
+        store = self.store
+        store.offer(1, 101, 3600, 1, 10.0)
+        store.offer(2, 102, 3600, 2, 11.0)
+        store.bind(3, 103, 5.0, 3600, 3)
+        self.assertEqual(store.oldest(OFFERED).mac_address, 1)
+        store.bind(1, 101, 3700.0, 3600, 1)
+        self.assertEqual(store.oldest(OFFERED).mac_address, 2)
+
+    def test_expiry_listener_is_called_with_each_new_expiry(self):
+        expiries = []
+        self.store.expiry_listener = expiries.append
+        self.store.offer(1, 101, 3600, 1, 10.0)
+        self.store.bind(1, 101, 3700.0, 3600, 1)
+        self.store.release(1, 20.0)
+        self.assertEqual(expiries, [10.0, 3700.0, 20.0])
+
+    def test_expiry_index_stays_bounded_under_renewals(self):
+        store = self.store
+        for i in range(5000):
+            store.bind(1, 101, float(i), 3600, i)
+        self.assertLessEqual(len(store._by_expiry), 2 * len(store) + 1024 + 1)
+        self.assertEqual(store.next_expiry(), 4999.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
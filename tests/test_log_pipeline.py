@@ -0,0 +1,46 @@
+import logging
+import os
+import queue
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+from log_pipeline import BoundedQueueHandler, LogRateLimiter  # noqa: E402
+
+THREADS, RECORDS = 8, 5000
+
+
+class BoundedQueueHandlerTest(unittest.TestCase):
+    def test_drops_from_many_threads_are_all_counted(self):
+        handler = BoundedQueueHandler(queue.Queue(maxsize=1))
+        record = logging.makeLogRecord({"msg": "x"})
+        handler.enqueue(record)
+
+        def flood():
+            for _ in range(RECORDS):
+                handler.enqueue(record)
+
+        threads = [threading.Thread(target=flood) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(handler.dropped, THREADS * RECORDS)
+        self.assertEqual(handler.queue.qsize(), 1)
+
+
+class LogRateLimiterTest(unittest.TestCase):
+    def test_each_kind_has_its_own_burst(self):
+        limiter = LogRateLimiter(rate=0.001, burst=2)
+        self.assertEqual([limiter.allow("a", logging.INFO) for _ in range(3)], [True, True, False])
+        self.assertTrue(limiter.allow("b", logging.INFO))
+        self.assertTrue(limiter.allow("a", logging.ERROR))
+        self.assertEqual(limiter.take_suppressed(), {"a": 1})
+        self.assertEqual(limiter.take_suppressed(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
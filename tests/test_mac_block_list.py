@@ -0,0 +1,80 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+from mac_block_list import MacBlockList  # noqa: E402
+from addresses import mac_to_int  # noqa: E402
+
+
+class MacBlockListTest(unittest.TestCase):
+    def test_single_address(self):
+        block_list = MacBlockList(["A0:B3:CC:49:FC:D7"])
+        self.assertTrue(block_list.is_blocked("a0:b3:cc:49:fc:d7"))
+        self.assertTrue(block_list.is_blocked("a0-b3-cc-49-fc-d7"))
+        self.assertTrue(block_list.is_blocked(mac_to_int("a0:b3:cc:49:fc:d7")))
+        self.assertFalse(block_list.is_blocked("a0:b3:cc:49:fc:d8"))
+
+    def test_prefix_wildcard(self):
+        block_list = MacBlockList(["a0:b3:cc:*"])
+        self.assertIn("a0:b3:cc:00:00:00", block_list)
+        self.assertIn("a0:b3:cc:ff:ff:ff", block_list)
+        self.assertNotIn("a0:b3:cd:00:00:00", block_list)
+
+    def test_prefix_length(self):
+        block_list = MacBlockList(["a0:b3:cc:40:00:00/26"])
+        self.assertIn("a0:b3:cc:7f:ff:ff", block_list)
+        self.assertNotIn("a0:b3:cc:80:00:00", block_list)
+        self.assertNotIn("a0:b3:cc:3f:ff:ff", block_list)
+
+    def test_prefix_length_zero_blocks_everything(self):
+        self.assertIn("12:34:56:78:9a:bc", MacBlockList(["00:00:00:00:00:00/0"]))
+
+    def test_mask_rule(self):
+        # Locally administered addresses: second-lowest bit of the first octet set
+        block_list = MacBlockList(["02:00:00:00:00:00/02:00:00:00:00:00"])
+        self.assertIn("02:11:22:33:44:55", block_list)
+        self.assertIn("fe:11:22:33:44:55", block_list)
+        self.assertNotIn("00:11:22:33:44:55", block_list)
+        self.assertNotIn("fd:11:22:33:44:55", block_list)
+
+    def test_mask_rule_ignores_bits_of_the_value_outside_the_mask(self):
+        block_list = MacBlockList(["a0:b3:cc:12:34:56/ff:ff:ff:00:00:00"])
+        self.assertIn("a0:b3:cc:00:00:01", block_list)
+        self.assertEqual(block_list.rules(), ["a0:b3:cc:00:00:00/ff:ff:ff:00:00:00"])
+
+    def test_rules_with_the_same_mask_share_one_set(self):
+        block_list = MacBlockList(["a0:b3:cc:*", "00:1a:2b:*", "11:22:33:00:00:00/24"])
+        self.assertEqual(len(block_list._rules), 1)
+        self.assertEqual(len(block_list), 3)
+        self.assertIn("11:22:33:44:55:66", block_list)
+
+    def test_comments_and_blank_lines_are_ignored(self):
+        block_list = MacBlockList(["# vendors", "", "a0:b3:cc:*  # lab"])
+        self.assertEqual(len(block_list), 1)
+
+    def test_add_and_remove(self):
+        block_list = MacBlockList()
+        self.assertTrue(block_list.add("a0:b3:cc:*"))
+        self.assertFalse(block_list.add("a0:b3:cc:00:00:00/24"))
+        self.assertTrue(block_list.remove("a0:b3:cc:00:00:00/ff:ff:ff:00:00:00"))
+        self.assertFalse(block_list.remove("a0:b3:cc:*"))
+        self.assertNotIn("a0:b3:cc:01:02:03", block_list)
+        self.assertEqual(block_list._rules, {})
+
+    def test_copy_is_independent(self):
+        block_list = MacBlockList(["a0:b3:cc:*"])
+        copy = block_list.copy()
+        copy.add("00:11:22:33:44:55")
+        self.assertNotIn("00:11:22:33:44:55", block_list)
+
+    def test_invalid_rules_raise(self):
+        for rule in ("a0:b3:cc", "*", "a0:b3:cc:00:00:00/49", "zz:b3:cc:00:00:00"):
+            with self.subTest(rule=rule), self.assertRaises(ValueError):
+                MacBlockList.parse_rule(rule)
+
+
+if __name__ == "__main__":
+    unittest.main()
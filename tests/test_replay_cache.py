@@ -0,0 +1,70 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+from replay_cache import ReplayCache  # noqa: E402
+
+
+class ReplayCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("replay_cache.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hit_and_miss(self):
+        cache = ReplayCache(capacity=4, ttl=10.0)
+        cache.put((1, 7, 1), b"offer")
+        self.assertEqual(cache.get((1, 7, 1)), b"offer")
+        self.assertIsNone(cache.get((1, 8, 1)))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_entries_expire_after_ttl(self):
+        cache = ReplayCache(capacity=4, ttl=10.0)
+        cache.put("a", b"x")
+        self.now += 9.9
+        self.assertEqual(cache.get("a"), b"x")
+        self.now += 0.1
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ReplayCache(capacity=2, ttl=10.0)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_expired_entries_are_dropped_without_counting_evictions(self):
+        cache = ReplayCache(capacity=2, ttl=10.0)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.now += 10.0
+        cache.put("c", 3)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_discard(self):
+        cache = ReplayCache(capacity=4, ttl=10.0)
+        cache.put("a", 1)
+        cache.discard("a")
+        cache.discard("missing")
+        self.assertIsNone(cache.get("a"))
+
+    def test_zero_capacity_disables_the_cache(self):
+        cache = ReplayCache(capacity=0)
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,271 @@
+import logging
+import os
+import shutil
+import socket
+import struct
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+import server_config as config  # noqa: E402
+from server import Server  # noqa: E402
+from address_pool import AddressPool  # noqa: E402
+from addresses import ip_to_int  # noqa: E402
+from expiry_scheduler import ExpiryScheduler, wake_tick  # noqa: E402
+from lease_journal import LeaseJournal  # noqa: E402
+from lease_store import BOUND, RELEASED  # noqa: E402
+
+DISCOVER, OFFER, REQUEST, DECLINE, ACK, NAK, RELEASE = 1, 2, 3, 4, 5, 6, 7
+
+
+def client_message(mac, xid, msg_type, requested_ip=None):
+    header = struct.pack("!BBBBIHHIIII16s64s128s4s", 1, 1, 6, 0, xid, 0, 0x8000, 0, 0, 0, 0,
+                         mac + b"\x00" * 10, b"\x00" * 64, b"\x00" * 128, b"\x63\x82\x53\x63")
+    options = b"\x35\x01" + bytes([msg_type]) + b"\x3d\x07\x01" + mac
+    if requested_ip:
+        options += b"\x32\x04" + socket.inet_aton(requested_ip)
+    return header + options + b"\xff"
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, data, address):
+        self.sent.append(bytes(data))
+        return len(data)
+
+    @property
+    def last(self):
+        return self.sent[-1]
+
+
+class ServerTestCase(unittest.TestCase):
+    """
+    Runs the handlers inline (no state owner) on a three-address pool, without a journal.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.previous_dir = os.getcwd()
+        cls.work_dir = tempfile.mkdtemp(prefix="dhcp-test-")
+        os.chdir(cls.work_dir)
+        os.makedirs("output")
+        config.server_ip = "127.0.0.1"
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.previous_dir)
+        shutil.rmtree(cls.work_dir, ignore_errors=True)
+
+    def setUp(self):
+        Server()
+        logging.disable(logging.CRITICAL)
+        for lease in config.lease_store.leases():
+            config.lease_store.remove(lease.mac_address)
+        config.lease_store.expiry_listener = None
+        Server.ip_pool = AddressPool(["10.0.0.1-10.0.0.3"])
+        self.socket = RecordingSocket()
+
+    def send(self, mac, xid, msg_type, requested_ip=None):
+        """
+        Handles one client message and returns (message type, yiaddr) of the reply, or None.
+        """
+        sent = len(self.socket.sent)
+        Server.handle_client(client_message(mac, xid, msg_type, requested_ip), "0.0.0.0", self.socket)
+        if len(self.socket.sent) == sent:
+            return None
+        reply = self.socket.last
+        return reply[242], socket.inet_ntoa(reply[16:20])
+
+    def dora(self, mac, xid):
+        msg_type, offered_ip = self.send(mac, xid, DISCOVER)
+        self.assertEqual(msg_type, OFFER)
+        self.assertEqual(self.send(mac, xid, REQUEST, offered_ip), (ACK, offered_ip))
+        return offered_ip
+
+
+class HandlerTest(ServerTestCase):
+    MAC = bytes.fromhex("020000000001")
+
+    def test_dora(self):
+        self.assertEqual(self.send(self.MAC, 1, DISCOVER), (OFFER, "10.0.0.1"))
+        self.assertEqual(Server.ip_pool.free_count, 2)
+        self.assertEqual(self.send(self.MAC, 1, REQUEST, "10.0.0.1"), (ACK, "10.0.0.1"))
+        lease = config.lease_store.get(int.from_bytes(self.MAC, "big"))
+        self.assertEqual((lease.ip, lease.state, lease.xid), (ip_to_int("10.0.0.1"), BOUND, 1))
+        self.assertEqual(Server.ip_pool.free_count, 2)
+
+    def test_request_without_offer_is_refused(self):
+        self.assertEqual(self.send(self.MAC, 1, REQUEST, "10.0.0.2")[0], NAK)
+        self.assertEqual(len(config.lease_store), 0)
+
+    def test_retransmitted_request_is_answered_from_the_replay_cache(self):
+        self.dora(self.MAC, 1)
+        ack = self.socket.last
+        hits = Server.replay_cache.hits
+        self.send(self.MAC, 1, REQUEST, "10.0.0.1")
+        self.assertEqual(self.socket.last, ack)
+        self.assertEqual(Server.replay_cache.hits, hits + 1)
+
+    def test_release_returns_the_address_on_the_next_expiry_pass(self):
+        self.dora(self.MAC, 1)
+        self.assertIsNone(self.send(self.MAC, 2, RELEASE))
+        self.assertEqual(config.lease_store.get(int.from_bytes(self.MAC, "big")).state, RELEASED)
+        Server.expire_due_leases()
+        self.assertEqual(len(config.lease_store), 0)
+        self.assertEqual(Server.ip_pool.free_count, 3)
+
+    def test_expiry_pass_re_arms_for_the_earliest_lease(self):
+        self.dora(self.MAC, 1)
+        Server.expiry_scheduler = ExpiryScheduler(0.1)
+        try:
+            # An early wake-up: nothing is due yet, but the lease must keep a wake-up time
+            Server.expire_due_leases()
+            lease = config.lease_store.get(int.from_bytes(self.MAC, "big"))
+            self.assertEqual(Server.expiry_scheduler._heap, [wake_tick(lease.expiry, 0.1)])
+        finally:
+            Server.expiry_scheduler = None
+
+    def test_released_lease_is_not_replayed(self):
+        self.dora(self.MAC, 1)
+        self.send(self.MAC, 2, RELEASE)
+        Server.expire_due_leases()
+        self.assertEqual(self.send(self.MAC, 1, REQUEST, "10.0.0.1")[0], NAK)
+
+    def test_renewed_then_released_lease_is_not_replayed(self):
+        self.dora(self.MAC, 1)
+        self.assertEqual(self.send(self.MAC, 2, REQUEST, "10.0.0.1"), (ACK, "10.0.0.1"))
+        self.assertEqual(config.lease_store.get(int.from_bytes(self.MAC, "big")).xid, 2)
+        self.send(self.MAC, 3, RELEASE)
+        Server.expire_due_leases()
+        self.assertEqual(Server.ip_pool.free_count, 3)
+        # Neither the first ACK nor the renewal's may hand the address out again
+        self.assertEqual(self.send(self.MAC, 1, REQUEST, "10.0.0.1")[0], NAK)
+        self.assertEqual(self.send(self.MAC, 2, REQUEST, "10.0.0.1")[0], NAK)
+
+
+class OfferReservationTest(ServerTestCase):
+    FIRST, SECOND = bytes.fromhex("020000000001"), bytes.fromhex("020000000002")
+
+    def test_concurrent_discovers_get_different_addresses(self):
+        self.assertEqual(self.send(self.FIRST, 1, DISCOVER), (OFFER, "10.0.0.1"))
+        self.assertEqual(self.send(self.SECOND, 2, DISCOVER), (OFFER, "10.0.0.2"))
+        self.assertEqual(self.send(self.SECOND, 2, REQUEST, "10.0.0.2"), (ACK, "10.0.0.2"))
+        self.assertEqual(self.send(self.FIRST, 1, REQUEST, "10.0.0.1"), (ACK, "10.0.0.1"))
+
+    def test_decline_returns_the_address_to_the_pool(self):
+        self.send(self.FIRST, 1, DISCOVER)
+        self.assertEqual(Server.ip_pool.free_count, 2)
+        self.assertIsNone(self.send(self.FIRST, 1, DECLINE))
+        self.assertEqual(Server.ip_pool.free_count, 3)
+        self.assertEqual(len(config.lease_store), 0)
+        # The declined offer is not replayed, and a REQUEST for it is refused
+        self.assertEqual(self.send(self.FIRST, 1, REQUEST, "10.0.0.1")[0], NAK)
+        self.assertEqual(self.send(self.SECOND, 2, DISCOVER), (OFFER, "10.0.0.1"))
+
+    def test_exhausted_pool_is_refused(self):
+        for i in range(3):
+            self.dora(bytes([2, 0, 0, 0, 1, i]), 10 + i)
+        self.assertEqual(self.send(self.FIRST, 1, DISCOVER)[0], NAK)
+        self.assertEqual(Server.pool_exhausted.values[None], 1)
+
+
+class JournalRestartTest(ServerTestCase):
+    FIRST, SECOND = bytes.fromhex("020000000001"), bytes.fromhex("020000000002")
+
+    def setUp(self):
+        super().setUp()
+        self.paths = (os.path.join(self.work_dir, "lease_journal.log"),
+                      os.path.join(self.work_dir, "lease_snapshot.json"))
+        for path in self.paths + (self.paths[0] + ".old",):
+            if os.path.exists(path):
+                os.remove(path)
+        Server.lease_journal = LeaseJournal(*self.paths)
+
+    def restart(self):
+        """
+        Drops the in-memory state and rebuilds it from the journal files, like a new process.
+        """
+        for lease in config.lease_store.leases():
+            config.lease_store.remove(lease.mac_address)
+        Server.ip_pool = AddressPool(["10.0.0.1-10.0.0.3"])
+        Server.lease_journal = LeaseJournal(*self.paths)
+        Server.restore_leases()
+
+    def assert_restored(self, mac, ip, xid):
+        lease = config.lease_store.get(int.from_bytes(mac, "big"))
+        self.assertEqual((lease.ip, lease.state, lease.xid), (ip_to_int(ip), BOUND, xid))
+        self.assertNotIn(ip, Server.ip_pool)
+
+    def test_bound_leases_survive_a_restart(self):
+        self.dora(self.FIRST, 1)
+        self.dora(self.SECOND, 2)
+        self.restart()
+        self.assert_restored(self.FIRST, "10.0.0.1", 1)
+        self.assert_restored(self.SECOND, "10.0.0.2", 2)
+        self.assertEqual(Server.ip_pool.free_count, 1)
+        # A renewal after the restart is acknowledged with the same address
+        self.assertEqual(self.send(self.FIRST, 3, REQUEST, "10.0.0.1"), (ACK, "10.0.0.1"))
+
+    def test_released_and_expired_leases_are_not_restored(self):
+        self.dora(self.FIRST, 1)
+        self.dora(self.SECOND, 2)
+        self.send(self.FIRST, 3, RELEASE)
+        self.restart()
+        self.assertIsNone(config.lease_store.get(int.from_bytes(self.FIRST, "big")))
+        self.assert_restored(self.SECOND, "10.0.0.2", 2)
+        self.assertIn("10.0.0.1", Server.ip_pool)
+
+        self.send(self.SECOND, 4, RELEASE)
+        Server.expire_due_leases()
+        self.restart()
+        self.assertEqual(len(config.lease_store), 0)
+        self.assertEqual(Server.ip_pool.free_count, 3)
+
+    def test_compaction_keeps_the_state_across_a_restart(self):
+        self.dora(self.FIRST, 1)
+        self.dora(self.SECOND, 2)
+        self.send(self.SECOND, 3, RELEASE)
+        Server.expire_due_leases()
+        Server.lease_journal.compact(Server.lease_state_snapshot)
+        self.assertEqual(os.path.getsize(self.paths[0]), 0)
+        # Events after the compaction are replayed on top of the snapshot
+        self.assertEqual(self.send(self.FIRST, 4, REQUEST, "10.0.0.1"), (ACK, "10.0.0.1"))
+        self.restart()
+        self.assert_restored(self.FIRST, "10.0.0.1", 4)
+        self.assertIsNone(config.lease_store.get(int.from_bytes(self.SECOND, "big")))
+        self.assertEqual(Server.ip_pool.free_count, 2)
+
+
+class PoolFileTest(ServerTestCase):
+    LINES = ["# office", "10.0.0.1-10.0.0.3", "10.0.1.0/30", "!10.0.0.2"]
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.work_dir, "ip_pool.txt")
+        Server.write_ip_pool(self.path, self.LINES)
+
+    def test_written_lines_are_loaded_unchanged(self):
+        self.assertEqual(Server.load_ip_pool(self.path), self.LINES)
+
+    def test_invalid_lines_leave_the_file_unchanged(self):
+        for lines in (self.LINES + ["10.0.0.9-10.0.0.5"], self.LINES + ["10.0.0.300"]):
+            with self.assertRaises(ValueError):
+                Server.write_ip_pool(self.path, lines)
+        self.assertEqual(Server.load_ip_pool(self.path), self.LINES)
+
+    def test_deleting_an_address_of_a_range_appends_an_exclusion(self):
+        Server.ip_pool = Server.build_ip_pool(Server.load_ip_pool(self.path))
+        Server.delete_ip_from_pool("10.0.0.3", self.path)
+        self.assertNotIn("10.0.0.3", Server.ip_pool)
+        lines = Server.load_ip_pool(self.path)
+        self.assertEqual(lines, self.LINES + ["!10.0.0.3"])
+        self.assertEqual(Server.build_ip_pool(lines).free_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
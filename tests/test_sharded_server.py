@@ -0,0 +1,113 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import struct
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "src", "server"))
+
+import server_config as config  # noqa: E402
+from server import Server  # noqa: E402
+from sharded_server import run_shard  # noqa: E402
+
+SHARDS = 2
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(("0.0.0.0", 0))
+        return probe.getsockname()[1]
+
+
+def discover(mac, xid):
+    header = struct.pack("!BBBBIHHIIII16s64s128s4s", 1, 1, 6, 0, xid, 0, 0x8000, 0, 0, 0, 0,
+                         mac + b"\x00" * 10, b"\x00" * 64, b"\x00" * 128, b"\x63\x82\x53\x63")
+    return header + b"\x35\x01\x01\x3d\x07\x01" + mac + b"\xff"
+
+
+class ShardedServerTest(unittest.TestCase):
+    """
+    Runs two shard processes on free ports and counts the replies to single DISCOVERs.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.previous_dir = os.getcwd()
+        cls.work_dir = tempfile.mkdtemp(prefix="dhcp-test-")
+        os.chdir(cls.work_dir)
+        os.makedirs("output")
+        with open("ip_pool.txt", "w") as file:
+            file.write("10.0.0.0/24\n")
+        open("blocked_mac.txt", "w").close()
+
+        config.listen_address, config.server_ip = "0.0.0.0", "127.0.0.1"
+        config.server_port, config.client_port = free_port(), free_port()
+        config.metrics_enabled = False
+        config.lease_journal_path = os.path.join(cls.work_dir, "lease_journal.log")
+        config.lease_snapshot_path = os.path.join(cls.work_dir, "lease_snapshot.json")
+        Server()
+        logging.disable(logging.CRITICAL)
+
+        cls.client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        cls.client.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        cls.client.bind(("0.0.0.0", config.client_port))
+        cls.client.settimeout(0.2)
+
+        ipc_dir = os.path.join(cls.work_dir, "ipc")
+        os.makedirs(ipc_dir)
+        context = multiprocessing.get_context("fork")
+        cls.shards = [context.Process(target=run_shard, daemon=True, args=(
+            i, SHARDS, ipc_dir, os.path.abspath("ip_pool.txt"), os.path.abspath("blocked_mac.txt")))
+            for i in range(SHARDS)]
+        for shard in cls.shards:
+            shard.start()
+        deadline = time.monotonic() + 10
+        while len(os.listdir(ipc_dir)) < SHARDS and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    @classmethod
+    def tearDownClass(cls):
+        for shard in cls.shards:
+            shard.terminate()
+            shard.join()
+        cls.client.close()
+        os.chdir(cls.previous_dir)
+        shutil.rmtree(cls.work_dir, ignore_errors=True)
+
+    def replies(self, xid, wait=1.0):
+        types = []
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            try:
+                data = self.client.recv(2048)
+            except socket.timeout:
+                continue
+            if int.from_bytes(data[4:8], "big") == xid:
+                types.append(data[242])
+        return types
+
+    def test_broadcast_discover_gets_one_offer(self):
+        try:
+            self.client.sendto(discover(bytes.fromhex("020000000001"), 0x1001),
+                               ("255.255.255.255", config.server_port))
+        except OSError as e:
+            self.skipTest(f"cannot send a broadcast here: {e}")
+        self.assertEqual(self.replies(0x1001), [2])
+
+    def test_unicast_discover_gets_one_offer(self):
+        # Whichever shard the kernel picks, the owner answers once
+        for i in range(4):
+            xid = 0x2000 + i
+            self.client.sendto(discover(bytes.fromhex(f"02000000010{i}"), xid),
+                               ("127.0.0.1", config.server_port))
+            self.assertEqual(self.replies(xid, wait=0.5), [2])
+
+
+if __name__ == "__main__":
+    unittest.main()